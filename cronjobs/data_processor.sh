@@ -17,6 +17,11 @@ function human_fixes_check() {
   else
     echo "No fixes required"
   fi
+
+  profile_path="/tmp/dadguide_pipeline_profile.txt"
+  if [[ -s ${profile_path} ]]; then
+    hook_file "${profile_path}"
+  fi
 }
 
 flock -xn /tmp/dg_processor.lck python3 "${ETL_DIR}/data_processor.py" \
@@ -26,6 +31,8 @@ flock -xn /tmp/dg_processor.lck python3 "${ETL_DIR}/data_processor.py" \
   --output_dir="${DADGUIDE_DATA_DIR}/processed" \
   --db_config="${DB_CONFIG}" \
   --server=$1 \
+  --parallelism=4 \
+  --skill_text_cache="${DADGUIDE_DATA_DIR}/processed/skill_text_cache.pickle" \
   --doupdates
 
 human_fixes_check
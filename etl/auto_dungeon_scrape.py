@@ -51,6 +51,8 @@ def parse_args():
                              help="Minimum stored wave count to skip loading wave data")
     input_group.add_argument("--maximum_wave_age", default=90, type=int,
                              help="Number of days before wave data becomes obsolete and needs to be reloaded")
+    input_group.add_argument("--archive_chunk_size", default=5000, type=int,
+                             help="Number of obsolete wave rows moved to the backup database per transaction")
 
     output_group = parser.add_argument_group("Output")
     output_group.add_argument("--doupdates", default=False,
@@ -98,18 +100,68 @@ FROM (
 ) AS entry_id_pull_time
 '''
 
+# Old data is moved in chunks of consecutive ids, each chunk in its own transaction. Archived rows are
+# deleted, so an interrupted archive just picks up the remaining old rows on the next run.
+# The date is pinned for the whole archive so that every chunk agrees on what counts as old.
+OLD_DATA_CONDITION = '''
+dungeon_id={dungeon_id} AND floor_id={floor_id} AND DATEDIFF('{today}', pull_time) >= {age}
+'''
+
+NEXT_CHUNK_END_SQL = '''
+SELECT MAX(id) AS chunk_end FROM (
+    SELECT id FROM wave_data
+    WHERE {condition} AND id > {after_id}
+    ORDER BY id
+    LIMIT {chunk_size}
+) AS chunk
+'''
+
 MIGRATE_OLD_DATA_SQL = '''
 INSERT INTO dadguide_wave_backup.wave_data
 SELECT * FROM wave_data
-WHERE dungeon_id={dungeon_id} AND floor_id={floor_id} AND DATEDIFF(NOW(), pull_time) >= {age};
+WHERE {condition} AND id > {after_id} AND id <= {chunk_end};
 '''
 
 DELETE_OLD_DATA_SQL = '''
 DELETE FROM wave_data
-WHERE dungeon_id={dungeon_id} AND floor_id={floor_id} AND DATEDIFF(NOW(), pull_time) >= {age};
+WHERE {condition} AND id > {after_id} AND id <= {chunk_end};
 '''
 
 
+def archive_old_data(args, db_wrapper, dungeon_id, floor_id) -> int:
+    """Moves obsolete wave rows for a floor into the backup database, one chunk per transaction.
+
+    Returns the number of rows moved.
+    """
+    today = db_wrapper.get_single_value('SELECT CURDATE()')
+    condition = OLD_DATA_CONDITION.format(age=args.maximum_wave_age, dungeon_id=dungeon_id,
+                                          floor_id=floor_id, today=today).strip()
+    start = time.perf_counter()
+    moved = 0
+    after_id = 0
+    while True:
+        chunk_end = db_wrapper.get_single_value(
+            NEXT_CHUNK_END_SQL.format(condition=condition, after_id=after_id, chunk_size=args.archive_chunk_size),
+            op=int, fail_on_empty=False)
+        if chunk_end is None:
+            break
+
+        chunk_args = dict(condition=condition, after_id=after_id, chunk_end=chunk_end)
+        with db_wrapper.transaction(), db_wrapper.connection.cursor() as cursor:
+            db_wrapper.execute(cursor, MIGRATE_OLD_DATA_SQL.format(**chunk_args))
+            migrate_count = cursor.rowcount
+            db_wrapper.execute(cursor, DELETE_OLD_DATA_SQL.format(**chunk_args))
+            delete_count = cursor.rowcount
+            if delete_count != migrate_count:  # Compare what we migrated against what we deleted
+                raise ValueError('wrong delete count:', delete_count, 'vs', migrate_count)
+
+        moved += migrate_count
+        after_id = chunk_end
+        elapsed = time.perf_counter() - start
+        print(f'archived {moved} rows up to id {chunk_end} ({moved / max(elapsed, 1e-9):.0f} rows/s)')
+    return moved
+
+
 def load_dungeons(args, db_wrapper, current_dungeons, api_client):
     """Scrapes data for all current dungeons.
 
@@ -179,32 +231,12 @@ def load_dungeons(args, db_wrapper, current_dungeons, api_client):
             # also ensure that the normal/technical data is up to date.
             if should_purge:
                 try:
-                    db_wrapper.connection.autocommit(False)
-                    with db_wrapper.connection.cursor() as cursor:
-                        sql = MIGRATE_OLD_DATA_SQL.format(age=args.maximum_wave_age,
-                                                          dungeon_id=dungeon_id,
-                                                          floor_id=floor_id)
-                        db_wrapper.execute(cursor, sql)
-                        migrate_count = cursor.rowcount
-                        if migrate_count < older_count:  # The older_count is the number of entries, this is raw rows
-                            db_wrapper.connection.rollback()
-                            raise ValueError('wrong migrate count:', migrate_count, 'vs', older_count)
-
-                        sql = DELETE_OLD_DATA_SQL.format(age=args.maximum_wave_age,
-                                                         dungeon_id=dungeon_id,
-                                                         floor_id=floor_id)
-                        db_wrapper.execute(cursor, sql)
-                        delete_count = cursor.rowcount
-                        if delete_count != migrate_count:  # Compare what we migrated against what we deleted
-                            db_wrapper.connection.rollback()
-                            raise ValueError('wrong delete count:', delete_count, 'vs', migrate_count)
-
-                        db_wrapper.connection.commit()
-                        print('migration complete')
+                    migrate_count = archive_old_data(args, db_wrapper, dungeon_id, floor_id)
+                    if migrate_count < older_count:  # The older_count is the number of entries, this is raw rows
+                        raise ValueError('wrong migrate count:', migrate_count, 'vs', older_count)
+                    print('migration complete')
                 except Exception as ex:
                     print('failed to migrate data:', ex)
-                finally:
-                    db_wrapper.connection.autocommit(True)
 
 
 def identify_dungeons(database):
@@ -250,7 +282,7 @@ def load_data(args):
         fail_logger.addHandler(logging.FileHandler('/tmp/autodungeon_processor_issues.txt', mode='w'))
 
     pad_db = merged_database.Database(server, args.input_dir)
-    pad_db.load_database(skip_skills=True, skip_extra=True)
+    pad_db.load_database(skip_skills=True, skip_extra=True, skip_cards=True, skip_enemy_skills=True)
 
     with open(args.db_config) as f:
         db_config = json.load(f)
@@ -7,20 +7,25 @@ import argparse
 import json
 import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
+from pad.common.profiling import ProcessorProfiler
 from pad.common.shared_types import Server
 from pad.db.db_util import DbWrapper
+from pad.db.tstamp_journal import TstampJournal
+from pad.raw.skills.skill_text_cache import skill_text_cache
 from pad.raw_processor import crossed_data, merged_database
 from pad.storage_processor.awoken_skill_processor import AwokenSkillProcessor
 from pad.storage_processor.dimension_processor import DimensionProcessor
 from pad.storage_processor.dungeon_content_processor import DungeonContentProcessor
 from pad.storage_processor.dungeon_processor import DungeonProcessor
 from pad.storage_processor.egg_machine_processor import EggMachineProcessor
-from pad.storage_processor.enemy_skill_processor import EnemySkillProcessor
+from pad.storage_processor.enemy_skill_processor import EnemySkillProcessor, select_used_skills
 from pad.storage_processor.exchange_processor import ExchangeProcessor
 from pad.storage_processor.latent_skill_processor import LatentSkillProcessor
 from pad.storage_processor.monster_processor import MonsterProcessor
+from pad.storage_processor.processor_checkpoint import ProcessorCheckpoint, compute_input_key
+from pad.storage_processor.processor_scheduler import ProcessorScheduler, ProcessorStep
 from pad.storage_processor.purchase_processor import PurchaseProcessor
 from pad.storage_processor.purge_data_processor import PurgeDataProcessor
 from pad.storage_processor.rank_reward_processor import RankRewardProcessor
@@ -44,6 +49,9 @@ db_logger.setLevel(logging.INFO)
 human_fix_logger = logging.getLogger('human_fix')
 human_fix_logger.setLevel(logging.INFO)
 
+profile_logger = logging.getLogger('profile')
+profile_logger.setLevel(logging.INFO)
+
 type_name_to_processor: Dict[str, List[Any]] = {
     'DimensionProcessor': [DimensionProcessor],
     'DungeonContentProcessor': [DungeonContentProcessor],
@@ -112,6 +120,24 @@ def parse_args():
     proc_group.add_argument("--processors", default="All",
                             help="Comma-separated specific processors to run.")
     proc_group.add_argument("--server", default="COMBINED", help="Server to build for")
+    proc_group.add_argument("--profile", default=False, action="store_true",
+                            help="Dumps cProfile output for each processor into --profile_dir (needs --parallelism 1)")
+    proc_group.add_argument("--profile_dir",
+                            help="Path to a folder where profile output is saved (defaults to output_dir/profile)")
+    proc_group.add_argument("--parallelism", default=1, type=int,
+                            help="Number of independent processors to run concurrently, each on its own connection")
+    proc_group.add_argument("--checkpoint_dir",
+                            help="Path to a folder where progress is saved, so a failed run can resume")
+    proc_group.add_argument("--skill_text_cache",
+                            help="Path to a file where rendered skill text is kept between runs")
+    proc_group.add_argument("--text_processes", default=1, type=int,
+                            help="Number of worker processes used to render skill text before the processors run")
+    proc_group.add_argument("--content_processes", default=1, type=int,
+                            help="Number of worker processes DungeonContentProcessor computes encounters in")
+    proc_group.add_argument("--force", default=False, action="store_true",
+                            help="Makes DungeonContentProcessor reprocess dungeons whose wave data is unchanged")
+    proc_group.add_argument("--purge_retention_weeks", default=4, type=int,
+                            help="Age in weeks past which PurgeDataProcessor deletes schedule and deleted_rows entries")
 
     output_group = parser.add_argument_group("Output")
     output_group.add_argument("--output_dir", required=True,
@@ -151,6 +177,36 @@ def load_data(args):
         logging.getLogger('database').setLevel(logging.DEBUG)
     dry_run = not args.doupdates
 
+    profile_dir = None
+    if args.profile and args.parallelism > 1:
+        # cProfile can't attribute time to one of several phases running at once.
+        logger.warning('--profile is ignored with --parallelism > 1; only phase timings are collected')
+    elif args.profile:
+        profile_dir = args.profile_dir or os.path.join(args.output_dir, 'profile')
+    profiler = ProcessorProfiler(profile_dir)
+
+    checkpoint = None
+    if args.checkpoint_dir:
+        input_key = compute_input_key(args.input_dir, [args.server, args.media_dir, args.processors, dry_run])
+        checkpoint = ProcessorCheckpoint(args.checkpoint_dir, input_key)
+
+    try:
+        with profiler.phase('LoadData'):
+            cs_database = checkpoint.load_database() if checkpoint else None
+            if cs_database is None:
+                cs_database = load_cross_server_database(args)
+                if checkpoint:
+                    checkpoint.save_database(cs_database)
+        run_processors(args, dry_run, cs_database, profiler, checkpoint)
+        if checkpoint:
+            checkpoint.clear()
+    finally:
+        profile_logger.info('Processor summary:\n%s', profiler.summary())
+
+    logger.info('Done')
+
+
+def load_cross_server_database(args) -> crossed_data.CrossServerDatabase:
     logger.info('Loading data')
     jp_database = merged_database.Database(Server.jp, args.input_dir)
     jp_database.load_database()
@@ -182,12 +238,23 @@ def load_data(args):
         na_database.save_all(args.output_dir, args.pretty)
         # kr_database.save_all(args.output_dir, args.pretty)
 
+    return cs_database
+
+
+def run_processors(args, dry_run: bool, cs_database: crossed_data.CrossServerDatabase, profiler: ProcessorProfiler,
+                   checkpoint: Optional[ProcessorCheckpoint] = None):
     logger.info('Connecting to database')
     with open(args.db_config) as f:
         db_config = json.load(f)
 
-    db_wrapper = DbWrapper(dry_run)
-    db_wrapper.connect(db_config)
+    # Shared by every connection, so TimestampProcessor knows what this run wrote.
+    tstamp_journal = TstampJournal()
+
+    def db_factory():
+        db_wrapper = DbWrapper(dry_run)
+        db_wrapper.connect(db_config)
+        db_wrapper.tstamp_journal = tstamp_journal
+        return db_wrapper
 
     processors = []
     for proc in args.processors.split(","):
@@ -197,80 +264,135 @@ def load_data(args):
         else:
             logger.warning("Unknown processor: {}\nSkipping...".format(proc))
 
+    if args.skill_text_cache:
+        skill_text_cache.load(args.skill_text_cache)
+
+    with profiler.phase('SkillText'):
+        render_skill_text(args, cs_database, processors, checkpoint)
+
+    steps = build_processor_steps(args, cs_database, processors, checkpoint, tstamp_journal)
+    ProcessorScheduler(db_factory, args.parallelism, profiler, checkpoint).run(steps)
+
+    if args.skill_text_cache:
+        skill_text_cache.save(args.skill_text_cache)
+
+
+def render_skill_text(args, cs_database: crossed_data.CrossServerDatabase, processors,
+                      checkpoint: Optional[ProcessorCheckpoint] = None):
+    """Renders the skill text the selected processors will store, so they only need to look it up."""
+
+    def will_run(proc_type) -> bool:
+        return proc_type in processors and not (checkpoint and checkpoint.is_completed(proc_type.__name__))
+
+    skills = []
+    if will_run(MonsterProcessor):
+        for csc in cs_database.ownable_cards:
+            if csc.leader_skill:
+                skills.append(csc.leader_skill.cur_skill)
+            if csc.active_skill:
+                skills.append(csc.active_skill.cur_skill)
+                for subskill in csc.active_skill.cur_skill.subskills:
+                    skills.append(subskill)
+                    skills.extend(subskill.parts)
+
+    enemy_skills = []
+    if will_run(EnemySkillProcessor):
+        enemy_skills = [(cseb.enemy_skill_id, cseb.cur_skill.behavior) for cseb in select_used_skills(cs_database)]
+
+    if skills or enemy_skills:
+        skill_text_cache.prerender(skills, enemy_skills, processes=args.text_processes)
+
+
+def build_processor_steps(args, cs_database: crossed_data.CrossServerDatabase, processors,
+                          checkpoint: Optional[ProcessorCheckpoint] = None,
+                          tstamp_journal: Optional[TstampJournal] = None) -> List[ProcessorStep]:
+    """Creates the processor steps in their canonical order; the scheduler derives dependencies from it."""
+    steps = []
+
+    def add_step(proc_type, fn: Callable[[DbWrapper], None]):
+        steps.append(ProcessorStep(proc_type.__name__, fn, proc_type.INPUT_TABLES, proc_type.OUTPUT_TABLES))
+
     # Load dimension tables
     if DimensionProcessor in processors:
-        DimensionProcessor().process(db_wrapper)
+        add_step(DimensionProcessor, DimensionProcessor().process)
 
     # # Load rank data
     if RankRewardProcessor in processors:
-        RankRewardProcessor().process(db_wrapper)
+        add_step(RankRewardProcessor, RankRewardProcessor().process)
 
     # # Ensure awakenings
     if AwokenSkillProcessor in processors:
-        AwokenSkillProcessor().process(db_wrapper)
+        add_step(AwokenSkillProcessor, AwokenSkillProcessor().process)
 
     # # Ensure tags
     if SkillTagProcessor in processors:
-        SkillTagProcessor().process(db_wrapper)
+        add_step(SkillTagProcessor, SkillTagProcessor().process)
 
     # # Load enemy skills
     if EnemySkillProcessor in processors:
-        es_processor = EnemySkillProcessor(db_wrapper, cs_database)
-        es_processor.load_static()
-        es_processor.load_enemy_skills()
-        if args.es_dir:
-            es_processor.load_enemy_data(args.es_dir)
+        def load_enemy_skills(db_wrapper: DbWrapper):
+            es_processor = EnemySkillProcessor(db_wrapper, cs_database)
+            es_processor.load_static()
+            es_processor.load_enemy_skills()
+            if args.es_dir:
+                es_processor.load_enemy_data(args.es_dir)
+
+        add_step(EnemySkillProcessor, load_enemy_skills)
 
     # Load basic series data
     if SeriesProcessor in processors:
-        SeriesProcessor(cs_database).process(db_wrapper)
+        add_step(SeriesProcessor, SeriesProcessor(cs_database).process)
 
     # # Load monster data
     if MonsterProcessor in processors:
-        MonsterProcessor(cs_database).process(db_wrapper)
+        add_step(MonsterProcessor, MonsterProcessor(cs_database).process)
 
     # # Ensure Latents
     if LatentSkillProcessor in processors:
-        LatentSkillProcessor(cs_database).process(db_wrapper)
+        add_step(LatentSkillProcessor, LatentSkillProcessor(cs_database).process)
 
     # Egg machines
     if EggMachineProcessor in processors:
-        EggMachineProcessor(cs_database).process(db_wrapper)
+        add_step(EggMachineProcessor, EggMachineProcessor(cs_database).process)
 
     # Load dungeon data
     dungeon_processor = None
     if DungeonProcessor in processors:
         dungeon_processor = DungeonProcessor(cs_database)
-        dungeon_processor.process(db_wrapper)
+        add_step(DungeonProcessor, dungeon_processor.process)
 
     if DungeonContentProcessor in processors and input_args.server.lower() == "combined":
         # Load dungeon data derived from wave info
-        DungeonContentProcessor(cs_database).process(db_wrapper)
+        dungeon_content_processor = DungeonContentProcessor(cs_database, checkpoint, args.content_processes, args.force)
+        add_step(DungeonContentProcessor, dungeon_content_processor.process)
 
     # Toggle any newly-available dungeons visible
     if dungeon_processor is not None:
-        dungeon_processor.post_encounter_process(db_wrapper)
+        steps.append(ProcessorStep('DungeonPostEncounter',
+                                   dungeon_processor.post_encounter_process,
+                                   DungeonProcessor.POST_ENCOUNTER_INPUT_TABLES,
+                                   DungeonProcessor.POST_ENCOUNTER_OUTPUT_TABLES))
 
     # Load event data
     if ScheduleProcessor in processors:
-        ScheduleProcessor(cs_database).process(db_wrapper)
+        add_step(ScheduleProcessor, ScheduleProcessor(cs_database).process)
 
     # Load exchange data
     if ExchangeProcessor in processors:
-        ExchangeProcessor(cs_database).process(db_wrapper)
+        add_step(ExchangeProcessor, ExchangeProcessor(cs_database).process)
 
     # Load purchase data
     if PurchaseProcessor in processors:
-        PurchaseProcessor(cs_database).process(db_wrapper)
+        add_step(PurchaseProcessor, PurchaseProcessor(cs_database).process)
 
     # Update timestamps
     if ExchangeProcessor in processors:
-        TimestampProcessor().process(db_wrapper)
+        add_step(TimestampProcessor, TimestampProcessor(tstamp_journal).process)
 
     if PurgeDataProcessor in processors:
-        PurgeDataProcessor().process(db_wrapper)
+        add_step(PurgeDataProcessor, PurgeDataProcessor(args.purge_retention_weeks).process)
 
-    logger.info('Done')
+    return steps
 
 
 if __name__ == '__main__':
@@ -289,6 +411,7 @@ if __name__ == '__main__':
         # This needs to be done after the es_quick check otherwise it will consistently overwrite the fixes file.
         if os.name != 'nt':
             human_fix_logger.addHandler(logging.FileHandler('/tmp/dadguide_pipeline_human_fixes.txt', mode='w'))
+            profile_logger.addHandler(logging.FileHandler('/tmp/dadguide_pipeline_profile.txt', mode='w'))
 
         load_data(input_args)
     finally:
@@ -0,0 +1,117 @@
+"""
+Times parsing the dungeon list, and checks it matches the previous parser.
+
+The previous parser ran the quote replacements and built a csv reader for every line;
+it is kept here so the single-reader version can be re-checked against it. The check also
+runs on a copy of the input where one floor ends in a quoted field, which leaves a quote
+unmatched after the replacements, to cover the per-line fallback.
+"""
+import argparse
+import csv
+import json
+import time
+from io import StringIO
+from typing import List
+
+from pad.common import pad_util
+from pad.common.shared_types import dump_helper
+from pad.raw.dungeon import FILE_NAME, Dungeon, SubDungeon, _parse_fields, parse_dungeon_info
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks dungeon list parsing.", add_help=False)
+
+    input_group = parser.add_argument_group("Input")
+    input_group.add_argument("--input_dir", required=True,
+                             help="Path to a folder where the input data is")
+    input_group.add_argument("--rounds", default=3, type=int, help="Number of times to parse the dungeon list")
+
+    help_group = parser.add_argument_group("Help")
+    help_group.add_argument("-h", "--help", action="help",
+                            help="Displays this help message and exits.")
+    return parser.parse_args()
+
+
+def legacy_parse_dungeon_info(dungeon_info: str) -> List[Dungeon]:
+    dungeons = []
+    cur_dungeon = None
+
+    for line in dungeon_info.split('\n'):
+        info = line[0:2]
+        data = line[2:]
+        data = data.replace("',", "`,").replace(",'", ",`")
+        data_values = next(csv.reader(StringIO(data), quotechar="`", delimiter=','))
+        if info == 'd;':
+            cur_dungeon = Dungeon(data_values)
+            dungeons.append(cur_dungeon)
+        elif info == 'f;':
+            floor = SubDungeon(cur_dungeon.dungeon_id, data_values)
+            cur_dungeon.sub_dungeons.append(floor)
+        elif info == 'c;':
+            pass
+        else:
+            raise ValueError('unexpected line: ' + line)
+
+    return dungeons
+
+
+def legacy_tokenize(dungeon_info: str) -> List[List[str]]:
+    return [next(csv.reader(StringIO(line[2:].replace("',", "`,").replace(",'", ",`")), quotechar="`", delimiter=','))
+            for line in dungeon_info.split('\n')]
+
+
+def tokenize(dungeon_info: str) -> List[List[str]]:
+    return list(_parse_fields(dungeon_info.replace("',", "`,").replace(",'", ",`").split('\n')))
+
+
+def dump(dungeons: List[Dungeon]) -> List[str]:
+    return [json.dumps(d, default=dump_helper, sort_keys=True) for d in dungeons]
+
+
+def timed(fn, dungeon_info: str, rounds: int):
+    result = None
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn(dungeon_info)
+    return result, (time.perf_counter() - start) / rounds
+
+
+def with_unmatched_quote(dungeon_info: str) -> str:
+    """Quotes an extra trailing restriction arg on the first floor; its closing quote isn't replaced."""
+    lines = dungeon_info.split('\n')
+    idx = next(i for i, line in enumerate(lines) if line.startswith('f;'))
+    lines[idx] += ",'extra'"
+    return '\n'.join(lines)
+
+
+def check_equal(name: str, legacy: List[Dungeon], current: List[Dungeon]):
+    mismatches = [(a, b) for a, b in zip(dump(legacy), dump(current)) if a != b]
+    if len(legacy) != len(current) or mismatches:
+        for a, b in mismatches[:5]:
+            print('legacy:  {}\ncurrent: {}'.format(a, b))
+        raise SystemExit('{}: parsers disagree: {} vs {} dungeons, {} differ'.format(
+            name, len(legacy), len(current), len(mismatches)))
+    print('{}: output identical'.format(name))
+
+
+def run_benchmark(args):
+    dungeon_info = pad_util.load_raw_json(args.input_dir, None, FILE_NAME)['dungeons']
+
+    _, legacy_tokenize_time = timed(legacy_tokenize, dungeon_info, args.rounds)
+    _, tokenize_time = timed(tokenize, dungeon_info, args.rounds)
+    legacy, legacy_time = timed(legacy_parse_dungeon_info, dungeon_info, args.rounds)
+    current, current_time = timed(parse_dungeon_info, dungeon_info, args.rounds)
+
+    print('parsed {} dungeons with {} floors'.format(len(current), sum(len(d.sub_dungeons) for d in current)))
+    print('{:<10} per-line readers {:>8.3f}s  single reader {:>8.3f}s  {:>7.1f}x'.format(
+        'tokenize', legacy_tokenize_time, tokenize_time, legacy_tokenize_time / max(tokenize_time, 1e-9)))
+    print('{:<10} per-line readers {:>8.3f}s  single reader {:>8.3f}s  {:>7.1f}x'.format(
+        'full load', legacy_time, current_time, legacy_time / max(current_time, 1e-9)))
+
+    check_equal('input', legacy, current)
+    broken_info = with_unmatched_quote(dungeon_info)
+    check_equal('unmatched quote', legacy_parse_dungeon_info(broken_info), parse_dungeon_info(broken_info))
+
+
+if __name__ == '__main__':
+    run_benchmark(parse_args())
@@ -6,6 +6,7 @@ import os
 import shutil
 
 from pad.common import monster_id_mapping
+from pad.common.media_index import MediaIndex
 from pad.common.shared_types import MonsterNo
 
 
@@ -76,6 +77,9 @@ def copy_media(args):
         do_copy(na_portrait_input_dir, '{}.png'.format(na_id),
                 portrait_output_dir, '{}.png'.format(monster_id_filled))
 
+    # Lets the data processor skip listing the portrait directories.
+    MediaIndex.scan(output_dir).save_manifest(output_dir)
+
 
 if __name__ == '__main__':
     args = parse_args()
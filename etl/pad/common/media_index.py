@@ -0,0 +1,78 @@
+"""
+Index of which monsters have extra media (HQ portraits, animations) in the media dir.
+
+Listing the media directories is the slow part, so media_copy writes a manifest next to
+them after each run. The manifest is used as long as neither directory has changed since
+it was written; otherwise the directories are scanned.
+"""
+import json
+import logging
+import os
+from typing import Iterable, Set
+
+from pad.common.shared_types import MonsterId
+
+logger = logging.getLogger('processor')
+
+MANIFEST_FILE = 'media_manifest.json'
+HQ_PORTRAITS_DIR = 'hq_portraits'
+ANIMATED_PORTRAITS_DIR = 'animated_portraits'
+
+
+def _scan_monster_ids(media_dir: str, sub_dir: str, extension: str) -> Set[MonsterId]:
+    monster_ids = set()
+    with os.scandir(os.path.join(media_dir, sub_dir)) as entries:
+        for entry in entries:
+            # Files are named like 00123.png
+            if len(entry.name) == 9 and entry.name[-4:].lower() == extension:
+                monster_ids.add(MonsterId(int(entry.name[0:5])))
+    return monster_ids
+
+
+def _manifest_is_current(media_dir: str) -> bool:
+    manifest_file = os.path.join(media_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        return False
+    manifest_mtime = os.stat(manifest_file).st_mtime_ns
+    return all(os.stat(os.path.join(media_dir, d)).st_mtime_ns <= manifest_mtime
+               for d in [HQ_PORTRAITS_DIR, ANIMATED_PORTRAITS_DIR])
+
+
+class MediaIndex(object):
+    def __init__(self,
+                 hq_image_monster_ids: Iterable[MonsterId] = (),
+                 animated_monster_ids: Iterable[MonsterId] = ()):
+        self.hq_image_monster_ids = set(hq_image_monster_ids)  # type: Set[MonsterId]
+        self.animated_monster_ids = set(animated_monster_ids)  # type: Set[MonsterId]
+
+    def has_hq_image(self, monster_id: MonsterId) -> bool:
+        return monster_id in self.hq_image_monster_ids
+
+    def has_animation(self, monster_id: MonsterId) -> bool:
+        return monster_id in self.animated_monster_ids
+
+    @staticmethod
+    def scan(media_dir: str) -> 'MediaIndex':
+        return MediaIndex(_scan_monster_ids(media_dir, HQ_PORTRAITS_DIR, '.png'),
+                          _scan_monster_ids(media_dir, ANIMATED_PORTRAITS_DIR, '.mp4'))
+
+    @staticmethod
+    def load(media_dir: str) -> 'MediaIndex':
+        """Reads the manifest if it's up to date, otherwise scans the media directories."""
+        if not _manifest_is_current(media_dir):
+            return MediaIndex.scan(media_dir)
+        with open(os.path.join(media_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        logger.info('using media manifest')
+        return MediaIndex(map(MonsterId, manifest['hq_image_monster_ids']),
+                          map(MonsterId, manifest['animated_monster_ids']))
+
+    def save_manifest(self, media_dir: str):
+        manifest_file = os.path.join(media_dir, MANIFEST_FILE)
+        tmp_file = manifest_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'hq_image_monster_ids': sorted(self.hq_image_monster_ids),
+                'animated_monster_ids': sorted(self.animated_monster_ids),
+            }, f)
+        os.replace(tmp_file, manifest_file)
@@ -2,7 +2,7 @@ import datetime
 import json
 import os
 import re
-from typing import Union
+from typing import Any, Iterator, Union
 
 import pytz
 
@@ -137,6 +137,54 @@ def load_raw_json(data_dir: str = None, json_file: str = None, file_name: str =
         return json.load(f)
 
 
+_JSON_WHITESPACE = re.compile(r'\s*')
+
+
+def iter_raw_json_array(data_dir: str = None, json_file: str = None, file_name: str = None,
+                        key: str = None) -> Iterator[Any]:
+    """Yields the entries of the top-level array `key` one at a time.
+
+    Only one entry is decoded at a time, so the caller can convert and drop each raw
+    entry instead of holding the fully decoded file in memory.
+    """
+    if json_file is None:
+        json_file = os.path.join(data_dir, file_name)
+
+    with open(json_file, encoding='utf-8') as f:
+        text = f.read()
+
+    decoder = json.JSONDecoder()
+
+    def skip(pos: int, sep: str = None) -> int:
+        pos = _JSON_WHITESPACE.match(text, pos).end()
+        if sep and text.startswith(sep, pos):
+            pos = _JSON_WHITESPACE.match(text, pos + 1).end()
+        return pos
+
+    pos = skip(0)
+    if not text.startswith('{', pos):
+        raise ValueError('expected a JSON object in {}'.format(json_file))
+    pos = skip(pos + 1)
+    while not text.startswith('}', pos):
+        name, pos = decoder.raw_decode(text, pos)
+        pos = skip(pos, ':')
+        if name != key:
+            _, pos = decoder.raw_decode(text, pos)
+            pos = skip(pos, ',')
+            continue
+
+        if not text.startswith('[', pos):
+            raise ValueError('expected {} to be an array in {}'.format(key, json_file))
+        pos = skip(pos + 1)
+        while not text.startswith(']', pos):
+            value, pos = decoder.raw_decode(text, pos)
+            yield value
+            pos = skip(pos, ',')
+        return
+
+    raise KeyError(key)
+
+
 def json_string_dump(obj, pretty=False):
     indent = 4 if pretty else None
     return json.dumps(obj, indent=indent, sort_keys=True, default=dump_helper, ensure_ascii=False)
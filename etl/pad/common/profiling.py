@@ -0,0 +1,115 @@
+"""
+Lightweight instrumentation for the data processor.
+
+Tracks wall time per processor phase and, when attached to a DbWrapper, counts
+SQL statements by type and table plus the number of rows they changed.
+"""
+import cProfile
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+_STATEMENT_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+`?([\w.]+)`?', re.IGNORECASE)
+
+# Statement types that change rows.
+WRITE_TYPES = ['INSERT', 'UPDATE', 'DELETE', 'REPLACE']
+
+
+def statement_type(sql: str) -> str:
+    """Returns the leading SQL verb, e.g. SELECT/INSERT/UPDATE."""
+    parts = sql.split(None, 1)
+    return parts[0].upper() if parts else 'UNKNOWN'
+
+
+def statement_table(sql: str) -> str:
+    """Returns the first table referenced by a statement, or ? if none was found."""
+    match = _STATEMENT_TABLE_RE.search(sql)
+    return match.group(1) if match else '?'
+
+
+class PhaseStats(object):
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.rows_changed = 0
+        # (statement type, table) -> count
+        self.queries = defaultdict(int)  # type: Dict[Tuple[str, str], int]
+
+    def query_count(self, stmt_type: Optional[str] = None) -> int:
+        return sum(v for (t, _), v in self.queries.items() if stmt_type is None or t == stmt_type)
+
+
+class ProcessorProfiler(object):
+    """Collects per-phase timing and query accounting.
+
+    If profile_dir is set, each phase is also run under cProfile and the stats
+    are dumped to <profile_dir>/<phase>.prof.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = profile_dir
+        self.phases = []  # type: List[PhaseStats]
+        # Phases may run concurrently on separate threads, so the active phase is tracked per thread.
+        self._local = threading.local()
+
+    @property
+    def current(self) -> Optional[PhaseStats]:
+        return getattr(self._local, 'phase', None)
+
+    @current.setter
+    def current(self, value: Optional[PhaseStats]):
+        self._local.phase = value
+
+    @contextmanager
+    def phase(self, name: str):
+        stats = PhaseStats(name)
+        self.phases.append(stats)
+        prev_phase, self.current = self.current, stats
+
+        profile = cProfile.Profile() if self.profile_dir else None
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield stats
+        finally:
+            if profile:
+                profile.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profile.dump_stats(os.path.join(self.profile_dir, '{}.prof'.format(name)))
+            stats.seconds += time.perf_counter() - start
+            self.current = prev_phase
+
+    def record_query(self, sql: str, rowcount: Optional[int]):
+        if self.current is None:
+            return
+        stmt_type = statement_type(sql)
+        self.current.queries[(stmt_type, statement_table(sql))] += 1
+        if stmt_type in WRITE_TYPES and rowcount:
+            self.current.rows_changed += rowcount
+
+    def summary(self) -> str:
+        header = '{:<32} {:>9} {:>8} {:>8} {:>8} {:>8} {:>8}'.format(
+            'phase', 'seconds', 'select', 'insert', 'update', 'delete', 'changed')
+        lines = [header, '-' * len(header)]
+        for p in self.phases:
+            lines.append('{:<32} {:>9.2f} {:>8} {:>8} {:>8} {:>8} {:>8}'.format(
+                p.name, p.seconds,
+                p.query_count('SELECT'), p.query_count('INSERT'),
+                p.query_count('UPDATE'), p.query_count('DELETE'),
+                p.rows_changed))
+        lines.append('{:<32} {:>9.2f}'.format('total', sum(p.seconds for p in self.phases)))
+
+        lines.append('')
+        lines.append('busiest tables:')
+        by_table = defaultdict(int)
+        for p in self.phases:
+            for (stmt_type, table), count in p.queries.items():
+                by_table[(p.name, stmt_type, table)] += count
+        for (phase, stmt_type, table), count in sorted(by_table.items(), key=lambda x: -x[1])[:20]:
+            lines.append('{:<32} {:<8} {:<32} {:>8}'.format(phase, stmt_type, table, count))
+        return '\n'.join(lines)
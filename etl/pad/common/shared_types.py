@@ -1,5 +1,6 @@
 import math
 from enum import Enum
+from functools import lru_cache
 from typing import NewType, Dict, Any, List, Union
 
 # Raw data types
@@ -21,6 +22,9 @@ ListJsonType = List[Dict[str, Any]]
 class Printable(object):
     """Simple way to make an object printable."""
 
+    # Empty so that subclasses which declare __slots__ don't also get a __dict__.
+    __slots__ = ()
+
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__, dump_helper(self))
 
@@ -28,9 +32,18 @@ class Printable(object):
         return self.__repr__()
 
 
+@lru_cache(maxsize=None)
+def _curve_factor(level: int, max_level: int, scale: float) -> float:
+    # There are only a handful of distinct (level, max_level, scale) combinations across all cards.
+    f = 1 if max_level == 1 else ((level - 1) / (max_level - 1))
+    return math.pow(f, scale)
+
+
 class Curve(Printable):
     """Describes how to scale according to level 1-10."""
 
+    __slots__ = ('min_value', 'max_value', 'scale', 'max_level')
+
     def __init__(self,
                  min_value: Union[int, float],
                  max_value: Union[int, float] = None,
@@ -42,8 +55,8 @@ class Curve(Printable):
         self.max_level = max(max_level, 1)
 
     def value_at(self, level: int):
-        f = 1 if self.max_level == 1 else ((level - 1) / (self.max_level - 1))
-        return int(round(self.min_value + (self.max_value - self.min_value) * math.pow(f, self.scale)))
+        f = _curve_factor(level, self.max_level, self.scale)
+        return int(round(self.min_value + (self.max_value - self.min_value) * f))
 
 
 class Server(Enum):
@@ -69,6 +82,16 @@ class EvolutionType(Enum):
     non_reversible = 3
 
 
+def slot_vars(x) -> Dict[str, Any]:
+    """Equivalent of vars() for classes that use __slots__; unset and private (cache) slots are omitted."""
+    result = {}
+    for cls in reversed(type(x).__mro__):
+        for name in getattr(cls, '__slots__', ()):
+            if not name.startswith('_') and hasattr(x, name):
+                result[name] = getattr(x, name)
+    return result
+
+
 def dump_helper(x):
     if callable(x):
         return 'fn_obj'
@@ -76,5 +99,7 @@ def dump_helper(x):
         return str(x)
     elif hasattr(x, '__dict__'):
         return vars(x)
+    elif hasattr(x, '__slots__'):
+        return slot_vars(x)
     else:
         return repr(x)
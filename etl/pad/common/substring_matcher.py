@@ -0,0 +1,82 @@
+"""
+Finds which of a fixed set of strings occur inside a text, in a single pass over the text.
+
+This is an Aho-Corasick automaton: a trie of the patterns, where each node also links to the
+node for its longest proper suffix that is in the trie, so matching never has to back up.
+Building it is linear in the total pattern length, and matching is linear in the text length
+plus the number of matches.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class SubstringMatcher(object):
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = []  # type: List[str]
+        # Per node: child transitions, suffix link, index of the pattern ending here (or -1), and
+        # the nearest node on the suffix chain where a pattern ends (0 if none).
+        self._children = [{}]  # type: List[Dict[str, int]]
+        self._fail = [0]
+        self._pattern_idx = [-1]
+        self._output_link = [0]
+
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            next_node = self._children[node].get(ch)
+            if next_node is None:
+                next_node = len(self._children)
+                self._children.append({})
+                self._fail.append(0)
+                self._pattern_idx.append(-1)
+                self._output_link.append(0)
+                self._children[node][ch] = next_node
+            node = next_node
+        if self._pattern_idx[node] == -1:
+            self._pattern_idx[node] = len(self.patterns)
+            self.patterns.append(pattern)
+
+    def _link(self):
+        queue = deque(self._children[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._children[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._children[fail]:
+                    fail = self._fail[fail]
+                fail = self._children[fail].get(ch, 0)
+                self._fail[child] = fail
+                self._output_link[child] = fail if self._pattern_idx[fail] != -1 else self._output_link[fail]
+                queue.append(child)
+
+    def find_all(self, text: str) -> Set[str]:
+        """Every pattern that occurs in text."""
+        return {self.patterns[idx] for idx in self._find_indexes(text)}
+
+    def longest_match(self, text: str) -> Optional[str]:
+        """The longest pattern that occurs in text; ties go to the pattern added first."""
+        found = self._find_indexes(text)
+        if not found:
+            return None
+        return self.patterns[max(found, key=lambda idx: (len(self.patterns[idx]), -idx))]
+
+    def _find_indexes(self, text: str) -> Set[int]:
+        found = set()  # type: Set[int]
+        if self._pattern_idx[0] != -1:
+            found.add(self._pattern_idx[0])  # The empty string is in everything.
+
+        children, fail, pattern_idx, output_link = self._children, self._fail, self._pattern_idx, self._output_link
+        node = 0
+        for ch in text:
+            while node and ch not in children[node]:
+                node = fail[node]
+            node = children[node].get(ch, 0)
+            out = node if pattern_idx[node] != -1 else output_link[node]
+            while out and pattern_idx[out] not in found:
+                found.add(pattern_idx[out])
+                out = output_link[out]
+        return found
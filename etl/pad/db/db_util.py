@@ -1,12 +1,15 @@
 import logging
 import random
-from typing import Callable, List
+from contextlib import contextmanager
+import time
+from typing import Any, Callable, Dict, List, Tuple
 
 import pymysql
 from pymysql import InterfaceError
 
 from pad.common import pad_util
-from .sql_item import SqlItem, _col_compare, _tbl_name_ref, _process_col_mappings, ExistsStrategy
+from .sql_item import SqlItem, _col_compare, _tbl_name_ref, _process_col_mappings, ExistsStrategy, \
+    generate_multi_insert_sql, item_col_values, item_differs
 
 logger = logging.getLogger('database')
 logger.setLevel(logging.ERROR)
@@ -16,6 +19,10 @@ class DbWrapper(object):
     def __init__(self, dry_run: bool = True):
         self.dry_run = dry_run
         self.connection = None
+        # Optional ProcessorProfiler; when set, every executed statement is counted.
+        self.profiler = None
+        # Optional TstampJournal; when set, every write is recorded against its table.
+        self.tstamp_journal = None
 
     def connect(self, db_config):
         logger.debug('DB Connecting')
@@ -28,6 +35,11 @@ class DbWrapper(object):
                                           autocommit=True)
         logger.info('DB Connected')
 
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
     def execute(self, cursor, sql, bindings: List[str] = None):
         if bindings:
             logger.debug('Executing: %s with bindings %s', sql, bindings)
@@ -35,10 +47,24 @@ class DbWrapper(object):
             bindings = None  # Don't allow empty array as an input
             logger.debug('Executing: %s', sql)
         try:
-            return cursor.execute(sql, args=bindings)
+            result = cursor.execute(sql, args=bindings)
         except InterfaceError:
             self.connection.ping()
-            return cursor.execute(sql)
+            result = cursor.execute(sql)
+        if self.profiler:
+            self.profiler.record_query(sql, result)
+        return result
+
+    @contextmanager
+    def transaction(self):
+        """Runs the statements issued inside the block as one transaction, rolling back on error."""
+        self.connection.begin()
+        try:
+            yield
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
 
     def fetch_data(self, sql):
         with self.connection.cursor() as cursor:
@@ -130,6 +156,12 @@ class DbWrapper(object):
                     return row_values[0]
 
     def insert_item(self, sql: str, bindings: List[str] = None):
+        result = self._insert(sql, bindings)
+        if self.tstamp_journal and not self.dry_run:
+            self.tstamp_journal.record_sql(sql)
+        return result
+
+    def _insert(self, sql: str, bindings: List[str] = None):
         with self.connection.cursor() as cursor:
             if self.dry_run:
                 logger.warning('not inserting item due to dry run')
@@ -147,6 +179,8 @@ class DbWrapper(object):
                 logger.warning('not running update due to dry run')
                 return 0
             self.execute(cursor, sql)
+            if self.tstamp_journal:
+                self.tstamp_journal.record_sql(sql)
             data = list(cursor.fetchall())
             num_rows = len(data)
             if num_rows > 0:
@@ -164,7 +198,7 @@ class DbWrapper(object):
         key = item.key_value()
 
         if force_insert:
-            new_key = self.insert_item(item.insert_sql())
+            new_key = self._write_item(item, item.insert_sql())
             if not key:
                 key = new_key
                 item.set_key_value(key)
@@ -174,33 +208,123 @@ class DbWrapper(object):
         if item.exists_strategy() == ExistsStrategy.BY_KEY:
             if not self.check_existing(item.key_exists_sql()):
                 logger.info('item needed insert: %s', item)
-                self.insert_item(item.insert_sql())
+                self._write_item(item, item.insert_sql())
             elif not self.check_existing(item.needs_update_sql()):
                 logger.info('item needed update: %s', item)
-                self.insert_item(item.update_sql())
+                self._write_item(item, item.update_sql())
 
         elif item.exists_strategy() == ExistsStrategy.BY_KEY_IF_SET:
             if not key:
-                key = self.insert_item(item.insert_sql())
+                key = self._write_item(item, item.insert_sql())
                 item.set_key_value(key)
                 logger.info('item needed by-key insert: %s', item)
             elif not self.check_existing(item.needs_update_sql()):
                 logger.info('item needed by-key update: %s', item)
-                self.insert_item(item.update_sql())
+                self._write_item(item, item.update_sql())
 
         elif item.exists_strategy() == ExistsStrategy.BY_VALUE:
             key = self.get_single_value(item.value_exists_sql(), op=int, fail_on_empty=False)
             item.set_key_value(key)
 
             if not key:
-                key = self.insert_item(item.insert_sql())
+                key = self._write_item(item, item.insert_sql())
                 item.set_key_value(key)
                 logger.info('item needed by-value insert: %s', item)
             elif not self.check_existing(item.needs_update_sql()):
                 logger.info('item needed by-value update: %s', item)
-                self.insert_item(item.update_sql())
+                self._write_item(item, item.update_sql())
 
         elif item.exists_strategy() == ExistsStrategy.CUSTOM:
             raise ValueError('Item cannot be upserted: {}'.format(item))
 
         return key
+
+    def upsert_changed(self, items: List[SqlItem], batch_size: int = 500, where: str = None) -> int:
+        """Bulk version of insert_or_update for a list of items of the same type.
+
+        The item's table is loaded once and compared in memory, and only new or changed rows
+        are written, batch_size rows per statement. Items must be BY_KEY or BY_VALUE. If where
+        is set, only rows matching it are loaded; it must cover every row the items could match.
+        Returns the number of rows inserted or updated.
+        """
+        if not items:
+            return 0
+        exemplar = items[0]
+        strategy = exemplar.exists_strategy()
+        if strategy == ExistsStrategy.BY_KEY:
+            lookup_cols = [exemplar._key()]
+        elif strategy == ExistsStrategy.BY_VALUE:
+            lookup_cols = exemplar._lookup_columns()
+        else:
+            raise ValueError('Items cannot be bulk upserted: {}'.format(exemplar))
+
+        table = exemplar._table()
+        existing = {}  # type: Dict[Tuple, Dict[str, Any]]
+        existing_sql = 'SELECT * FROM {}'.format(_tbl_name_ref(table))
+        if where:
+            existing_sql += ' WHERE ' + where
+        for row in self.fetch_data(existing_sql):
+            existing[tuple(row[c] for c in lookup_cols)] = row
+
+        # Later items replace earlier ones with the same lookup, as repeated upserts would.
+        by_lookup = {}  # type: Dict[Tuple, SqlItem]
+        for item in items:
+            values = item_col_values(item)
+            by_lookup[tuple(values[c] for c in lookup_cols)] = item
+
+        inserts, updates = [], []
+        for lookup, item in by_lookup.items():
+            row = existing.get(lookup)
+            if row is None:
+                inserts.append(item)
+                continue
+            if strategy == ExistsStrategy.BY_VALUE:
+                item.set_key_value(row[item._key()])
+            if item_differs(item, row):
+                updates.append(item)
+
+        self.bulk_write(inserts, updates, batch_size)
+        logger.info('bulk upsert into %s: %d inserted, %d updated', table, len(inserts), len(updates))
+        return len(inserts) + len(updates)
+
+    def bulk_write(self, inserts: List[SqlItem], updates: List[SqlItem], batch_size: int = 500):
+        """Inserts new items and updates existing ones, all of one type, in multi-row statements.
+
+        Updated items must have their key set. Timestamps are set and journaled as for single writes.
+        """
+        if not inserts and not updates:
+            return
+        exemplar = (inserts or updates)[0]
+        table = exemplar._table()
+        tstamp = int(time.time())
+        timestamped = hasattr(exemplar, 'tstamp')
+        for item in inserts + updates:
+            if timestamped:
+                item.tstamp = tstamp
+
+        insert_cols = sorted(exemplar._insert_columns()) + (['tstamp'] if timestamped else [])
+        for i in range(0, len(inserts), batch_size):
+            self._insert(generate_multi_insert_sql(table, insert_cols, inserts[i:i + batch_size]))
+
+        if updates:
+            # The insert half never applies, but needs every column so that the statement is valid.
+            upsert_cols = insert_cols if exemplar._key() in insert_cols else [exemplar._key()] + insert_cols
+            update_cols = exemplar._update_columns() + (['tstamp'] if timestamped else [])
+            for i in range(0, len(updates), batch_size):
+                self._insert(generate_multi_insert_sql(table, upsert_cols, updates[i:i + batch_size], update_cols))
+
+        if self.tstamp_journal and not self.dry_run:
+            if timestamped:
+                self.tstamp_journal.record(table, tstamp)
+            else:
+                self.tstamp_journal.mark_unknown(table)
+
+    def _write_item(self, item: SqlItem, sql: str):
+        result = self._insert(sql)
+        if self.tstamp_journal and not self.dry_run:
+            tstamp = getattr(item, 'tstamp', None)
+            if tstamp:
+                self.tstamp_journal.record(item._table(), tstamp)
+            else:
+                self.tstamp_journal.mark_unknown(item._table())
+        return result
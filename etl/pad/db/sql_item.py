@@ -1,4 +1,5 @@
 import decimal
+import json
 import time
 import binascii
 from datetime import datetime, date
@@ -69,6 +70,48 @@ def generate_insert_sql(table_name, cols, item):
     return sql.format(**object_to_sql_params(item))
 
 
+def generate_multi_insert_sql(table_name, cols, items, update_cols=None):
+    """Like generate_insert_sql, for several items at once.
+
+    If update_cols is set, rows whose key already exists get those columns updated instead.
+    """
+    sql = 'INSERT INTO {}'.format(_tbl_name_ref(table_name))
+    sql += ' (' + ', '.join(map(_col_name_ref, cols)) + ')'
+    row_sql = '(' + ', '.join(map(_col_value_ref, cols)) + ')'
+    sql += ' VALUES ' + ', '.join(row_sql.format(**object_to_sql_params(item)) for item in items)
+    if update_cols:
+        sql += ' ON DUPLICATE KEY UPDATE '
+        sql += ', '.join('{0} = VALUES({0})'.format(_col_name_ref(c)) for c in update_cols)
+    return sql
+
+
+def item_col_values(item: 'SqlItem') -> Dict[str, Any]:
+    """The item's values keyed by database column name."""
+    return _process_col_mappings(type(item), item.__dict__.copy(), reverse=True)
+
+
+def same_col_value(value, db_value, is_json: bool = False) -> bool:
+    """Compares an item value to one loaded from the database, the way `col = value` in SQL would."""
+    if value is None or db_value is None:
+        return value is None and db_value is None
+    if is_json:
+        return json.loads(value) == json.loads(db_value)
+    if isinstance(db_value, decimal.Decimal) and isinstance(value, float):
+        # Floats are written as decimal literals, so compare against that literal.
+        return decimal.Decimal('{}'.format(value)) == db_value
+    return value == db_value
+
+
+def item_differs(item: 'SqlItem', row: Dict[str, Any]) -> bool:
+    """Whether writing item would change the stored row, compared the way needs_update_sql() does."""
+    update_cols = item._update_columns()
+    if not update_cols:
+        return False
+    json_cols = item._json_cols()
+    values = item_col_values(item)
+    return not all(same_col_value(values[c], row[c], c in json_cols) for c in update_cols)
+
+
 # This could maybe move to a class method on SqlItem?
 # Fix usage in load_x_object in db_util.
 def _process_col_mappings(obj_type, d, reverse=False):
@@ -0,0 +1,48 @@
+"""
+Tracks the highest tstamp written to each table during a run.
+
+Items written through DbWrapper.insert_or_update carry the tstamp they set, so for those
+tables the journal knows the new MAX(tstamp) without asking the database. Raw SQL writes
+only mark their table as changed; so do deletes for deleted_rows, which is filled by
+triggers. Those tables still have to be looked up.
+"""
+import threading
+from typing import Dict, Optional, Set
+
+from pad.common.profiling import WRITE_TYPES, statement_table, statement_type
+
+# Populated by delete triggers on most tables.
+_DELETED_ROWS_TABLE = 'deleted_rows'
+
+
+class TstampJournal(object):
+    def __init__(self):
+        # Processors may run concurrently, each with their own DbWrapper sharing this journal.
+        self._lock = threading.Lock()
+        self._max_tstamps = {}  # type: Dict[str, int]
+        self._unknown = set()  # type: Set[str]
+
+    def record(self, table: str, tstamp: int):
+        with self._lock:
+            if tstamp > self._max_tstamps.get(table, 0):
+                self._max_tstamps[table] = tstamp
+
+    def mark_unknown(self, table: str):
+        with self._lock:
+            self._unknown.add(table)
+
+    def record_sql(self, sql: str):
+        """Records a raw SQL statement whose tstamp (if any) was set by the database."""
+        stmt_type = statement_type(sql)
+        if stmt_type not in WRITE_TYPES:
+            return
+        self.mark_unknown(statement_table(sql))
+        if stmt_type == 'DELETE':
+            self.mark_unknown(_DELETED_ROWS_TABLE)
+
+    def known_tstamp(self, table: str) -> Optional[int]:
+        """The highest tstamp written to table in this run, or None if it needs to be looked up."""
+        with self._lock:
+            if table in self._unknown:
+                return None
+            return self._max_tstamps.get(table)
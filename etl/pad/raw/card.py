@@ -16,6 +16,8 @@ FILE_NAME = 'download_card_data.json'
 class ESRef(pad_util.Printable):
     """Describes how this monster uses an enemy skill"""
 
+    __slots__ = ('enemy_skill_id', 'enemy_ai', 'enemy_rnd')
+
     def __init__(self, enemy_skill_id: int, enemy_ai: int, enemy_rnd: int):
         self.enemy_skill_id = enemy_skill_id
         # This is an additive amount under a specific threshold?
@@ -27,6 +29,8 @@ class ESRef(pad_util.Printable):
 class Enemy(pad_util.Printable):
     """Describes how this monster spawns as an enemy."""
 
+    __slots__ = ('turns', 'hp', 'atk', 'defense', 'max_level', 'coin', 'xp', 'enemy_skill_refs')
+
     def __init__(self,
                  turns: int,
                  hp: Curve,
@@ -49,6 +53,25 @@ class Enemy(pad_util.Printable):
 class Card(pad_util.Printable):
     """Data about a player-ownable monster."""
 
+    __slots__ = ('monster_no', 'name', 'attr_id', 'sub_attr_id', 'is_ult', 'type_1_id', 'type_2_id',
+                 'rarity', 'cost', 'unknown_009', 'max_level', 'feed_xp_per_level',
+                 'released_status', 'sell_gold_per_level', 'min_hp', 'max_hp', 'hp_scale',
+                 'min_atk', 'max_atk', 'atk_scale', 'min_rcv', 'max_rcv', 'rcv_scale', 'xp_max',
+                 'xp_scale', 'active_skill_id', 'leader_skill_id', 'enemy_turns', 'enemy_hp_min',
+                 'enemy_hp_max', 'enemy_hp_scale', 'enemy_atk_min', 'enemy_atk_max',
+                 'enemy_atk_scale', 'enemy_def_min', 'enemy_def_max', 'enemy_def_scale',
+                 'enemy_max_level', 'enemy_coins_per_level', 'enemy_xp_per_level', 'ancestor_id',
+                 'evo_mat_id_1', 'evo_mat_id_2', 'evo_mat_id_3', 'evo_mat_id_4', 'evo_mat_id_5',
+                 'un_evo_mat_1', 'un_evo_mat_2', 'un_evo_mat_3', 'un_evo_mat_4', 'un_evo_mat_5',
+                 'enemy_turns_alt', 'use_new_ai', 'enemy_skill_max_counter',
+                 'enemy_skill_counter_increment', 'unknown_055', 'unknown_056', 'enemy_skill_refs',
+                 'awakenings', 'super_awakenings', 'base_id', 'group_id', 'type_3_id', 'sell_mp',
+                 'latent_on_feed', 'collab_id', 'flags', 'inheritable_flag', 'take_assists_flag',
+                 'is_collab_flag', 'unstackable_flag', 'assist_only_flag',
+                 'latent_slot_unlock_flag', 'inheritable', 'take_assists', 'is_stackable',
+                 'ownable', 'usable', 'search_strings', 'limit_mult', 'voice_id', 'orb_skin_id',
+                 'bgm_id', 'tags', 'linked_monster_no', 'ls_bitflag', 'other_fields', '_enemy')
+
     def __init__(self, raw: List):
         _unflatten(raw, 57, 3)
         _unflatten(raw, 58, 1)
@@ -216,25 +239,29 @@ class Card(pad_util.Printable):
             human_fix_logger.error('Unused monster values found.')
 
     def enemy(self) -> Enemy:
-        return Enemy(self.enemy_turns,
-                     Curve(self.enemy_hp_min,
-                           self.enemy_hp_max,
-                           self.enemy_hp_scale,
-                           self.enemy_max_level),
-                     Curve(self.enemy_atk_min,
-                           self.enemy_atk_max,
-                           self.enemy_atk_scale,
-                           self.enemy_max_level),
-                     Curve(self.enemy_def_min,
-                           self.enemy_def_max,
-                           self.enemy_def_scale,
-                           self.enemy_max_level),
-                     self.enemy_max_level,
-                     Curve(self.enemy_coins_per_level,
-                           max_level=self.enemy_max_level),
-                     Curve(self.enemy_xp_per_level,
-                           max_level=self.enemy_max_level),
-                     self.enemy_skill_refs)
+        """Enemy stats for this card; built once per card since wave processing asks for it per spawn."""
+        # Cached in a slot rather than with lru_cache, which would keep every card alive.
+        if not hasattr(self, '_enemy'):
+            self._enemy = Enemy(self.enemy_turns,
+                                Curve(self.enemy_hp_min,
+                                      self.enemy_hp_max,
+                                      self.enemy_hp_scale,
+                                      self.enemy_max_level),
+                                Curve(self.enemy_atk_min,
+                                      self.enemy_atk_max,
+                                      self.enemy_atk_scale,
+                                      self.enemy_max_level),
+                                Curve(self.enemy_def_min,
+                                      self.enemy_def_max,
+                                      self.enemy_def_scale,
+                                      self.enemy_max_level),
+                                self.enemy_max_level,
+                                Curve(self.enemy_coins_per_level,
+                                      max_level=self.enemy_max_level),
+                                Curve(self.enemy_xp_per_level,
+                                      max_level=self.enemy_max_level),
+                                self.enemy_skill_refs)
+        return self._enemy
 
     def hp_curve(self) -> Curve:
         return Curve(self.min_hp, self.max_hp, self.hp_scale, max_level=99)
@@ -282,5 +309,4 @@ def _unflatten(raw: List[Any], idx: int, width: int):
 
 def load_card_data(data_dir: str = None, json_file: str = None) -> List[Card]:
     """Load Card objects from PAD JSON file."""
-    data_json = pad_util.load_raw_json(data_dir, json_file, FILE_NAME)
-    return [Card(r) for r in data_json['card']]
+    return [Card(r) for r in pad_util.iter_raw_json_array(data_dir, json_file, FILE_NAME, 'card')]
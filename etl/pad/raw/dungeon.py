@@ -4,7 +4,8 @@ Parses Dungeon and DungeonFloor data.
 
 import csv
 from io import StringIO
-from typing import Any, Dict, List, Optional, Union
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 from pad.common import pad_util
 from pad.common.dungeon_types import RawDungeonType, RawRepeatDay
@@ -208,16 +209,45 @@ class Dungeon(pad_util.Printable):
 def load_dungeon_data(data_dir: str = None, json_file: str = None) -> List[Dungeon]:
     """Converts dungeon JSON into an array of Dungeons."""
     data_json = pad_util.load_raw_json(data_dir, json_file, FILE_NAME)
-    dungeon_info = data_json['dungeons']
+    return parse_dungeon_info(data_json['dungeons'])
 
+
+def _parse_line_fields(data: str) -> List[str]:
+    return next(csv.reader(StringIO(data), quotechar="`", delimiter=','))
+
+
+def _parse_fields(lines: List[str]) -> Iterator[List[str]]:
+    """Yields the fields of every line, after its two-character type prefix.
+
+    A single reader handles the common case. If a line has a quote that is never closed, the
+    reader runs on into the following lines; that line is then parsed on its own, as a line
+    ending closes any open quote, and a new reader picks up after it.
+    """
+    start = 0
+    while start < len(lines):
+        reader = csv.reader((line[2:] for line in islice(lines, start, None)), quotechar="`", delimiter=',')
+        for line_count, data_values in enumerate(reader, start=1):
+            if reader.line_num != line_count:
+                yield _parse_line_fields(lines[start + line_count - 1][2:])
+                start += line_count
+                break
+            yield data_values
+        else:
+            return
+
+
+def parse_dungeon_info(dungeon_info: str) -> List[Dungeon]:
+    """Parses the CSV-like text of the 'dungeons' field into an array of Dungeons."""
     dungeons = []
     cur_dungeon = None
 
-    for line in dungeon_info.split('\n'):
+    # GungHo quotes strings with ' but doesn't escape them, so swap the quotes that border a field
+    # for a character that never appears in the data. Neither pattern can span a line break, so this
+    # is done once for the whole blob.
+    lines = dungeon_info.replace("',", "`,").replace(",'", ",`").split('\n')
+
+    for line, data_values in zip(lines, _parse_fields(lines)):
         info = line[0:2]
-        data = line[2:]
-        data = data.replace("',", "`,").replace(",'", ",`")
-        data_values = next(csv.reader(StringIO(data), quotechar="`", delimiter=','))
         if info == 'd;':
             cur_dungeon = Dungeon(data_values)
             dungeons.append(cur_dungeon)
@@ -9,6 +9,8 @@ FILE_NAME = 'download_enemy_skill_data.json'
 
 class EnemySkill(pad_util.Printable):
 
+    __slots__ = ('enemy_skill_id', 'name', 'type', 'flags', 'params')
+
     def __init__(self, raw: List[str]):
         self.enemy_skill_id = int(raw[0])
         self.name = raw[1].replace('\n', ' ')
@@ -9,35 +9,49 @@ human_fix_logger = logging.getLogger('human_fix')
 
 
 class BehaviorParser(object):
+    """Converts EnemySkills into ESBehaviors, on first lookup of each id.
+
+    Reading enemy_behaviors converts everything that is left.
+    """
+
     def __init__(self):
-        self.enemy_behaviors = []  # type: List[ESBehavior]
+        self.enemy_skill_list = []  # type: List[EnemySkill]
         self.behaviors_by_id = {}  # type: Dict[int, ESBehavior]
+        self._raw_by_id = {}  # type: Dict[int, EnemySkill]
 
     def behavior(self, es_id: int) -> Optional[ESBehavior]:
+        if es_id not in self.behaviors_by_id and es_id in self._raw_by_id:
+            self._convert(self._raw_by_id[es_id])
         return self.behaviors_by_id.get(es_id, None)
 
+    @property
+    def enemy_behaviors(self) -> List[ESBehavior]:
+        return [self.behavior(es.enemy_skill_id) for es in self.enemy_skill_list]
+
     def parse(self, enemy_skill_list: List[EnemySkill]):
-        for es in enemy_skill_list:
-            es_id = es.enemy_skill_id
-            es_type = es.type
-            if es_type in BEHAVIOR_MAP:
-                new_es = BEHAVIOR_MAP[es_type](es)
-            else:
-                human_fix_logger.error('Failed to parse enemy skill: %d/%d: %s', es_id, es_type, es.name)
-                new_es = ESUnknown(es)
-
-            self.enemy_behaviors.append(new_es)
-
-        self.behaviors_by_id = {es.enemy_skill_id: es for es in self.enemy_behaviors}
-
-        for es in self.enemy_behaviors:
-            if isinstance(es, ESSkillSet):
-                for sub_es_id in es.skill_ids:
-                    if sub_es_id in self.behaviors_by_id:
-                        es.skills.append(self.behaviors_by_id[sub_es_id])
-                    else:
-                        human_fix_logger.error('Failed to look up enemy skill: %d', sub_es_id)
-
-        if len(self.enemy_behaviors) != len(self.behaviors_by_id):
+        self.enemy_skill_list = enemy_skill_list
+        self._raw_by_id = {es.enemy_skill_id: es for es in enemy_skill_list}
+
+        if len(self.enemy_skill_list) != len(self._raw_by_id):
             human_fix_logger.error('Error, enemy behavior size does not match: %d - %d',
-                                   len(self.enemy_behaviors), len(self.behaviors_by_id))
+                                   len(self.enemy_skill_list), len(self._raw_by_id))
+
+    def _convert(self, es: EnemySkill):
+        es_id = es.enemy_skill_id
+        es_type = es.type
+        if es_type in BEHAVIOR_MAP:
+            new_es = BEHAVIOR_MAP[es_type](es)
+        else:
+            human_fix_logger.error('Failed to parse enemy skill: %d/%d: %s', es_id, es_type, es.name)
+            new_es = ESUnknown(es)
+
+        # Register before resolving children, in case a skillset refers back to itself.
+        self.behaviors_by_id[es_id] = new_es
+
+        if isinstance(new_es, ESSkillSet):
+            for sub_es_id in new_es.skill_ids:
+                sub_es = self.behavior(sub_es_id)
+                if sub_es is not None:
+                    new_es.skills.append(sub_es)
+                else:
+                    human_fix_logger.error('Failed to look up enemy skill: %d', sub_es_id)
@@ -14,6 +14,9 @@ FILE_NAME = 'download_skill_data.json'
 class MonsterSkill(pad_util.Printable):
     """Leader/active skill info for a player-ownable monster."""
 
+    __slots__ = ('skill_id', 'name', 'description', 'clean_description', 'skill_type', 'levels',
+                 'cooldown_turns_max', 'cooldown_turns_min', 'unknown_005', 'data')
+
     def __init__(self, skill_id: int, raw: List[str]):
         self.skill_id = SkillId(skill_id)
 
@@ -46,7 +49,7 @@ class MonsterSkill(pad_util.Printable):
         self.data = raw[6:]
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(pad_util.dump_helper(self))
 
     def __repr__(self):
         return 'Skill(%s, %r)' % (self.skill_id, self.name)
@@ -54,5 +57,5 @@ class MonsterSkill(pad_util.Printable):
 
 def load_skill_data(data_dir=None, json_file: str = None) -> List[MonsterSkill]:
     """Load MonsterSkill objects from the PAD json file."""
-    data_json = pad_util.load_raw_json(data_dir, json_file, FILE_NAME)
-    return [MonsterSkill(i, ms) for i, ms in enumerate(data_json['skill'])]
+    raw_skills = pad_util.iter_raw_json_array(data_dir, json_file, FILE_NAME, 'skill')
+    return [MonsterSkill(i, ms) for i, ms in enumerate(raw_skills)]
@@ -2,6 +2,7 @@ import logging
 from collections import Counter, defaultdict, namedtuple
 from copy import copy
 from fractions import Fraction
+from functools import lru_cache
 from numbers import Rational
 from typing import Any, Iterable, List, Mapping, Optional, Union
 
@@ -1462,25 +1463,33 @@ class ASInflictES(ActiveSkill):
         return converter.inflict_es(self)
 
 
-def convert(skill_list: List[MonsterSkill]):
+@lru_cache(maxsize=None)
+def _skill_type_to_constructor():
     skill_type_to_constructor = {}
     for skill in ALL_ACTIVE_SKILLS:
         if skill.skill_type in skill_type_to_constructor:
             raise ValueError('Unexpected duplicate skill_type: ' + str(skill.skill_type))
         skill_type_to_constructor[skill.skill_type] = skill
+    return skill_type_to_constructor
 
-    results = {}
-    for s in skill_list:
-        skill_constructor = None
 
-        if s.skill_type == 0 and len(s.data) > 1 and s.data[1] != 0:
-            # This is an annoying special case
-            skill_constructor = ASMultiplierMultiTargetAttrNuke
-        elif s.skill_type in skill_type_to_constructor:
-            skill_constructor = skill_type_to_constructor[s.skill_type]
+def convert_skill(s: MonsterSkill) -> Optional[ActiveSkill]:
+    """Converts a single skill; MultiPart children are not filled in."""
+    if s.skill_type == 0 and len(s.data) > 1 and s.data[1] != 0:
+        # This is an annoying special case
+        skill_constructor = ASMultiplierMultiTargetAttrNuke
+    else:
+        skill_constructor = _skill_type_to_constructor().get(s.skill_type)
+
+    return skill_constructor(s) if skill_constructor is not None else None
 
-        if skill_constructor is not None:
-            results[s.skill_id] = skill_constructor(s)
+
+def convert(skill_list: List[MonsterSkill]):
+    results = {}
+    for s in skill_list:
+        skill = convert_skill(s)
+        if skill is not None:
+            results[s.skill_id] = skill
 
     # Fill in MultiSkills
     for s in results.values():
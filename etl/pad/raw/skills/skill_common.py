@@ -1,11 +1,15 @@
+import re
 from enum import Enum, auto
+from functools import cached_property, lru_cache
 from typing import Dict, List, NamedTuple, NamedTupleMeta, TYPE_CHECKING  # noqa
 
-import jinja2
-
 if TYPE_CHECKING:
     NamedTupleMeta = type
 
+# Anything that jinja would treat as markup: variables, statements or comments.
+_TEMPLATE_MARKUP_RE = re.compile(r'{[{%#]')
+_NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+
 
 class I13NotImplemented(NotImplementedError):
     pass
@@ -23,6 +27,30 @@ def multi_getattr(o, *args):
     raise Exception('Attributes not found:' + str(args))
 
 
+@lru_cache(maxsize=None)
+def _jinja_environment():
+    # jinja2 is slow to import and only needed for the few skills that reference awakenings,
+    # so it is loaded on first use rather than with the module.
+    import jinja2
+    return jinja2.Environment()
+
+
+@lru_cache(maxsize=4096)
+def _compile_template(text: str):
+    return _jinja_environment().from_string(text)
+
+
+def render_template(text: str, **context) -> str:
+    """Renders text as a jinja template; the same text is only ever compiled once."""
+    if not _TEMPLATE_MARKUP_RE.search(text):
+        # Plain text renders as itself, after jinja's newline handling.
+        lines = _NEWLINE_RE.split(text)
+        if lines[-1] == '':
+            del lines[-1]
+        return '\n'.join(lines)
+    return _compile_template(text).render(**context)
+
+
 class BaseTextConverter:
     """Contains code shared across AS and LS converters."""
     _ATTRS = _TYPES = {}
@@ -92,10 +120,12 @@ class BaseTextConverter:
     ATTRS_EXCEPT_BOMBS = list(range(9))
     ALL_ATTRS = list(range(10))
 
+    @cached_property
+    def _awoskills(self) -> Dict[str, str]:
+        return {f"id{awid}": name for awid, name in self.AWAKENING_MAP.items()}
+
     def process_raw(self, text: str) -> str:
-        return jinja2.Template(text).render(
-            awoskills={f"id{awid}": name for awid, name in self.AWAKENING_MAP.items()}
-        )
+        return render_template(text, awoskills=self._awoskills)
 
 
 # ENUMS
@@ -1,47 +1,107 @@
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
 
 from pad.raw.skill import MonsterSkill
 from pad.raw.skills import active_skill_info, leader_skill_info
-from pad.raw.skills.active_skill_info import ActiveSkill
-from pad.raw.skills.leader_skill_info import LeaderSkill
+from pad.raw.skills.active_skill_info import ActiveSkill, ASMultiPart
+from pad.raw.skills.leader_skill_info import LeaderSkill, LSMultiPartSkill
 
 human_fix_logger = logging.getLogger('human_fix')
 
 
 class SkillParser:
+    """Converts MonsterSkills into ActiveSkills/LeaderSkills.
+
+    Skills are converted on first lookup via active()/leader(), so tools that only need
+    a few skills don't pay for all of them. Reading active_skills/leader_skills converts
+    everything that is left.
+    """
+
     def __init__(self):
-        self.active_skills = []  # type: List[ActiveSkill]
-        self.leader_skills = []  # type: List[LeaderSkill]
+        self.skill_list = []  # type: List[MonsterSkill]
         self.as_by_id = {}  # type: Dict[int, ActiveSkill]
         self.ls_by_id = {}  # type: Dict[int, LeaderSkill]
+        self._raw_by_id = {}  # type: Dict[int, MonsterSkill]
+        self._converted = set()  # type: Set[int]
+        # Skills that no converter understood; they get placeholder active and leader skills.
+        self._unparsed = set()  # type: Set[int]
 
     def active(self, as_id: int) -> ActiveSkill:
+        self._convert(as_id)
         return self.as_by_id.get(as_id, None)
 
     def leader(self, ls_id: int) -> LeaderSkill:
+        self._convert(ls_id)
         return self.ls_by_id.get(ls_id, None)
 
+    @property
+    def active_skills(self) -> List[ActiveSkill]:
+        return self._all_converted(self.as_by_id)
+
+    @property
+    def leader_skills(self) -> List[LeaderSkill]:
+        return self._all_converted(self.ls_by_id)
+
     def parse(self, skill_list: List[MonsterSkill]):
-        self.active_skills = active_skill_info.convert(skill_list)
-        self.leader_skills = leader_skill_info.convert(skill_list)
-        self.as_by_id = {x.skill_id: x for x in self.active_skills}
-        self.ls_by_id = {x.skill_id: x for x in self.leader_skills}
-
-        for skill in skill_list:
-            skill_id = skill.skill_id
-            if skill.skill_type in [0, 89]:  # 0 is None, 89 is placeholder
-                continue
-            if self.active(skill_id) is None and self.leader(skill_id) is None:
-                human_fix_logger.error('Skill not parsed into active/leader: %d %d %s',
-                                       skill.skill_id, skill.skill_type, skill.data)
-
-                skill.skill_type = -1
-                active = ActiveSkill(skill)
-                self.active_skills.append(active)
-                self.as_by_id[skill_id] = active
-
-                leader = LeaderSkill(-1, skill)
-                self.leader_skills.append(leader)
-                self.ls_by_id[skill_id] = leader
+        self.skill_list = skill_list
+        self._raw_by_id = {x.skill_id: x for x in skill_list}
         return self
+
+    def _all_converted(self, by_id: Dict[int, object]) -> List:
+        for skill in self.skill_list:
+            self._convert(skill.skill_id)
+        # Placeholders for unparsed skills come after all the real ones.
+        ids = [s.skill_id for s in self.skill_list if s.skill_id not in self._unparsed]
+        ids += [s.skill_id for s in self.skill_list if s.skill_id in self._unparsed]
+        return [by_id[x] for x in ids if x in by_id]
+
+    def _parsed_active(self, as_id: int) -> Optional[ActiveSkill]:
+        self._convert(as_id)
+        return None if as_id in self._unparsed else self.as_by_id.get(as_id)
+
+    def _parsed_leader(self, ls_id: int) -> Optional[LeaderSkill]:
+        self._convert(ls_id)
+        return None if ls_id in self._unparsed else self.ls_by_id.get(ls_id)
+
+    def _convert(self, skill_id: int):
+        if skill_id in self._converted or skill_id not in self._raw_by_id:
+            return
+        self._converted.add(skill_id)
+        skill = self._raw_by_id[skill_id]
+
+        active = active_skill_info.convert_skill(skill)
+        leader = None
+        try:
+            leader = leader_skill_info.convert_skill(skill)
+        except Exception as ex:
+            human_fix_logger.warning('Failed to convert {} {}'.format(skill.skill_type, ex))
+
+        if active is None and leader is None and skill.skill_type not in [0, 89]:  # 0 is None, 89 is placeholder
+            human_fix_logger.error('Skill not parsed into active/leader: %d %d %s',
+                                   skill.skill_id, skill.skill_type, skill.data)
+            self._unparsed.add(skill_id)
+            skill.skill_type = -1
+            active = ActiveSkill(skill)
+            leader = LeaderSkill(-1, skill)
+
+        # Register before filling in children, in case a multi-part skill refers back to itself.
+        if active is not None:
+            self.as_by_id[skill_id] = active
+        if leader is not None:
+            self.ls_by_id[skill_id] = leader
+
+        if isinstance(active, ASMultiPart):
+            for p_id in active.child_ids:
+                p_skill = self._parsed_active(p_id)
+                if p_skill is None:
+                    human_fix_logger.error('Failed to look up multi-part active skill id: %d', p_id)
+                    continue
+                active.child_skills.append(p_skill)
+
+        if isinstance(leader, LSMultiPartSkill):
+            for p_id in leader.child_ids:
+                p_skill = self._parsed_leader(p_id)
+                if p_skill is None:
+                    human_fix_logger.warning('Failed to look up leader skill id:' + str(p_id))
+                    continue
+                leader.child_skills.append(p_skill)
@@ -0,0 +1,258 @@
+"""
+Shared text converters, plus a cache of rendered skill text.
+
+Rendering is a pure function of the skill class, its raw data (and children, for multi-part
+skills) and the converter, so identical skills only get rendered once. The cache can be
+saved to disk and reused on the next run; it is discarded if any of the skill/text modules
+have changed since it was written.
+
+prerender() fills the cache for a whole set of skills up front, spread across worker
+processes, so the storage objects only have to look their text up.
+
+Some converters log human_fix warnings while rendering. Those are stored with the text, with
+the skill id taken out, and logged again on every lookup with the id of the skill being looked
+up, so the report sees them once per skill, as if it was rendered.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pad.raw.skills.active_skill_info import ActiveSkill
+from pad.raw.skills.emoji_en.enemy_skill_text import EnEmojiESTextConverter
+from pad.raw.skills.en.active_skill_text import EnASTextConverter
+from pad.raw.skills.en.enemy_skill_text import EnESTextConverter
+from pad.raw.skills.en.leader_skill_text import EnLSTextConverter
+from pad.raw.skills.ja.active_skill_text import JaASTextConverter
+from pad.raw.skills.ja.enemy_skill_text import JaESTextConverter
+from pad.raw.skills.ja.leader_skill_text import JaLSTextConverter
+from pad.raw.skills.ko.active_skill_text import KoASTextConverter
+from pad.raw.skills.ko.enemy_skill_text import KoESTextConverter
+from pad.raw.skills.leader_skill_info import LeaderSkill
+
+logger = logging.getLogger('processor')
+human_fix_logger = logging.getLogger('human_fix')
+
+# Converters hold no per-skill state, so a single instance of each is shared.
+JA_AS_CONVERTER = JaASTextConverter()
+EN_AS_CONVERTER = EnASTextConverter()
+KO_AS_CONVERTER = KoASTextConverter()
+JA_LS_CONVERTER = JaLSTextConverter()
+EN_LS_CONVERTER = EnLSTextConverter()
+JA_ES_CONVERTER = JaESTextConverter()
+EN_ES_CONVERTER = EnESTextConverter()
+KO_ES_CONVERTER = KoESTextConverter()
+EN_EMOJI_ES_CONVERTER = EnEmojiESTextConverter()
+
+AS_CONVERTERS = (JA_AS_CONVERTER, EN_AS_CONVERTER, KO_AS_CONVERTER)
+LS_CONVERTERS = (JA_LS_CONVERTER, EN_LS_CONVERTER)
+ES_CONVERTERS = (JA_ES_CONVERTER, EN_ES_CONVERTER, KO_ES_CONVERTER, EN_EMOJI_ES_CONVERTER)
+
+# Worker processes get converters by name rather than pickled copies.
+_CONVERTERS_BY_NAME = {type(c).__name__: c for c in AS_CONVERTERS + LS_CONVERTERS + ES_CONVERTERS}
+
+# Enemy skill text depends on the instance (flags, counters, ...) rather than just the raw skill,
+# so it is keyed by enemy skill id, only kept for the current run and never saved.
+_ENEMY_KEY = 'enemy'
+
+# Number of skills handed to a worker process at a time.
+_BATCH_SIZE = 200
+
+# A rendered text, plus the (level, message template) of each human_fix record logged while
+# rendering it. Templates have the skill id replaced by %(skill_id)s.
+Entry = Tuple[str, Tuple[Tuple[int, str], ...]]
+
+
+class _HumanFixCollector(logging.Filter):
+    """Sits on the human_fix logger and collects the records of threads inside _collect_human_fix.
+
+    Processors may render concurrently, so the collecting state is per thread. A filter on the
+    logger runs before any of its handlers, so returning False keeps a record out of all of them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.local = threading.local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        collecting = getattr(self.local, 'collecting', None)
+        if collecting is None:
+            return True
+        records, quiet = collecting
+        records.append((record.levelno, record.getMessage()))
+        return not quiet
+
+
+_human_fix_collector = _HumanFixCollector()
+human_fix_logger.addFilter(_human_fix_collector)
+
+
+@contextmanager
+def _collect_human_fix(quiet: bool = False):
+    """Collects human_fix records logged by this thread inside the block; if quiet, they are dropped."""
+    local = _human_fix_collector.local
+    previous = getattr(local, 'collecting', None)
+    records = []  # type: List[Tuple[int, str]]
+    local.collecting = (records, quiet)
+    try:
+        yield records
+    finally:
+        local.collecting = previous
+
+
+def _message_template(message: str, skill_id: Optional[int]) -> str:
+    template = message.replace('%', '%%')
+    if skill_id is None:
+        return template
+    return re.sub(r'(?<!\d){}(?!\d)'.format(skill_id), '%(skill_id)s', template)
+
+
+def _render_entry(skill, skill_id: Optional[int], method: str, converter, quiet: bool = False) -> Entry:
+    with _collect_human_fix(quiet) as records:
+        text = getattr(skill, method)(converter)
+    return text, tuple((level, _message_template(message, skill_id)) for level, message in records)
+
+
+def _code_version() -> str:
+    """Hashes the skill modules, so that text rendered by older code is never reused."""
+    digest = hashlib.sha1()
+    skills_dir = os.path.dirname(os.path.abspath(__file__))
+    for root, dirs, files in os.walk(skills_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.endswith('.py'):
+                with open(os.path.join(root, file_name), 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _skill_key(skill, parents=()) -> Tuple:
+    key = (type(skill).__name__, skill.skill_type, repr(skill.raw_data), skill.raw_description)
+    children = [c for c in getattr(skill, 'child_skills', None) or [] if c not in parents]
+    return key + tuple(_skill_key(c, parents + (skill,)) for c in children)
+
+
+def _render_batch(batch: List[Tuple[Any, int, List[Tuple[Tuple, str, str]]]]) -> List[Tuple[Tuple, Entry]]:
+    """Runs in a worker process; renders every (key, method, converter name) job for each skill.
+
+    human_fix records are only collected, not logged; they are logged when the text is looked up.
+    """
+    results = []
+    for skill, skill_id, jobs in batch:
+        for key, method, converter_name in jobs:
+            converter = _CONVERTERS_BY_NAME[converter_name]
+            results.append((key, _render_entry(skill, skill_id, method, converter, quiet=True)))
+    return results
+
+
+class SkillTextCache(object):
+    def __init__(self):
+        self.version = _code_version()
+        self.texts = {}  # type: Dict[Tuple, Entry]
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Tuple, skill_id: Optional[int]) -> Optional[Entry]:
+        entry = self.texts.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        for level, template in entry[1]:
+            human_fix_logger.log(level, template, {'skill_id': skill_id})
+        return entry
+
+    def _render(self, method: str, skill, converter) -> str:
+        key = (method, type(converter).__name__, _skill_key(skill))
+        entry = self._lookup(key, skill.skill_id)
+        if entry is None:
+            entry = _render_entry(skill, skill.skill_id, method, converter)
+            self.texts[key] = entry
+        return entry[0]
+
+    def full_text(self, skill, converter) -> str:
+        return self._render('full_text', skill, converter)
+
+    def templated_text(self, skill, converter) -> str:
+        return self._render('templated_text', skill, converter)
+
+    def enemy_text(self, method: str, enemy_skill_id: int, behavior, converter) -> str:
+        """Looks up text prerendered for this enemy skill, rendering it inline if there is none."""
+        entry = self._lookup((_ENEMY_KEY, enemy_skill_id, method, type(converter).__name__), enemy_skill_id)
+        if entry is None:
+            return getattr(behavior, method)(converter)
+        return entry[0]
+
+    def prerender(self,
+                  skills: Iterable[Any] = (),
+                  enemy_skills: Iterable[Tuple[int, Any]] = (),
+                  enemy_method: str = 'full_description',
+                  processes: int = 1):
+        """Renders every missing text for the given skills, using a pool of worker processes.
+
+        skills are active/leader skills, rendered the way the storage objects use them.
+        enemy_skills are (enemy_skill_id, behavior) pairs, rendered with enemy_method.
+        """
+        pending = {}  # type: Dict[Tuple, Tuple[Any, int, List[Tuple[Tuple, str, str]]]]
+        for skill in skills:
+            if isinstance(skill, ActiveSkill):
+                renders = [(m, c) for m in ('full_text', 'templated_text') for c in AS_CONVERTERS]
+            elif isinstance(skill, LeaderSkill):
+                renders = [('full_text', c) for c in LS_CONVERTERS]
+            else:
+                continue
+            skill_key = _skill_key(skill)
+            if skill_key in pending:
+                continue
+            jobs = []
+            for method, converter in renders:
+                key = (method, type(converter).__name__, skill_key)
+                if key not in self.texts:
+                    jobs.append((key, method, type(converter).__name__))
+            if jobs:
+                pending[skill_key] = (skill, skill.skill_id, jobs)
+
+        for enemy_skill_id, behavior in enemy_skills:
+            jobs = [((_ENEMY_KEY, enemy_skill_id, enemy_method, type(c).__name__), enemy_method, type(c).__name__)
+                    for c in ES_CONVERTERS]
+            pending[(_ENEMY_KEY, enemy_skill_id)] = (behavior, enemy_skill_id, jobs)
+
+        work = list(pending.values())
+        batches = [work[i:i + _BATCH_SIZE] for i in range(0, len(work), _BATCH_SIZE)]
+        logger.info('rendering text for %d skills in %d processes', len(work), processes)
+        if processes > 1 and len(batches) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                self._store_results(executor.map(_render_batch, batches))
+        else:
+            self._store_results(map(_render_batch, batches))
+
+    def _store_results(self, results: Iterable[List[Tuple[Tuple, Entry]]]):
+        for batch in results:
+            self.texts.update(batch)
+
+    def load(self, cache_file: str):
+        if not os.path.exists(cache_file):
+            return
+        with open(cache_file, 'rb') as f:
+            data = pickle.load(f)  # type: Dict[str, Any]
+        if data.get('version') != self.version:
+            logger.info('skill text cache is from different code, ignoring it')
+            return
+        self.texts.update(data['texts'])
+        logger.info('loaded %d cached skill texts', len(data['texts']))
+
+    def save(self, cache_file: str):
+        tmp_file = cache_file + '.tmp'
+        texts = {k: v for k, v in self.texts.items() if k[0] != _ENEMY_KEY}
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({'version': self.version, 'texts': texts}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+        logger.info('saved %d skill texts (%d hits, %d misses)', len(texts), self.hits, self.misses)
+
+
+skill_text_cache = SkillTextCache()
@@ -1,5 +1,7 @@
 from enum import Enum
-from typing import List
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, List, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
 
 from pad.common.utils import format_int_list
 from pad.raw.skills.active_skill_info import ASAddAdditionalCombos, ASAtkBasedNuke, ASAttrBurst, ASAttrBurstMultiPart, \
@@ -112,260 +114,281 @@ def format_conditions(skill_conditions):
     return format_int_list(sorted_cond_values)
 
 
-def parse_as_conditions(skill, child=False) -> List[ASTags]:
-    """Takes the processor-generated active skill text and produces a list of conditions."""
-    if not child:
-        skill = skill.cur_skill
-    results = set()
-
-    if isinstance(skill, ASMultiPartSkill):
-        for s in skill.parts:
-            results.update(parse_as_conditions(s, True))
-        if len([s for s in skill.parts if isinstance(s, (ASOneAttrtoOneAttr,
-                                                         ASTwoAttrtoOneTwoAttr,
-                                                         ASThreeAttrtoOneAttr))]) >= 2:
-            results.add(ASTags.DOUBLE_ORBS_CONVERT)
-
-    if isinstance(skill, ASRandomSkill):
-        results.add(ASTags.ETC)
-        for s in skill.child_skills:
-            results.update(parse_as_conditions(s, True))
-
-    if isinstance(skill, (ASOrbEnhance, ASBicolorOrbEnhance, ASOrbEnhanceNew)):
-        results.add(ASTags.ENHANCED_ORBS)
-
-    if isinstance(skill, (ASAttrBurst, ASAttrBurstMultiPart)):
-        if skill.attributes:
-            results.add(ASTags.ENHANCED_ATTACK)
-        if skill.rcv_boost and skill.multiplier >= 1:
-            results.add(ASTags.ENHANCED_HEAL)
-
-    if isinstance(skill, (ASTypeBurst, ASTypeBurstNew)):
+# Tags are derived from the skill type first, and only sometimes from the skill's values. Each
+# skill class maps to the tags it always carries plus the rules that need to look at the skill;
+# both are resolved once per class and the resulting tags are cached per skill object. The cache
+# is kept off the skill itself so that it doesn't show up in the JSON dumps.
+
+# Skill types that always carry a tag.
+_AS_TYPE_TAGS = [
+    (ASRandomSkill, ASTags.ETC),
+    ((ASOrbEnhance, ASBicolorOrbEnhance, ASOrbEnhanceNew), ASTags.ENHANCED_ORBS),
+    ((ASTypeBurst, ASTypeBurstNew), ASTags.ENHANCED_ATTACK),
+    (ASDefenseBreak, ASTags.REDUCE_DEFENSE),
+    (ASGravity, ASTags.GRAVITY),
+    ((ASOneAttrtoOneAttr, ASTwoAttrtoOneTwoAttr, ASThreeAttrtoOneAttr), ASTags.ORB_CONVERT),
+    (ASDelay, ASTags.MENACE),
+    (ASFreeOrbMovement, ASTags.STOP_TIME),
+    (ASPoisonEnemies, ASTags.POISON),
+    (ASCounterattack, ASTags.COUNTERATTACK),
+    (ASLowHpConditionalAttrDamageBoost, ASTags.GRUDGE_STRIKE),
+    (ASLeaderSwap, ASTags.THE_SWITCH),
+    (ASMassAttack, ASTags.ATTACK_CHANGER),
+    ((ASBoardChange, ASShowComboPath), ASTags.ALL_ORBS_CONVERT),
+    ((ASHpConditionalTargetNuke, ASHpConditionalMassNuke,
+      ASTargetNukeWithHpPenalty, ASMassNukeWithHpPenalty,
+      ASSuicide195), ASTags.SUICIDE),
+    (ASIncreasedSkyfallChance, ASTags.DROP_CHANCE),
+    ((ASMiniNukeandHpRecovery, ASAtkBasedNuke), ASTags.ATTACK_AND_HEAL),
+    ((ASTrueDamageNuke, ASTrueDamageNukeAll, ASMultiLaserConvert), ASTags.FIXED_DAMAGE),
+    (ASAttrOnAttrNuke, ASTags.ATTRIBUTE_ATTACK),
+    ((ASColumnOrbChange, ASRowOrbChange), ASTags.LINE_ORBS_CONVERTER),
+    (ASIncreasedOrbMovementTime, ASTags.EXTENDS_TIME),
+    (ASAttributeChange, ASTags.CHANGE_ATTRIBUTE),
+    (ASHaste, ASTags.REDUCE_SKILL_TURN),
+    (ASOrbRefresh, ASTags.ORB_REFRESH),
+    (ASEnemyAttrChange, ASTags.CHANGE_ENEMIES_ATTRIBUTE),
+    (ASAddAdditionalCombos, ASTags.ADD_COMBO),
+    (ASTrueGravity, ASTags.NEW_GRAVITY),
+    ((ASOrbLockRemoval, ASShowComboPath), ASTags.REMOVE_LOCK),
+    (ASReduceVoidDamage, ASTags.PIERCE_DAMAGE_VOID),
+    (ASNoSkyfallForXTurns, ASTags.VOID_SKYFALLS),
+    (ASOrbLock, ASTags.ORB_LOCK),
+    (ASShowComboPath, ASTags.COMBO_ROUTE),
+    (ASReduceDisableMatch, ASTags.REDUCE_MATCH_RESTRICTION),
+]
+
+_LS_TYPE_TAGS = [
+    (LSAutoheal, LSTags.AUTO_HEAL),
+    (LSCounterattack, LSTags.COUNTERATTACK),
+    (LSResolve, LSTags.RESOLVE),
+    (LSCoinDropBoost, LSTags.COIN),
+    (LSEggDropRateBoost, LSTags.EGG),
+    (LSRankXpBoost, LSTags.EXP),
+    ((LSSevenBySix, LSSevenBySixStatBoost), LSTags.BOARD_CHANGE_7X6),
+    ((LSNoSkyfallBoost, LSOrbRemainingMultiplier), LSTags.NO_SKYFALL_COMBOS),
+    (LSTaikoDrum, LSTags.ORB_SOUNDS),
+]
+
+# Rules that depend on the skill's values, as (skill types, fn(skill, results)).
+_AS_RULES = []  # type: List[Tuple[Any, Callable[[Any, Set[ASTags]], None]]]
+_LS_RULES = []  # type: List[Tuple[Any, Callable[[Any, Set[LSTags]], None]]]
+
+
+def _as_rule(types):
+    def register(fn):
+        _AS_RULES.append((types, fn))
+        return fn
+
+    return register
+
+
+def _ls_rule(types):
+    def register(fn):
+        _LS_RULES.append((types, fn))
+        return fn
+
+    return register
+
+
+@_as_rule(ASMultiPartSkill)
+def _as_multi_part(skill, results):
+    for s in skill.parts:
+        results.update(_as_tags(s))
+    if len([s for s in skill.parts if isinstance(s, (ASOneAttrtoOneAttr,
+                                                     ASTwoAttrtoOneTwoAttr,
+                                                     ASThreeAttrtoOneAttr))]) >= 2:
+        results.add(ASTags.DOUBLE_ORBS_CONVERT)
+
+
+@_as_rule(ASRandomSkill)
+def _as_random(skill, results):
+    for s in skill.child_skills:
+        results.update(_as_tags(s))
+
+
+@_as_rule((ASAttrBurst, ASAttrBurstMultiPart))
+def _as_attr_burst(skill, results):
+    if skill.attributes:
         results.add(ASTags.ENHANCED_ATTACK)
+    if skill.rcv_boost and skill.multiplier >= 1:
+        results.add(ASTags.ENHANCED_HEAL)
 
-    if isinstance(skill, ASDefenseBreak):
-        results.add(ASTags.REDUCE_DEFENSE)
-
-    if isinstance(skill, ASGravity):
-        results.add(ASTags.GRAVITY)
-
-    if isinstance(skill, (ASOneAttrtoOneAttr, ASTwoAttrtoOneTwoAttr, ASThreeAttrtoOneAttr)):
-        results.add(ASTags.ORB_CONVERT)
-        if 5 in skill.from_attr:
-            results.add(ASTags.ATTACK_STANCE)
-        if 5 in skill.to_attr:
-            results.add(ASTags.GUARD_STANCE)
-
-    if isinstance(skill, ASDelay):
-        results.add(ASTags.MENACE)
-
-    if isinstance(skill, ASFreeOrbMovement):
-        results.add(ASTags.STOP_TIME)
 
-    if isinstance(skill, (ASDamageReduction, ASDamageVoid)):
-        if skill.shield == 1:
-            results.add(ASTags.VOID_DAMAGE)
-        else:
-            results.add(ASTags.REDUCE_DAMAGE)
+@_as_rule((ASOneAttrtoOneAttr, ASTwoAttrtoOneTwoAttr, ASThreeAttrtoOneAttr))
+def _as_orb_convert(skill, results):
+    if 5 in skill.from_attr:
+        results.add(ASTags.ATTACK_STANCE)
+    if 5 in skill.to_attr:
+        results.add(ASTags.GUARD_STANCE)
 
-    if isinstance(skill, (ASAwokenSkillBurst, ASAwokenSkillBurst2)):
-        if skill.toggle == 1:
-            results.add(ASTags.ENHANCED_HEAL)
-        elif skill.toggle in [0, 2]:
-            results.add(ASTags.ENHANCED_ATTACK)
-        elif skill.toggle == 3:
-            results.add(ASTags.REDUCE_DAMAGE)
 
-    if isinstance(skill, ASPoisonEnemies):
-        results.add(ASTags.POISON)
+@_as_rule((ASDamageReduction, ASDamageVoid))
+def _as_shield(skill, results):
+    if skill.shield == 1:
+        results.add(ASTags.VOID_DAMAGE)
+    else:
+        results.add(ASTags.REDUCE_DAMAGE)
 
-    if isinstance(skill, ASCounterattack):
-        results.add(ASTags.COUNTERATTACK)
 
-    if isinstance(skill, ASLowHpConditionalAttrDamageBoost):
-        results.add(ASTags.GRUDGE_STRIKE)
+@_as_rule((ASAwokenSkillBurst, ASAwokenSkillBurst2))
+def _as_awoken_burst(skill, results):
+    if skill.toggle == 1:
+        results.add(ASTags.ENHANCED_HEAL)
+    elif skill.toggle in [0, 2]:
+        results.add(ASTags.ENHANCED_ATTACK)
+    elif skill.toggle == 3:
+        results.add(ASTags.REDUCE_DAMAGE)
 
-    if isinstance(skill, ASLeaderSwap):
-        results.add(ASTags.THE_SWITCH)
 
-    if isinstance(skill, ASMassAttack):
-        results.add(ASTags.ATTACK_CHANGER)
+@_as_rule(ASTwoAttrtoOneTwoAttr)
+def _as_double_convert(skill, results):
+    if len(skill.to_attr) > 1:
+        results.add(ASTags.DOUBLE_ORBS_CONVERT)
 
-    if isinstance(skill, ASTwoAttrtoOneTwoAttr):
-        if len(skill.to_attr) > 1:
-            results.add(ASTags.DOUBLE_ORBS_CONVERT)
 
-    if isinstance(skill, (ASBoardChange, ASShowComboPath)):
+@_as_rule(ASThreeAttrtoOneAttr)
+def _as_all_convert(skill, results):
+    if skill.from_attr == list(range(10)):
         results.add(ASTags.ALL_ORBS_CONVERT)
-    if isinstance(skill, ASThreeAttrtoOneAttr):
-        if skill.from_attr == list(range(10)):
-            results.add(ASTags.ALL_ORBS_CONVERT)
-
-    if isinstance(skill, (ASHpConditionalTargetNuke, ASHpConditionalMassNuke,
-                          ASTargetNukeWithHpPenalty, ASMassNukeWithHpPenalty,
-                          ASSuicide195)):
-        results.add(ASTags.SUICIDE)
-
-    if isinstance(skill, (ASHpRecovery, ASHpRecoverFromRcv, ASHpRecoverStatic, ASHpRecoveryandBindClear)):
-        if any([getattr(skill, 'hp', 0),
-                getattr(skill, 'rcv_multiplier_as_hp', 0),
-                getattr(skill, 'percentage_max_hp', 0),
-                getattr(skill, 'team_rcv_multiplier_as_hp', 0)]):
-            results.add(ASTags.HEAL)
-    if isinstance(skill, ASAutoHealConvert):
-        if skill.duration:
-            results.add(ASTags.HEAL)
-    if isinstance(skill, (ASAutoHealConvert, ASHpRecoveryandBindClear)):
-        if skill.card_bind:
-            results.add(ASTags.RECOVER_BIND)
-        if skill.awoken_bind:
-            results.add(ASTags.AWOKEN_INVALID_RECOVERY)
 
-    if ASTags.RECOVER_BIND in results and ASTags.AWOKEN_INVALID_RECOVERY in results:
-        results.add(ASTags.BIND_AWOKEN_INVALID_RECOVERY)
-    if ASTags.RECOVER_BIND in results and ASTags.HEAL in results:
-        results.add(ASTags.HEAL_BIND_RECOVERY)
 
-    if isinstance(skill, ASIncreasedSkyfallChance):
-        results.add(ASTags.DROP_CHANCE)
+@_as_rule((ASHpRecovery, ASHpRecoverFromRcv, ASHpRecoverStatic, ASHpRecoveryandBindClear))
+def _as_heal(skill, results):
+    if any([getattr(skill, 'hp', 0),
+            getattr(skill, 'rcv_multiplier_as_hp', 0),
+            getattr(skill, 'percentage_max_hp', 0),
+            getattr(skill, 'team_rcv_multiplier_as_hp', 0)]):
+        results.add(ASTags.HEAL)
 
-    if isinstance(skill, (ASMiniNukeandHpRecovery, ASAtkBasedNuke)):
-        results.add(ASTags.ATTACK_AND_HEAL)
 
-    if isinstance(skill, (ASTrueDamageNuke, ASTrueDamageNukeAll, ASMultiLaserConvert)):
-        results.add(ASTags.FIXED_DAMAGE)
+@_as_rule(ASAutoHealConvert)
+def _as_auto_heal(skill, results):
+    if skill.duration:
+        results.add(ASTags.HEAL)
 
-    if hasattr(skill, 'mass_attack'):
-        if skill.mass_attack:
-            results.add(ASTags.MASSIVE_ATTACK)
-        else:
-            results.add(ASTags.SINGLE_TARGET_ATTACK)
-
-    if isinstance(skill, ASAttrOnAttrNuke):
-        results.add(ASTags.ATTRIBUTE_ATTACK)
 
-    if isinstance(skill, (ASColumnOrbChange, ASRowOrbChange)):
-        results.add(ASTags.LINE_ORBS_CONVERTER)
+@_as_rule((ASAutoHealConvert, ASHpRecoveryandBindClear))
+def _as_bind_clear(skill, results):
+    if skill.card_bind:
+        results.add(ASTags.RECOVER_BIND)
+    if skill.awoken_bind:
+        results.add(ASTags.AWOKEN_INVALID_RECOVERY)
 
-    if isinstance(skill, ASIncreasedOrbMovementTime):
-        results.add(ASTags.EXTENDS_TIME)
 
-    if isinstance(skill, ASAttributeChange):
-        results.add(ASTags.CHANGE_ATTRIBUTE)
+@_as_rule(ASVoidDamageAbsorption)
+def _as_void_absorb(skill, results):
+    if skill.damage_absorb:
+        results.add(ASTags.VOID_DAMAGE_ABSORBS)
+    if skill.attribute_absorb:
+        results.add(ASTags.VOID_ATT_ABSORBS)
 
-    if isinstance(skill, ASHaste):
-        results.add(ASTags.REDUCE_SKILL_TURN)
 
-    if isinstance(skill, ASOrbRefresh):
-        results.add(ASTags.ORB_REFRESH)
+@_ls_rule(LSMultiPartSkill)
+def _ls_multi_part(skill, results):
+    for s in skill.parts:
+        results.update(_ls_tags(s))
 
-    if isinstance(skill, ASEnemyAttrChange):
-        results.add(ASTags.CHANGE_ENEMIES_ATTRIBUTE)
 
-    if isinstance(skill, ASAddAdditionalCombos):
-        results.add(ASTags.ADD_COMBO)
+@lru_cache(maxsize=None)
+def _as_dispatch(skill_type: type) -> Tuple[FrozenSet[ASTags], Tuple[Callable, ...]]:
+    return (frozenset(tag for types, tag in _AS_TYPE_TAGS if issubclass(skill_type, types)),
+            tuple(fn for types, fn in _AS_RULES if issubclass(skill_type, types)))
 
-    if isinstance(skill, ASTrueGravity):
-        results.add(ASTags.NEW_GRAVITY)
 
-    if isinstance(skill, (ASOrbLockRemoval, ASShowComboPath)):
-        results.add(ASTags.REMOVE_LOCK)
+@lru_cache(maxsize=None)
+def _ls_dispatch(skill_type: type) -> Tuple[FrozenSet[LSTags], Tuple[Callable, ...]]:
+    return (frozenset(tag for types, tag in _LS_TYPE_TAGS if issubclass(skill_type, types)),
+            tuple(fn for types, fn in _LS_RULES if issubclass(skill_type, types)))
 
-    if isinstance(skill, ASVoidDamageAbsorption):
-        if skill.damage_absorb:
-            results.add(ASTags.VOID_DAMAGE_ABSORBS)
-        if skill.attribute_absorb:
-            results.add(ASTags.VOID_ATT_ABSORBS)
 
-    if isinstance(skill, ASReduceVoidDamage):
-        results.add(ASTags.PIERCE_DAMAGE_VOID)
+_as_tag_cache = WeakKeyDictionary()  # type: WeakKeyDictionary[Any, FrozenSet[ASTags]]
+_ls_tag_cache = WeakKeyDictionary()  # type: WeakKeyDictionary[Any, FrozenSet[LSTags]]
 
-    if isinstance(skill, ASNoSkyfallForXTurns):
-        results.add(ASTags.VOID_SKYFALLS)
 
-    if isinstance(skill, ASOrbLock):
-        results.add(ASTags.ORB_LOCK)
+def _as_tags(skill) -> FrozenSet[ASTags]:
+    tags = _as_tag_cache.get(skill)
+    if tags is not None:
+        return tags
 
-    if isinstance(skill, ASShowComboPath):
-        results.add(ASTags.COMBO_ROUTE)
+    type_tags, rules = _as_dispatch(type(skill))
+    results = set(type_tags)
+    for rule in rules:
+        rule(skill, results)
 
-    if isinstance(skill, ASReduceDisableMatch):
-        results.add(ASTags.REDUCE_MATCH_RESTRICTION)
+    if hasattr(skill, 'mass_attack'):
+        if skill.mass_attack:
+            results.add(ASTags.MASSIVE_ATTACK)
+        else:
+            results.add(ASTags.SINGLE_TARGET_ATTACK)
 
-    if child:
-        return list(results)
-    return sorted(results, key=lambda x: x.value)
+    if ASTags.RECOVER_BIND in results and ASTags.AWOKEN_INVALID_RECOVERY in results:
+        results.add(ASTags.BIND_AWOKEN_INVALID_RECOVERY)
+    if ASTags.RECOVER_BIND in results and ASTags.HEAL in results:
+        results.add(ASTags.HEAL_BIND_RECOVERY)
 
+    tags = frozenset(results)
+    _as_tag_cache[skill] = tags
+    return tags
 
-def parse_ls_conditions(skill, child=False) -> List[LSTags]:
-    """Takes the processor-generated leader skill text and produces a list of conditions."""
-    if not child:
-        skill = skill.cur_skill
-    results = set()
 
-    if isinstance(skill, LSMultiPartSkill):
-        for s in skill.parts:
-            results.update(parse_ls_conditions(s, True))
+def _ls_tags(skill) -> FrozenSet[LSTags]:
+    """Tags for a leader skill, not counting its stat boosts (which multi-part children don't add)."""
+    tags = _ls_tag_cache.get(skill)
+    if tags is not None:
+        return tags
 
-    if child:
-        pass
-    elif skill.hp > 1:
-        if skill.atk > 1:
-            if skill.rcv > 1:
-                results.add(LSTags.ENHANCED_HP_ATK_RCV)
-            else:
-                results.add(LSTags.ENHANCED_HP_ATK)
-        elif skill.rcv > 1:
-            results.add(LSTags.ENHANCED_HP_RCV)
-        else:
-            results.add(LSTags.ENHANCED_HP)
-    elif skill.atk > 1:
-        if skill.rcv > 1:
-            results.add(LSTags.ENHANCED_ATK_RCV)
-        else:
-            results.add(LSTags.ENHANCED_ATK)
-    elif skill.rcv > 1:
-        results.add(LSTags.ENHANCED_RCV)
+    type_tags, rules = _ls_dispatch(type(skill))
+    results = set(type_tags)
+    for rule in rules:
+        rule(skill, results)
 
     if skill.shield > 0:
         results.add(LSTags.REDUCE_DAMAGE)
-
-    if isinstance(skill, LSAutoheal):
-        results.add(LSTags.AUTO_HEAL)
-
     if skill.mult_bonus_damage or skill.bonus_damage:
         results.add(LSTags.ADDITIONAL_ATTACK)
-
-    if isinstance(skill, LSCounterattack):
-        results.add(LSTags.COUNTERATTACK)
-
-    if isinstance(skill, LSResolve):
-        results.add(LSTags.RESOLVE)
-
     if skill.extra_time:
         results.add(LSTags.EXTEND_TIME)
+    if skill.extra_combos:
+        results.add(LSTags.EXTRA_COMBOS)
 
-    if isinstance(skill, LSCoinDropBoost):
-        results.add(LSTags.COIN)
+    tags = frozenset(results)
+    _ls_tag_cache[skill] = tags
+    return tags
 
-    if isinstance(skill, LSEggDropRateBoost):
-        results.add(LSTags.EGG)
 
-    if isinstance(skill, LSRankXpBoost):
-        results.add(LSTags.EXP)
+def _ls_stat_tag(skill) -> Optional[LSTags]:
+    if skill.hp > 1:
+        if skill.atk > 1:
+            return LSTags.ENHANCED_HP_ATK_RCV if skill.rcv > 1 else LSTags.ENHANCED_HP_ATK
+        return LSTags.ENHANCED_HP_RCV if skill.rcv > 1 else LSTags.ENHANCED_HP
+    if skill.atk > 1:
+        return LSTags.ENHANCED_ATK_RCV if skill.rcv > 1 else LSTags.ENHANCED_ATK
+    if skill.rcv > 1:
+        return LSTags.ENHANCED_RCV
+    return None
 
-    if isinstance(skill, (LSSevenBySix, LSSevenBySixStatBoost)):
-        results.add(LSTags.BOARD_CHANGE_7X6)
 
-    if isinstance(skill, (LSNoSkyfallBoost, LSOrbRemainingMultiplier)):
-        results.add(LSTags.NO_SKYFALL_COMBOS)
+def parse_as_conditions(skill, child=False) -> List[ASTags]:
+    """Takes the processor-generated active skill text and produces a list of conditions."""
+    if not child:
+        skill = skill.cur_skill
+    results = _as_tags(skill)
 
-    if isinstance(skill, LSTaikoDrum):
-        results.add(LSTags.ORB_SOUNDS)
+    if child:
+        return list(results)
+    return sorted(results, key=lambda x: x.value)
 
-    if skill.extra_combos:
-        results.add(LSTags.EXTRA_COMBOS)
+
+def parse_ls_conditions(skill, child=False) -> List[LSTags]:
+    """Takes the processor-generated leader skill text and produces a list of conditions."""
+    if not child:
+        skill = skill.cur_skill
+    results = _ls_tags(skill)
 
     if child:
         return list(results)
+    stat_tag = _ls_stat_tag(skill)
+    if stat_tag:
+        results = results | {stat_tag}
     return sorted(results, key=lambda x: x.value)
@@ -4,9 +4,10 @@ Data from across multiple servers merged together.
 import logging
 import os
 from copy import copy
-from typing import Callable, List, Optional, Tuple, TypeVar, Union
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
 from pad.common import dungeon_types, pad_util
+from pad.common.media_index import MediaIndex
 from pad.common.pad_util import is_bad_name
 from pad.common.shared_types import DungeonId, MonsterId, Server
 from pad.raw import Dungeon, EnemySkill
@@ -57,6 +58,19 @@ class CrossServerCard:
         self.gem = None
 
 
+_JP_GEM_SUFFIX = 'の希石'
+_NA_GEM_SUFFIX = "'s Gem"
+
+# Gems were introduced well after this monster; anything earlier with a gem-like name isn't one.
+_FIRST_GEM_MONSTER_ID = 4468
+
+
+def _is_gem(card: CrossServerCard) -> bool:
+    return card.monster_id >= _FIRST_GEM_MONSTER_ID \
+           and card.cur_card.card.ownable \
+           and (card.jp_card.card.name.endswith(_JP_GEM_SUFFIX) or card.na_card.card.name.endswith(_NA_GEM_SUFFIX))
+
+
 def build_cross_server_cards(jp_database: Database, na_database: Database, kr_database: Database, server: Server) \
         -> List[CrossServerCard]:
     all_monster_ids = list(sorted({
@@ -78,28 +92,23 @@ def build_cross_server_cards(jp_database: Database, na_database: Database, kr_da
             fail_logger.debug('Skipping card, %s', err_msg)
 
     # Post-Processing
-    jp_gems = {}
-    na_gems = {}
-    for card in combined_cards[4468:]:
-        if not card.cur_card.card.ownable:
-            continue
-        if card.jp_card.card.name.endswith('の希石') or \
-                card.na_card.card.name.endswith("'s Gem"):
-            jp_gems[card.jp_card.card.name[:-3]] = card
-            na_gems[card.na_card.card.name[:-6]] = card
+    jp_gems = {}  # type: Dict[str, CrossServerCard]
+    na_gems = {}  # type: Dict[str, CrossServerCard]
+    for card in combined_cards:
+        if _is_gem(card):
+            jp_gems[card.jp_card.card.name[:-len(_JP_GEM_SUFFIX)]] = card
+            na_gems[card.na_card.card.name[:-len(_NA_GEM_SUFFIX)]] = card
+
+    # Reverse indexes, so a gem can be unlinked from both servers once it's been assigned.
+    jp_gem_names = {gem: name for name, gem in jp_gems.items()}
+    na_gem_names = {gem: name for name, gem in na_gems.items()}
 
     for card in combined_cards:
         card.gem = jp_gems.get(card.jp_card.card.name) or \
                    na_gems.get(card.na_card.card.name)
         if card.gem:
-            for jc in jp_gems:
-                if jp_gems[jc] == card.gem:
-                    jp_gems.pop(jc)
-                    break
-            for nc in na_gems:
-                if na_gems[nc] == card.gem:
-                    na_gems.pop(nc)
-                    break
+            jp_gems.pop(jp_gem_names.get(card.gem), None)
+            na_gems.pop(na_gem_names.get(card.gem), None)
 
     jp_gems.update(na_gems)
     aggreg = jp_gems.keys()
@@ -523,8 +532,8 @@ class CrossServerDatabase:
         self.active_id_to_active = {s.skill_id: s for s in self.active_skills}
         self.dungeon_id_to_dungeon = {d.dungeon_id: d for d in self.dungeons}
 
-        self.hq_image_monster_ids = []  # type: List[MonsterId]
-        self.animated_monster_ids = []  # type: List[MonsterId]
+        # Only populated if load_extra_image_info is called.
+        self.media_index = MediaIndex()
 
         for csc in self.ownable_cards:
             if csc.leader_skill:
@@ -541,19 +550,10 @@ class CrossServerDatabase:
         return self.dungeon_id_to_dungeon.get(dungeon_id, None)
 
     def load_extra_image_info(self, media_dir: str):
-        for f in os.listdir(os.path.join(media_dir, 'hq_portraits')):
-            if len(f) == 9 and f[-4:].lower() == '.png':
-                self.hq_image_monster_ids.append(MonsterId(int(f[0:5])))
-
-        for f in os.listdir(os.path.join(media_dir, 'animated_portraits')):
-            if len(f) == 9 and f[-4:].lower() == '.mp4':
-                self.animated_monster_ids.append(MonsterId(int(f[0:5])))
-
+        self.media_index = MediaIndex.load(media_dir)
         for csc in self.ownable_cards:
-            if csc.monster_id in self.hq_image_monster_ids:
-                csc.has_hqimage = True
-            if csc.monster_id in self.animated_monster_ids:
-                csc.has_animation = True
+            csc.has_hqimage = self.media_index.has_hq_image(csc.monster_id)
+            csc.has_animation = self.media_index.has_animation(csc.monster_id)
 
     def save(self, output_dir: str, file_name: str, obj: object, pretty: bool):
         output_file = os.path.join(output_dir, '{}.json'.format(file_name))
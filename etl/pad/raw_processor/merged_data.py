@@ -46,6 +46,10 @@ class MergedEnemy(pad_util.Printable):
 
 
 class MergedCard(pad_util.Printable):
+    __slots__ = ('server', 'monster_no', 'monster_id', 'card', 'linked_monster_id',
+                 'active_skill_id', 'active_skill', 'leader_skill_id', 'leader_skill',
+                 'enemy_skills')
+
     def __init__(self,
                  server: Server,
                  card: Card,
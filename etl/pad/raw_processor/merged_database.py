@@ -1,6 +1,6 @@
 import logging
 import os
-from typing import List, Dict, Optional
+from typing import Collection, List, Dict, Optional
 
 from pad.common import pad_util
 from pad.common.monster_id_mapping import server_monster_id_fn
@@ -68,14 +68,13 @@ def _clean_cards(server: Server,
     return merged_cards
 
 
-def _clean_enemy(cards: List[Card], enemy_skills: List[ESBehavior]) -> List[MergedEnemy]:
-    enemy_skill_map = {s.enemy_skill_id: s for s in enemy_skills}
+def _clean_enemy(cards: List[Card], db) -> List[MergedEnemy]:
     merged_enemies = []
     for c in cards:
         if not c.enemy_skill_refs:
             continue
 
-        merged_skills = [ESInstance(enemy_skill_map[ref.enemy_skill_id], ref, c) for ref in c.enemy_skill_refs if
+        merged_skills = [ESInstance(db.enemy_skill_by_id(ref.enemy_skill_id), ref, c) for ref in c.enemy_skill_refs if
                          ref]
         merged_enemies.append(MergedEnemy(c.monster_no, c.enemy(), merged_skills))
     return merged_enemies
@@ -99,24 +98,30 @@ class Database(object):
         # Computed from other entries
         self.bonuses = []  # type: List[MergedBonus]
         self.cards = []  # type: List[MergedCard]
-        self.leader_skills = []  # type: List[LeaderSkill]
-        self.active_skills = []  # type: List[ActiveSkill]
-        self.enemy_skills = []  # type: List[ESBehavior]
         self.enemies = []  # type: List[MergedEnemy]
 
+        # Skills are parsed lazily, on first lookup
+        self.skill_parser = SkillParser()
+        self.es_parser = BehaviorParser()
+
         # Faster lookups
-        self.skill_id_to_skill = {}  # type: Dict[SkillId, MonsterSkill]
-        self.skill_id_to_leader_skill = {}  # type: Dict[SkillId, LeaderSkill]
-        self.skill_id_to_active_skill = {}  # type: Dict[SkillId, ActiveSkill]
-        self.es_id_to_enemy_skill = {}  # type: Dict[int, ESBehavior]
         self.dungeon_id_to_dungeon = {}  # type: Dict[DungeonId, Dungeon]
         self.monster_no_to_card = {}  # type: Dict[MonsterNo, MergedCard]
         self.monster_id_to_card = {}  # type: Dict[MonsterId, MergedCard]
         self.enemy_id_to_enemy = {}
 
-    def load_database(self, skip_skills=False, skip_bonus=False, skip_extra=False):
+    def load_database(self, skip_skills=False, skip_bonus=False, skip_extra=False,
+                      skip_cards=False, skip_enemy_skills=False,
+                      monster_ids: Optional[Collection[MonsterId]] = None):
+        """Loads and merges the raw data; the skip flags let lightweight tools avoid sections they don't use.
+
+        If monster_ids is set, only those cards (and their enemy data) are merged, so only their skills get parsed.
+        """
         base_dir = self.base_dir
-        raw_cards = card.load_card_data(data_dir=base_dir)
+        id_mapper = server_monster_id_fn(self.server)
+        raw_cards = [] if skip_cards else card.load_card_data(data_dir=base_dir)
+        if monster_ids is not None:
+            raw_cards = [c for c in raw_cards if id_mapper(c.monster_no) in monster_ids]
         self.dungeons = dungeon.load_dungeon_data(data_dir=base_dir)
 
         if not skip_bonus:
@@ -124,18 +129,11 @@ class Database(object):
 
         if not skip_skills:
             self.skills = skill.load_skill_data(data_dir=base_dir)
-            parser = SkillParser()
-            parser.parse(self.skills)
-            self.leader_skills = parser.leader_skills
-            self.active_skills = parser.active_skills
-            self.skill_id_to_leader_skill = {s.skill_id: s for s in self.leader_skills}
-            self.skill_id_to_active_skill = {s.skill_id: s for s in self.active_skills}
-
-        self.raw_enemy_skills = enemy_skill.load_enemy_skill_data(data_dir=base_dir)
-        es_parser = BehaviorParser()
-        es_parser.parse(self.raw_enemy_skills)
-        self.enemy_skills = es_parser.enemy_behaviors
-        self.es_id_to_enemy_skill = {es.enemy_skill_id: es for es in self.enemy_skills}
+            self.skill_parser.parse(self.skills)
+
+        if not skip_enemy_skills:
+            self.raw_enemy_skills = enemy_skill.load_enemy_skill_data(data_dir=base_dir)
+            self.es_parser.parse(self.raw_enemy_skills)
 
         if not skip_extra:
             self.exchange = exchange.load_data(data_dir=base_dir, server=self.server)
@@ -143,13 +141,12 @@ class Database(object):
             self.egg_machines = extra_egg_machine.load_data(data_dir=base_dir, server=self.server)
 
         self.bonuses = _clean_bonuses(self.server, self.raw_bonuses, self.dungeons)
-        self.enemies = _clean_enemy(raw_cards, self.enemy_skills)
+        if not skip_enemy_skills:
+            self.enemies = _clean_enemy(raw_cards, self)
         self.cards = _clean_cards(self.server, raw_cards, self.enemies, self)
 
         self.dungeon_id_to_dungeon = {d.dungeon_id: d for d in self.dungeons}
         self.monster_no_to_card = {c.monster_no: c for c in self.cards}
-
-        id_mapper = server_monster_id_fn(self.server)
         self.monster_id_to_card = {id_mapper(c.monster_no): c for c in self.cards}
 
         self.enemy_id_to_enemy = {e.enemy_id: e for e in self.enemies}
@@ -171,14 +168,26 @@ class Database(object):
         self.save(output_dir, 'purchase', self.purchase, pretty)
         self.save(output_dir, 'enemies', self.enemies, pretty)
 
+    @property
+    def leader_skills(self) -> List[LeaderSkill]:
+        return self.skill_parser.leader_skills
+
+    @property
+    def active_skills(self) -> List[ActiveSkill]:
+        return self.skill_parser.active_skills
+
+    @property
+    def enemy_skills(self) -> List[ESBehavior]:
+        return self.es_parser.enemy_behaviors
+
     def leader_skill_by_id(self, skill_id: SkillId) -> LeaderSkill:
-        return self.skill_id_to_leader_skill.get(skill_id, None)
+        return self.skill_parser.leader(skill_id)
 
     def active_skill_by_id(self, skill_id: SkillId) -> ActiveSkill:
-        return self.skill_id_to_active_skill.get(skill_id, None)
+        return self.skill_parser.active(skill_id)
 
-    def enemy_skill_by_id(self, es_id: int) -> ESInstance:
-        return self.es_id_to_enemy_skill.get(es_id, None)
+    def enemy_skill_by_id(self, es_id: int) -> ESBehavior:
+        return self.es_parser.behavior(es_id)
 
     def dungeon_by_id(self, dungeon_id: DungeonId) -> Dungeon:
         return self.dungeon_id_to_dungeon.get(dungeon_id, None)
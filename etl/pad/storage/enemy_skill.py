@@ -1,8 +1,6 @@
 from dadguide_proto.enemy_skills_pb2 import MonsterBehavior
-from pad.raw.skills.emoji_en.enemy_skill_text import EnEmojiESTextConverter
-from pad.raw.skills.en.enemy_skill_text import EnESTextConverter
-from pad.raw.skills.ja.enemy_skill_text import JaESTextConverter
-from pad.raw.skills.ko.enemy_skill_text import KoESTextConverter
+from pad.raw.skills.skill_text_cache import skill_text_cache, JA_ES_CONVERTER, EN_ES_CONVERTER, KO_ES_CONVERTER, \
+    EN_EMOJI_ES_CONVERTER
 from pad.raw_processor.crossed_data import CrossServerESInstance
 from pad.storage_processor.shared_storage import ServerDependentSqlItem
 
@@ -35,10 +33,13 @@ class EnemySkill(ServerDependentSqlItem):
         max_hits = exemplar.attack.max_hits if has_attack else 0
         atk_mult = exemplar.attack.atk_multiplier if has_attack else 0
 
-        desc_ja = exemplar.full_description(JaESTextConverter())
-        desc_en = exemplar.full_description(EnESTextConverter())
-        desc_ko = exemplar.full_description(KoESTextConverter())
-        desc_en_emoji = exemplar.full_description(EnEmojiESTextConverter())
+        def full_description(converter):
+            return skill_text_cache.enemy_text('full_description', o.enemy_skill_id, exemplar, converter)
+
+        desc_ja = full_description(JA_ES_CONVERTER)
+        desc_en = full_description(EN_ES_CONVERTER)
+        desc_ko = full_description(KO_ES_CONVERTER)
+        desc_en_emoji = full_description(EN_EMOJI_ES_CONVERTER)
 
         return EnemySkill(
             enemy_skill_id=o.enemy_skill_id,
@@ -6,11 +6,8 @@ from pad.db.sql_item import ExistsStrategy
 from pad.raw.skills import skill_text_typing
 from pad.raw.skills.active_behaviors import behavior_to_json
 from pad.raw.skills.active_skill_info import ActiveSkill as ASSkill
-from pad.raw.skills.en.active_skill_text import EnASTextConverter
-from pad.raw.skills.en.leader_skill_text import EnLSTextConverter
-from pad.raw.skills.ja.active_skill_text import JaASTextConverter
-from pad.raw.skills.ja.leader_skill_text import JaLSTextConverter
-from pad.raw.skills.ko.active_skill_text import KoASTextConverter
+from pad.raw.skills.skill_text_cache import skill_text_cache, JA_AS_CONVERTER, EN_AS_CONVERTER, KO_AS_CONVERTER, \
+    JA_LS_CONVERTER, EN_LS_CONVERTER
 from pad.raw_processor.crossed_data import CrossServerSkill
 from pad.storage_processor.shared_storage import ServerDependentSqlItem
 
@@ -27,12 +24,12 @@ class ActiveSkill(ServerDependentSqlItem):
         kr_skill = css.kr_skill
         cur_skill = css.cur_skill
 
-        desc_ja = cur_skill.full_text(JaASTextConverter())
-        desc_en = cur_skill.full_text(EnASTextConverter())
-        desc_ko = cur_skill.full_text(KoASTextConverter())
-        desc_templated_ja = cur_skill.templated_text(JaASTextConverter())
-        desc_templated_en = cur_skill.templated_text(EnASTextConverter())
-        desc_templated_ko = cur_skill.templated_text(KoASTextConverter())
+        desc_ja = skill_text_cache.full_text(cur_skill, JA_AS_CONVERTER)
+        desc_en = skill_text_cache.full_text(cur_skill, EN_AS_CONVERTER)
+        desc_ko = skill_text_cache.full_text(cur_skill, KO_AS_CONVERTER)
+        desc_templated_ja = skill_text_cache.templated_text(cur_skill, JA_AS_CONVERTER)
+        desc_templated_en = skill_text_cache.templated_text(cur_skill, EN_AS_CONVERTER)
+        desc_templated_ko = skill_text_cache.templated_text(cur_skill, KO_AS_CONVERTER)
 
         skill_type_tags = skill_text_typing.parse_as_conditions(css)
         tags = skill_text_typing.format_conditions(skill_type_tags)
@@ -108,12 +105,12 @@ class ActiveSubskill(ServerDependentSqlItem):
 
     @staticmethod
     def from_as(act: ASSkill) -> 'ActiveSubskill':
-        desc_ja = act.full_text(JaASTextConverter())
-        desc_en = act.full_text(EnASTextConverter())
-        desc_ko = act.full_text(KoASTextConverter())
-        desc_templated_ja = act.templated_text(JaASTextConverter())
-        desc_templated_en = act.templated_text(EnASTextConverter())
-        desc_templated_ko = act.templated_text(KoASTextConverter())
+        desc_ja = skill_text_cache.full_text(act, JA_AS_CONVERTER)
+        desc_en = skill_text_cache.full_text(act, EN_AS_CONVERTER)
+        desc_ko = skill_text_cache.full_text(act, KO_AS_CONVERTER)
+        desc_templated_ja = skill_text_cache.templated_text(act, JA_AS_CONVERTER)
+        desc_templated_en = skill_text_cache.templated_text(act, EN_AS_CONVERTER)
+        desc_templated_ko = skill_text_cache.templated_text(act, KO_AS_CONVERTER)
 
         skill_type_tags = skill_text_typing.parse_as_conditions(act, True)
         tags = skill_text_typing.format_conditions(skill_type_tags)
@@ -184,12 +181,12 @@ class ActivePart(ServerDependentSqlItem):
 
     @staticmethod
     def from_as(act: ASSkill) -> 'ActivePart':
-        desc_ja = act.full_text(JaASTextConverter())
-        desc_en = act.full_text(EnASTextConverter())
-        desc_ko = act.full_text(KoASTextConverter())
-        desc_templated_ja = act.templated_text(JaASTextConverter())
-        desc_templated_en = act.templated_text(EnASTextConverter())
-        desc_templated_ko = act.templated_text(KoASTextConverter())
+        desc_ja = skill_text_cache.full_text(act, JA_AS_CONVERTER)
+        desc_en = skill_text_cache.full_text(act, EN_AS_CONVERTER)
+        desc_ko = skill_text_cache.full_text(act, KO_AS_CONVERTER)
+        desc_templated_ja = skill_text_cache.templated_text(act, JA_AS_CONVERTER)
+        desc_templated_en = skill_text_cache.templated_text(act, EN_AS_CONVERTER)
+        desc_templated_ko = skill_text_cache.templated_text(act, KO_AS_CONVERTER)
 
         skill_type_tags = skill_text_typing.parse_as_conditions(act, True)
         tags = skill_text_typing.format_conditions(skill_type_tags)
@@ -348,10 +345,8 @@ class LeaderSkill(ServerDependentSqlItem):
         kr_skill = css.kr_skill
         cur_skill = css.cur_skill
 
-        jp_ls_converter = JaLSTextConverter()
-        en_ls_converter = EnLSTextConverter()
-        desc_ja = cur_skill.full_text(jp_ls_converter) or jp_skill.raw_description
-        desc_en = cur_skill.full_text(en_ls_converter) or na_skill.raw_description
+        desc_ja = skill_text_cache.full_text(cur_skill, JA_LS_CONVERTER) or jp_skill.raw_description
+        desc_en = skill_text_cache.full_text(cur_skill, EN_LS_CONVERTER) or na_skill.raw_description
         skill_type_tags = skill_text_typing.parse_ls_conditions(css)
         tags = skill_text_typing.format_conditions(skill_type_tags)
 
@@ -7,6 +7,7 @@ import logging
 from pad.common.shared_types import Server
 from pad.db.db_util import DbWrapper
 from pad.db.sql_item import SimpleSqlItem
+from pad.storage_processor.processor_state import sync_static_items
 
 logger = logging.getLogger('processor')
 
@@ -144,9 +145,19 @@ DIMENSION_OBJECTS = [
 
 
 class DimensionProcessor(object):
+    INPUT_TABLES = []
+    OUTPUT_TABLES = [
+        'd_attributes',
+        'd_types',
+        'd_servers',
+        'd_event_types',
+        'd_egg_machine_types',
+        'd_compound_skill_types',
+        'd_fixed_slot_type',
+    ]
+
     def __init__(self):
         pass
 
     def process(self, db: DbWrapper):
-        for item in DIMENSION_OBJECTS:
-            db.insert_or_update(item)
+        sync_static_items(db, type(self).__name__, DIMENSION_OBJECTS)
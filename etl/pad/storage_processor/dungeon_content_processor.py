@@ -1,26 +1,71 @@
 import logging
-from typing import Optional
+import multiprocessing
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from pad.common.dungeon_types import RawDungeonType
 from pad.common.icons import SpecialIcons
 from pad.common.shared_types import Server
+from pad.common.substring_matcher import SubstringMatcher
 from pad.db.db_util import DbWrapper
 from pad.dungeon.wave_converter import WaveConverter, ResultFloor
 from pad.raw.bonus import BonusType
 from pad.raw_processor import crossed_data
 from pad.raw_processor.crossed_data import CrossServerSubDungeon, CrossServerDungeon
 from pad.storage.dungeon import SubDungeonWaveData, DungeonWaveData, SubDungeonRewardData, DungeonRewardData
-from pad.storage.encounter import Encounter, Drop
+from pad.storage.encounter import Encounter
 from pad.storage.wave import WaveItem
+from pad.storage_processor.dungeon_wave_state import DungeonWaveState
+from pad.storage_processor.encounter_reconciler import EncounterReconciler
+from pad.storage_processor.processor_checkpoint import ProcessorCheckpoint
 
 logger = logging.getLogger('processor')
 human_fix_logger = logging.getLogger('human_fix')
 
 
+class ComputedFloor(object):
+    """Everything computed from one floor's wave data, ready to be written."""
+
+    def __init__(self,
+                 sub_dungeon_id: int,
+                 wave_data: SubDungeonWaveData,
+                 stages: List[Tuple[int, List[Tuple[Encounter, List[int]]]]]):
+        self.sub_dungeon_id = sub_dungeon_id
+        self.wave_data = wave_data
+        # (stage index, [(encounter, monster ids it drops)]) for each stage, in order.
+        self.stages = stages
+
+
+# Only set inside worker processes, by _init_worker.
+_worker_processor = None  # type: Optional[DungeonContentProcessor]
+
+
+def _init_worker(data: crossed_data.CrossServerDatabase):
+    global _worker_processor
+    _worker_processor = DungeonContentProcessor(data)
+
+
+def _compute_dungeon_in_worker(dungeon_id: int, waves_by_floor: Dict[int, List[WaveItem]]) -> List[ComputedFloor]:
+    return _worker_processor._compute_dungeon(dungeon_id, waves_by_floor)
+
+
 class DungeonContentProcessor(object):
-    def __init__(self, data: crossed_data.CrossServerDatabase):
+    INPUT_TABLES = ['wave_data', 'monsters', 'dungeons', 'sub_dungeons']
+    OUTPUT_TABLES = ['dungeons', 'sub_dungeons', 'encounters', 'drops', 'dungeon_wave_state']
+
+    def __init__(self,
+                 data: crossed_data.CrossServerDatabase,
+                 checkpoint: Optional[ProcessorCheckpoint] = None,
+                 processes: int = 1,
+                 force: bool = False):
         self.data = data
         self.converter = WaveConverter(data)
+        self.checkpoint = checkpoint
+        # Worker processes for computing encounters.
+        self.processes = processes
+        # Reprocess every dungeon, even those whose wave fingerprint is unchanged.
+        self.force = force
 
     def process(self, db: DbWrapper):
         logger.info('loading dungeon contents')
@@ -31,34 +76,108 @@ class DungeonContentProcessor(object):
         logger.info('done loading contents')
 
     def _process_dungeon_contents(self, db: DbWrapper):
-        for dungeon in self.data.dungeons:
+        # Dungeons are processed in id order, so a checkpoint only needs the last completed id.
+        resume_after = self.checkpoint.progress(type(self).__name__) if self.checkpoint else None
+        if resume_after is not None:
+            logger.info('resuming dungeon contents after dungeon:%s', resume_after)
+
+        wave_state = DungeonWaveState(self.data).load(db)
+        dungeons = [d for d in self.data.dungeons if resume_after is None or d.dungeon_id > resume_after]
+        if not self.force:
+            dungeons = [d for d in dungeons if wave_state.changed(d.dungeon_id)]
+            logger.info('%d dungeons have new wave data or changed cards', len(dungeons))
+
+        for dungeon, floors in self._computed_dungeons(db, dungeons):
             if dungeon.dungeon_id % 250 == 0:
                 logger.info('scanning dungeon:%s', dungeon.dungeon_id)
-            sub_dungeon_items = []
-
-            for sub_dungeon in dungeon.sub_dungeons:
-                result_floor = self._compute_result_floor(db, dungeon, sub_dungeon)
-                if result_floor:
-                    item = SubDungeonWaveData.from_waveresult(result_floor, sub_dungeon)
-                    db.insert_or_update(item)
-                    sub_dungeon_items.append(item)
-
-                    self._maybe_insert_encounters(db, dungeon, sub_dungeon, result_floor)
+            if floors:
+                self._write_dungeon(db, dungeon, floors, wave_state)
+            else:
+                wave_state.mark_processed(db, dungeon.dungeon_id)
+
+            if self.checkpoint:
+                self.checkpoint.mark_progress(type(self).__name__, dungeon.dungeon_id)
+
+    def _computed_dungeons(self,
+                           db: DbWrapper,
+                           dungeons: List[CrossServerDungeon]
+                           ) -> Iterator[Tuple[CrossServerDungeon, List[ComputedFloor]]]:
+        """Yields each dungeon with its computed floors, in order.
+
+        Wave data is always loaded here, on the writer's connection. With multiple processes the
+        computation runs in workers that each get a copy of self.data when they start; only a
+        bounded number of dungeons are in flight, so the wave data for all of them is never held
+        at once.
+
+        Workers are spawned rather than forked: this runs on a scheduler thread while other
+        processors may be running, and forking a process with live threads can leave the child
+        holding locks that are never released.
+        """
+        if self.processes <= 1:
+            for dungeon in dungeons:
+                yield dungeon, self._compute_dungeon(dungeon.dungeon_id, self._load_waves(db, dungeon))
+            return
 
-            if sub_dungeon_items:
-                max_sub_dungeon = max(sub_dungeon_items, key=lambda x: x.sub_dungeon_id)
-                item = DungeonWaveData(dungeon_id=dungeon.dungeon_id, icon_id=max_sub_dungeon.icon_id)
-                db.insert_or_update(item)
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.processes,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(self.data,)) as pool:
+            for dungeon in dungeons:
+                in_flight.append((dungeon, pool.submit(_compute_dungeon_in_worker,
+                                                       dungeon.dungeon_id, self._load_waves(db, dungeon))))
+                if len(in_flight) >= self.processes * 4:
+                    dungeon, future = in_flight.popleft()
+                    yield dungeon, future.result()
+            while in_flight:
+                dungeon, future = in_flight.popleft()
+                yield dungeon, future.result()
+
+    def _load_waves(self, db: DbWrapper, dungeon: CrossServerDungeon) -> Dict[int, List[WaveItem]]:
+        """Loads the dungeon's wave data, keyed by floor id."""
+        sql = 'SELECT * FROM wave_data WHERE dungeon_id={}'.format(dungeon.dungeon_id)
+        waves_by_floor = defaultdict(list)
+        for wave_item in db.custom_load_multiple_objects(WaveItem, sql):
+            waves_by_floor[wave_item.floor_id].append(wave_item)
+        return waves_by_floor
+
+    def _compute_dungeon(self, dungeon_id: int, waves_by_floor: Dict[int, List[WaveItem]]) -> List[ComputedFloor]:
+        """Converts the dungeon's wave data into encounters; pure CPU, so it can run in a worker."""
+        dungeon = self.data.dungeon_by_id(dungeon_id)
+        floors = []
+        for sub_dungeon in dungeon.sub_dungeons:
+            result_floor = self._compute_result_floor(dungeon, waves_by_floor.get(sub_dungeon.sub_dungeon_id % 1000))
+            if result_floor:
+                floors.append(ComputedFloor(sub_dungeon.sub_dungeon_id,
+                                            SubDungeonWaveData.from_waveresult(result_floor, sub_dungeon),
+                                            self._compute_stages(dungeon, sub_dungeon, result_floor)))
+        return floors
+
+    def _write_dungeon(self,
+                       db: DbWrapper,
+                       dungeon: CrossServerDungeon,
+                       floors: List[ComputedFloor],
+                       wave_state: DungeonWaveState):
+        reconciler = EncounterReconciler(dungeon.dungeon_id).load(db)
+        sub_dungeons = {sd.sub_dungeon_id: sd for sd in dungeon.sub_dungeons}
+        for floor in floors:
+            self._maybe_insert_encounters(reconciler, dungeon, sub_dungeons[floor.sub_dungeon_id], floor)
+
+        with db.transaction():
+            for floor in floors:
+                db.insert_or_update(floor.wave_data)
+            max_sub_dungeon = max((f.wave_data for f in floors), key=lambda x: x.sub_dungeon_id)
+            item = DungeonWaveData(dungeon_id=dungeon.dungeon_id, icon_id=max_sub_dungeon.icon_id)
+            db.insert_or_update(item)
+            inserted, updated, deleted = reconciler.write(db)
+            # Stored with the rows it describes, so a failed dungeon is retried next run.
+            wave_state.mark_processed(db, dungeon.dungeon_id)
+        logger.debug('dungeon:%s encounters: %d inserted, %d updated, %d deleted',
+                     dungeon.dungeon_id, inserted, updated, deleted)
 
     def _compute_result_floor(self,
-                              db: DbWrapper,
                               dungeon: CrossServerDungeon,
-                              sub_dungeon: CrossServerSubDungeon) -> Optional[ResultFloor]:
-        floor_id = sub_dungeon.sub_dungeon_id % 1000
-        sql = 'SELECT * FROM wave_data WHERE dungeon_id={} and floor_id={}'.format(
-            dungeon.dungeon_id, floor_id)
-        wave_items = db.custom_load_multiple_objects(WaveItem, sql)
-
+                              wave_items: Optional[List[WaveItem]]) -> Optional[ResultFloor]:
         if not wave_items:
             return None
 
@@ -68,18 +187,18 @@ class DungeonContentProcessor(object):
 
         return self.converter.convert(wave_items, try_common_monsters)
 
-    def _maybe_insert_encounters(self,
-                                 db: DbWrapper,
-                                 dungeon: CrossServerDungeon,
-                                 sub_dungeon: CrossServerSubDungeon,
-                                 result_floor: ResultFloor):
+    def _compute_stages(self,
+                        dungeon: CrossServerDungeon,
+                        sub_dungeon: CrossServerSubDungeon,
+                        result_floor: ResultFloor) -> List[Tuple[int, List[Tuple[Encounter, List[int]]]]]:
+        """Builds an encounter, plus the monster ids it drops, for every slot in every stage."""
+        stages = []
         for stage in result_floor.stages:
-            seen_enemies = set()
+            encounters = []
             for slot in stage.slots:
                 csc = self.data.card_by_monster_id(slot.monster_id)
                 card = csc.cur_card.card
                 enemy = card.enemy()
-                seen_enemies.add(slot.monster_id)
 
                 turns = card.enemy_turns
                 if dungeon.cur_dungeon.full_dungeon_type == RawDungeonType.TECHNICAL and card.enemy_turns_alt:
@@ -106,53 +225,33 @@ class DungeonContentProcessor(object):
                     atk=atk,
                     defense=defense,
                     exp=exp)
+                encounters.append((encounter, [drop_card.monster_id for drop_card in slot.drops]))
+            stages.append((stage.stage_idx, encounters))
+        return stages
 
-                sql = '''
-                    SELECT encounter_id 
-                    FROM encounters 
-                    WHERE dungeon_id={} 
-                    AND sub_dungeon_id={}
-                    AND stage={}
-                    AND enemy_id={}
-                    AND level={}
-                '''.format(dungeon.dungeon_id, sub_dungeon.sub_dungeon_id, stage.stage_idx,
-                           slot.monster_id, slot.monster_level)
-                stored_encounter_id = db.get_single_value(sql, int, fail_on_empty=False)
-
-                if stored_encounter_id:
-                    encounter.encounter_id = stored_encounter_id
-
-                db.insert_or_update(encounter)
-
-                drops = Drop.from_slot(slot, encounter)
-                for drop in drops:
-                    db.insert_or_update(drop)
+    def _maybe_insert_encounters(self,
+                                 reconciler: EncounterReconciler,
+                                 dungeon: CrossServerDungeon,
+                                 sub_dungeon: CrossServerSubDungeon,
+                                 floor: ComputedFloor):
+        for stage_idx, encounters in floor.stages:
+            seen_enemies = set()
+            for encounter, drop_monster_ids in encounters:
+                seen_enemies.add(encounter.enemy_id)
+                reconciler.add(encounter, drop_monster_ids)
 
             if seen_enemies:
-                sql = '''
-                    SELECT encounter_id, enemy_id
-                    FROM encounters
-                    WHERE dungeon_id={}
-                    AND sub_dungeon_id={}
-                    AND stage={}
-                    AND enemy_id not in ({})
-                    '''.format(dungeon.dungeon_id, sub_dungeon.sub_dungeon_id, stage.stage_idx,
-                               ','.join(map(str, seen_enemies)))
-                self._print_bad_enemies('in-stage', dungeon, sub_dungeon, db, sql)
+                bad_encounters = reconciler.stale_in_stage(sub_dungeon.sub_dungeon_id, stage_idx, seen_enemies)
+                self._print_bad_enemies('in-stage', dungeon, sub_dungeon, reconciler, bad_encounters)
 
         # In case there are missing stages (e.g. no more invades/commons)
-        seen_stage_indexes = [stage.stage_idx for stage in result_floor.stages]
-        sql = '''
-            SELECT encounter_id, enemy_id
-            FROM encounters
-            WHERE dungeon_id={}
-            AND sub_dungeon_id={}
-            AND stage not in ({})
-            '''.format(dungeon.dungeon_id, sub_dungeon.sub_dungeon_id, ','.join(map(str, seen_stage_indexes)))
-        self._print_bad_enemies('out-stage', dungeon, sub_dungeon, db, sql)
-
-    def _print_bad_enemies(self, desc: str, dungeon, sub_dungeon, db: DbWrapper, sql: str):
-        bad_stored_encounters = db.fetch_data(sql)
+        seen_stage_indexes = {stage_idx for stage_idx, _ in floor.stages}
+        if seen_stage_indexes:
+            bad_encounters = reconciler.stale_stages(sub_dungeon.sub_dungeon_id, seen_stage_indexes)
+            self._print_bad_enemies('out-stage', dungeon, sub_dungeon, reconciler, bad_encounters)
+
+    def _print_bad_enemies(self, desc: str, dungeon, sub_dungeon, reconciler: EncounterReconciler,
+                           bad_stored_encounters):
         if not bad_stored_encounters:
             return
 
@@ -170,9 +269,8 @@ class DungeonContentProcessor(object):
                                  delete_drops_sql,
                                  delete_encounters_sql)
 
-        deleted_drops = db.update_item(delete_drops_sql)
-        deleted_encounters = db.update_item(delete_encounters_sql)
-        human_fix_logger.warning('Auto deleted {} drops and {} encounters'.format(deleted_drops, deleted_encounters))
+        reconciler.delete(bad_stored_encounters)
+        human_fix_logger.warning('Auto deleting {} encounters and their drops'.format(len(bad_stored_encounters)))
 
     def _process_dungeon_rewards(self, db):
         def is_floor_bonus(x):
@@ -188,6 +286,7 @@ class DungeonContentProcessor(object):
         monster_name_to_id.update({x.na_card.card.name: x for x in self.data.ownable_cards})
         monster_name_to_id.update({x.kr_card.card.name: x for x in self.data.ownable_cards})
         monster_name_to_id = {x.lower(): y for x, y in monster_name_to_id.items()}
+        monster_name_matcher = SubstringMatcher(monster_name_to_id.keys())
 
         for merged_bonus in floor_bonuses:
             raw_text = merged_bonus.bonus.clean_message
@@ -208,12 +307,8 @@ class DungeonContentProcessor(object):
             elif 'magic stone' in text:
                 reward_value = SpecialIcons.MagicStone.value
             else:
-                matched_monsters = set()
-                for m_name in monster_name_to_id.keys():
-                    if m_name in text:
-                        matched_monsters.add(m_name)
-                if matched_monsters:
-                    best_match = max(matched_monsters, key=len)
+                best_match = monster_name_matcher.longest_match(text)
+                if best_match is not None:
                     reward_value = monster_name_to_id[best_match].monster_id
 
             if merged_bonus.bonus.sub_dungeon_id:
@@ -15,6 +15,12 @@ AND visible = false
 
 
 class DungeonProcessor(object):
+    INPUT_TABLES = ['d_fixed_slot_type', 'alt_monsters']
+    OUTPUT_TABLES = ['dungeons', 'sub_dungeons', 'fixed_teams', 'fixed_team_monsters']
+    # post_encounter_process runs as a separate step once encounters are loaded.
+    POST_ENCOUNTER_INPUT_TABLES = ['encounters']
+    POST_ENCOUNTER_OUTPUT_TABLES = ['dungeons']
+
     def __init__(self, data: crossed_data.CrossServerDatabase):
         self.data = data
 
@@ -29,13 +35,20 @@ class DungeonProcessor(object):
         logger.info('Updated visibility of %s dungeons', updated_rows)
 
     def _process_dungeons(self, db: DbWrapper):
+        dungeons, sub_dungeons, fixed_teams, fixed_team_monsters = [], [], [], []
         for dungeon in self.data.dungeons:
-            db.insert_or_update(Dungeon.from_csd(dungeon))
+            dungeons.append(Dungeon.from_csd(dungeon))
             for subdungeon in dungeon.sub_dungeons:
-                db.insert_or_update(SubDungeon.from_cssd(subdungeon, dungeon.dungeon_id))
+                sub_dungeons.append(SubDungeon.from_cssd(subdungeon, dungeon.dungeon_id))
                 if not subdungeon.cur_sub_dungeon.fixed_monsters:
                     continue
-                db.insert_or_update(FixedTeam.from_cssd(subdungeon))
+                fixed_teams.append(FixedTeam.from_cssd(subdungeon))
                 for fcid in range(6):
                     fixed = subdungeon.cur_sub_dungeon.fixed_monsters.get(fcid)
-                    db.insert_or_update(FixedTeamMonster.from_fc(fixed, fcid, subdungeon))
+                    fixed_team_monsters.append(FixedTeamMonster.from_fc(fixed, fcid, subdungeon))
+
+        # Parents before children, so that rows never refer to a missing dungeon or team.
+        touched = 0
+        for items in (dungeons, sub_dungeons, fixed_teams, fixed_team_monsters):
+            touched += db.upsert_changed(items)
+        logger.info('wrote %d changed dungeon rows', touched)
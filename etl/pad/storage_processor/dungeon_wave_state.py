@@ -0,0 +1,114 @@
+"""
+Per-dungeon fingerprints of everything the DungeonContentProcessor derives encounters from.
+
+A fingerprint is the dungeon's wave row count and max pull_id, plus a hash of the dungeon and
+card data the conversion reads (enemy stats, turns, skill refs, sell mp of drops). The
+dungeon_wave_state table holds the fingerprint each dungeon had when it was last processed;
+a dungeon whose fingerprint still matches would produce the same rows again, so it is skipped.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+from pad.db.db_util import DbWrapper
+from pad.raw_processor.crossed_data import CrossServerDatabase
+
+logger = logging.getLogger('processor')
+
+# Bump this when the wave conversion changes, so every dungeon is reprocessed once.
+CONVERSION_VERSION = 1
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS `dungeon_wave_state` (
+  `dungeon_id` int(11) NOT NULL,
+  `wave_count` int(11) NOT NULL,
+  `max_pull_id` int(11) NOT NULL,
+  `data_hash` char(40) NOT NULL,
+  `tstamp` int(11) NOT NULL,
+  PRIMARY KEY (`dungeon_id`)
+)
+"""
+
+# One pass over wave_data gives the counts and the monsters each dungeon references.
+_WAVE_STATS_SQL = """
+SELECT dungeon_id, monster_id, drop_monster_id, COUNT(*) AS wave_count, MAX(pull_id) AS max_pull_id
+FROM wave_data
+GROUP BY dungeon_id, monster_id, drop_monster_id
+"""
+
+# Card fields that the wave conversion and encounter stats are computed from.
+_CARD_FIELDS = ['enemy_turns', 'enemy_turns_alt', 'enemy_hp_min', 'enemy_hp_max', 'enemy_hp_scale',
+                'enemy_atk_min', 'enemy_atk_max', 'enemy_atk_scale', 'enemy_def_min', 'enemy_def_max',
+                'enemy_def_scale', 'enemy_max_level', 'enemy_coins_per_level', 'enemy_xp_per_level', 'sell_mp']
+
+Fingerprint = Tuple[int, int, str]
+
+
+class DungeonWaveState(object):
+    def __init__(self, data: CrossServerDatabase):
+        self.data = data
+        self.current = {}  # type: Dict[int, Fingerprint]
+        self.stored = {}  # type: Dict[int, Fingerprint]
+        self._card_signatures = {}  # type: Dict[int, list]
+
+    def load(self, db: DbWrapper):
+        wave_counts = defaultdict(int)
+        max_pull_ids = defaultdict(int)
+        monster_ids = defaultdict(set)
+        for row in db.fetch_data(_WAVE_STATS_SQL):
+            dungeon_id = row['dungeon_id']
+            wave_counts[dungeon_id] += row['wave_count']
+            max_pull_ids[dungeon_id] = max(max_pull_ids[dungeon_id], row['max_pull_id'] or 0)
+            monster_ids[dungeon_id].update(m for m in (row['monster_id'], row['drop_monster_id']) if m)
+
+        for dungeon_id, wave_count in wave_counts.items():
+            self.current[dungeon_id] = (int(wave_count), int(max_pull_ids[dungeon_id]),
+                                        self._data_hash(dungeon_id, monster_ids[dungeon_id]))
+
+        # In a dry run the table may not exist yet, and nothing is stored anyway.
+        if not db.dry_run:
+            db.update_item(_CREATE_TABLE_SQL)
+            for row in db.fetch_data('SELECT dungeon_id, wave_count, max_pull_id, data_hash FROM dungeon_wave_state'):
+                self.stored[row['dungeon_id']] = (row['wave_count'], row['max_pull_id'], row['data_hash'])
+        return self
+
+    def changed(self, dungeon_id: int) -> bool:
+        """True if the dungeon has wave data that was not processed with the current cards."""
+        fingerprint = self.current.get(dungeon_id)
+        return fingerprint is not None and fingerprint != self.stored.get(dungeon_id)
+
+    def mark_processed(self, db: DbWrapper, dungeon_id: int):
+        fingerprint = self.current.get(dungeon_id)
+        if fingerprint is None:
+            return
+        wave_count, max_pull_id, data_hash = fingerprint
+        db.update_item(
+            'REPLACE INTO dungeon_wave_state (dungeon_id, wave_count, max_pull_id, data_hash, tstamp)'
+            " VALUES ({}, {}, {}, '{}', {})".format(dungeon_id, wave_count, max_pull_id, data_hash, int(time.time())))
+        self.stored[dungeon_id] = fingerprint
+
+    def _data_hash(self, dungeon_id: int, monster_ids: Set[int]) -> str:
+        content = [CONVERSION_VERSION]
+        dungeon = self.data.dungeon_by_id(dungeon_id)
+        if dungeon:
+            content.append(dungeon.cur_dungeon.full_dungeon_type.value)
+            for sub_dungeon in dungeon.sub_dungeons:
+                sd = sub_dungeon.cur_sub_dungeon
+                content.append([sub_dungeon.sub_dungeon_id, sd.hp_mult, sd.atk_mult, sd.def_mult])
+        for monster_id in sorted(monster_ids):
+            content.append([monster_id, self._card_signature(monster_id)])
+        return hashlib.sha1(json.dumps(content).encode('utf-8')).hexdigest()
+
+    def _card_signature(self, monster_id: int) -> Optional[list]:
+        if monster_id not in self._card_signatures:
+            csc = self.data.card_by_monster_id(monster_id)
+            signature = None
+            if csc:
+                card = csc.cur_card.card
+                signature = [getattr(card, f) for f in _CARD_FIELDS]
+                signature.append([[r.enemy_skill_id, r.enemy_ai, r.enemy_rnd] for r in card.enemy_skill_refs])
+            self._card_signatures[monster_id] = signature
+        return self._card_signatures[monster_id]
@@ -3,14 +3,21 @@ import logging
 from pad.common.monster_id_mapping import server_monster_id_fn
 from pad.common.shared_types import Server
 from pad.db.db_util import DbWrapper
+from pad.db.sql_item import generate_multi_insert_sql
 from pad.raw_processor import crossed_data
 from pad.storage.egg_machine import EggMachine
 from pad.storage.egg_machines_monsters import EggMachinesMonster
 
 logger = logging.getLogger('processor')
 
+_MONSTER_COLS = ['egg_machine_id', 'monster_id', 'roll_chance']
+_BATCH_SIZE = 500
+
 
 class EggMachineProcessor(object):
+    INPUT_TABLES = ['d_servers', 'd_egg_machine_types']
+    OUTPUT_TABLES = ['egg_machines', 'egg_machines_monsters']
+
     def __init__(self, data: crossed_data.CrossServerDatabase):
         self.egg_machines = {
             Server.jp: data.jp_egg_machines,
@@ -19,19 +26,50 @@ class EggMachineProcessor(object):
         }
 
     def process(self, db: DbWrapper):
+        machines = {}
         for server, egg_machine_list in self.egg_machines.items():
             logger.debug('Process {} egg machines'.format(server.name.upper()))
             for egg_machine in egg_machine_list:
                 item = EggMachine.from_eem(egg_machine, server)
-                egg_machine_id = db.insert_or_update(item)
+                machines[_machine_lookup(item)] = (item, egg_machine, server)
+
+        # The contents column holds the sorted contents, so it doubles as the fingerprint for the
+        # monster rows; machines whose contents match the stored ones are skipped entirely.
+        stored_contents = {_machine_lookup(row): row['contents']
+                           for row in db.fetch_data('SELECT * FROM egg_machines')}
+        changed = [lookup for lookup, (item, _, _) in machines.items()
+                   if stored_contents.get(lookup) != item.contents]
+        logger.info('%d of %d egg machines have new contents', len(changed), len(machines))
+
+        with db.transaction():
+            db.upsert_changed([item for item, _, _ in machines.values()])
+            if not changed:
+                return
+            machine_ids = {_machine_lookup(row): row['egg_machine_id']
+                           for row in db.fetch_data('SELECT * FROM egg_machines')}
 
-                # process contents of the eggmachines
+            monsters = []
+            for lookup in changed:
+                item, egg_machine, server = machines[lookup]
                 id_mapper = server_monster_id_fn(server)
-                monsters = [EggMachinesMonster(
+                monsters.extend(EggMachinesMonster(
                     egg_machine_monster_id=None,
                     monster_id=id_mapper(k),
                     roll_chance=v,
-                    egg_machine_id=egg_machine_id
-                ) for k, v in egg_machine.contents.items()]
-                for emm in monsters:
-                    db.insert_or_update(emm)
+                    egg_machine_id=machine_ids.get(lookup)
+                ) for k, v in egg_machine.contents.items())
+
+            changed_ids = [machine_ids[lookup] for lookup in changed if lookup in machine_ids]
+            if changed_ids:
+                db.update_item('DELETE FROM egg_machines_monsters WHERE egg_machine_id IN ({})'.format(
+                    ', '.join(map(str, changed_ids))))
+            for i in range(0, len(monsters), _BATCH_SIZE):
+                db.insert_item(generate_multi_insert_sql(
+                    EggMachinesMonster.TABLE, _MONSTER_COLS, monsters[i:i + _BATCH_SIZE]))
+
+
+def _machine_lookup(machine) -> tuple:
+    """The (server_id, machine_row, machine_type) that identifies a machine, from an item or a row."""
+    if isinstance(machine, EggMachine):
+        machine = vars(machine)
+    return tuple(machine[c] for c in ('server_id', 'machine_row', 'machine_type'))
@@ -0,0 +1,111 @@
+"""
+Reconciles a dungeon's stored encounters and drops against freshly computed ones.
+
+The stored rows for the dungeon are loaded once, computed encounters are matched to them by
+their natural key (sub dungeon, stage, enemy, level), and only the differences are written.
+
+The natural key is not unique in the table. Every stored row is kept, so stale duplicates get
+deleted like any other stale row; only a computed encounter whose key has several stored rows
+is an error, as there is no telling which row it should update.
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from pad.db.db_util import DbWrapper
+from pad.db.sql_item import item_differs
+from pad.storage.encounter import Encounter, Drop
+
+logger = logging.getLogger('processor')
+
+EncounterKey = Tuple[int, int, int, int]
+
+
+def _encounter_key(x) -> EncounterKey:
+    if isinstance(x, Encounter):
+        x = vars(x)
+    return x['sub_dungeon_id'], x['stage'], x['enemy_id'], x['level']
+
+
+class EncounterReconciler(object):
+    def __init__(self, dungeon_id: int):
+        self.dungeon_id = dungeon_id
+        self.stored = {}  # type: Dict[EncounterKey, List[Dict[str, Any]]]
+        self.stored_drops = {}  # type: Dict[int, Set[int]]
+        # Computed encounters, and the monster ids they drop.
+        self.encounters = OrderedDict()  # type: Dict[EncounterKey, Encounter]
+        self.drops = {}  # type: Dict[EncounterKey, List[int]]
+        self.deleted_ids = []  # type: List[int]
+
+    def load(self, db: DbWrapper):
+        for row in db.fetch_data('SELECT * FROM encounters WHERE dungeon_id = {}'.format(self.dungeon_id)):
+            self.stored.setdefault(_encounter_key(row), []).append(row)
+
+        drop_rows = db.fetch_data(
+            'SELECT encounter_id, monster_id FROM drops'
+            ' WHERE encounter_id IN (SELECT encounter_id FROM encounters WHERE dungeon_id = {})'.format(
+                self.dungeon_id))
+        for row in drop_rows:
+            self.stored_drops.setdefault(row['encounter_id'], set()).add(row['monster_id'])
+        return self
+
+    def add(self, encounter: Encounter, drop_monster_ids: Iterable[int]):
+        """Adds a computed encounter; a later one with the same key replaces it, but drops accumulate."""
+        key = _encounter_key(encounter)
+        stored_rows = self.stored.get(key, [])
+        if len(stored_rows) > 1:
+            # Matching on the natural key only works if it is unique.
+            raise ValueError('got too many results:', len(stored_rows), 'encounter', key,
+                             'in dungeon', self.dungeon_id)
+        self.encounters[key] = encounter
+        drops = self.drops.setdefault(key, [])
+        drops.extend(m for m in drop_monster_ids if m not in drops)
+
+    def stale_in_stage(self, sub_dungeon_id: int, stage: int, seen_enemies: Set[int]) -> List[Dict[str, Any]]:
+        """Stored encounters in a stage for enemies that no longer appear in it."""
+        return [row for (sd_id, st, enemy_id, _), rows in self.stored.items()
+                if sd_id == sub_dungeon_id and st == stage and enemy_id not in seen_enemies for row in rows]
+
+    def stale_stages(self, sub_dungeon_id: int, seen_stages: Set[int]) -> List[Dict[str, Any]]:
+        """Stored encounters in stages of a sub dungeon that no longer appear (e.g. no more invades)."""
+        return [row for (sd_id, st, _, _), rows in self.stored.items()
+                if sd_id == sub_dungeon_id and st not in seen_stages for row in rows]
+
+    def delete(self, rows: List[Dict[str, Any]]):
+        self.deleted_ids.extend(row['encounter_id'] for row in rows)
+
+    def write(self, db: DbWrapper) -> Tuple[int, int, int]:
+        """Applies the differences; returns the number of encounters inserted, updated and deleted."""
+        deleted = 0
+        if self.deleted_ids:
+            ids = ','.join(map(str, self.deleted_ids))
+            db.update_item('DELETE FROM drops WHERE encounter_id IN ({});'.format(ids))
+            deleted = db.update_item('DELETE FROM encounters WHERE encounter_id IN ({});'.format(ids))
+
+        inserts, updates = [], []
+        for key, encounter in self.encounters.items():
+            rows = self.stored.get(key)
+            if not rows:
+                inserts.append(encounter)
+                continue
+            row = rows[0]
+            encounter.encounter_id = row['encounter_id']
+            if item_differs(encounter, row):
+                updates.append(encounter)
+        db.bulk_write(inserts, updates)
+
+        if inserts:
+            # Multi-row inserts don't report every new id, so look them up by natural key.
+            sql = 'SELECT encounter_id, sub_dungeon_id, stage, enemy_id, level FROM encounters WHERE dungeon_id = {}'
+            ids = {_encounter_key(row): row['encounter_id'] for row in db.fetch_data(sql.format(self.dungeon_id))}
+            for encounter in inserts:
+                encounter.encounter_id = ids.get(_encounter_key(encounter))
+
+        new_drops = []
+        for key, encounter in self.encounters.items():
+            stored_drops = self.stored_drops.get(encounter.encounter_id, set())
+            new_drops.extend(Drop(encounter_id=encounter.encounter_id, monster_id=m)
+                             for m in self.drops[key] if m not in stored_drops)
+        db.bulk_write(new_drops, [])
+
+        return len(inserts), len(updates), deleted
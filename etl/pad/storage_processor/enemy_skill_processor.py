@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+from typing import List
 
 from dadguide_proto import enemy_skills_pb2
 from dadguide_proto.enemy_skills_pb2 import MonsterBehavior
@@ -16,7 +17,34 @@ logger = logging.getLogger('processor')
 human_fix_logger = logging.getLogger('human_fix')
 
 
+def select_used_skills(data: crossed_data.CrossServerDatabase) -> List[crossed_data.CrossServerESInstance]:
+    """Picks one instance of each enemy skill used by a card, to load into enemy_skills."""
+    used_skills = {}
+    for csc in data.all_cards:
+        for cseb in csc.enemy_behavior:
+            # Skip fake skills (loaded via the static import) and logic
+            if cseb.enemy_skill_id <= 0 or isinstance(cseb.cur_skill.behavior, ESLogic):
+                continue
+
+            if cseb.enemy_skill_id in used_skills:
+                if cseb.unique_count() > used_skills[cseb.enemy_skill_id].unique_count():
+                    # This takes care of a rare issue where multiple monsters can use the
+                    # same skill, but en/kr lag behind jp and we take the cseb that has
+                    # jp values overwritten into the na/kr ones.
+                    #
+                    # Probably we should just stop this from being an issue by
+                    # loading all skills instead of just used skills.
+                    used_skills[cseb.enemy_skill_id] = cseb
+            else:
+                used_skills[cseb.enemy_skill_id] = cseb
+
+    return list(used_skills.values())
+
+
 class EnemySkillProcessor(object):
+    INPUT_TABLES = []
+    OUTPUT_TABLES = ['enemy_skills', 'enemy_data']
+
     def __init__(self, db: DbWrapper, data: crossed_data.CrossServerDatabase):
         self.db = db
         self.data = data
@@ -31,27 +59,9 @@ class EnemySkillProcessor(object):
             self.db.insert_or_update(item)
 
     def load_enemy_skills(self):
-        used_skills = {}
-        for csc in self.data.all_cards:
-            for cseb in csc.enemy_behavior:
-                # Skip fake skills (loaded via the static import) and logic
-                if cseb.enemy_skill_id <= 0 or isinstance(cseb.cur_skill.behavior, ESLogic):
-                    continue
-
-                if cseb.enemy_skill_id in used_skills:
-                    if cseb.unique_count() > used_skills[cseb.enemy_skill_id].unique_count():
-                        # This takes care of a rare issue where multiple monsters can use the
-                        # same skill, but en/kr lag behind jp and we take the cseb that has
-                        # jp values overwritten into the na/kr ones.
-                        #
-                        # Probably we should just stop this from being an issue by
-                        # loading all skills instead of just used skills.
-                        used_skills[cseb.enemy_skill_id] = cseb
-                else:
-                    used_skills[cseb.enemy_skill_id] = cseb
-
+        used_skills = select_used_skills(self.data)
         logger.info('loading %d enemy skills', len(used_skills))
-        for cseb in used_skills.values():
+        for cseb in used_skills:
             item = EnemySkill.from_cseb(cseb)
             self.db.insert_or_update(item)
 
@@ -10,6 +10,9 @@ logger = logging.getLogger('processor')
 
 
 class ExchangeProcessor(object):
+    INPUT_TABLES = ['d_servers', 'monsters']
+    OUTPUT_TABLES = ['exchanges']
+
     def __init__(self, data: crossed_data.CrossServerDatabase):
         self.exchange_data = {
             Server.jp: data.jp_exchange,
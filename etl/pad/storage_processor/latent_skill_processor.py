@@ -2,6 +2,7 @@ import json
 import os
 
 from pad.db.db_util import DbWrapper
+from pad.storage_processor.processor_state import sync_static_items
 from pad.raw_processor.crossed_data import CrossServerDatabase
 from pad.storage.latent_skill import LatentSkill
 
@@ -11,6 +12,9 @@ from pad.storage.monster import LatentTamadra
 
 
 class LatentSkillProcessor(object):
+    INPUT_TABLES = ['monsters']
+    OUTPUT_TABLES = ['latent_skills']
+
     def __init__(self, data: CrossServerDatabase):
         self.data = data
 
@@ -18,11 +22,8 @@ class LatentSkillProcessor(object):
             self.latent_skills = json.load(f)
 
     def process(self, db: DbWrapper):
-        for raw in self.latent_skills:
-            item = LatentSkill.from_json(raw)
-            db.insert_or_update(item)
-
-        for csm in self.data.ownable_cards:
-            if csm.cur_card.card.latent_on_feed:
-                item = LatentTamadra.from_csm(csm)
-                db.insert_or_update(item)
+        items = [LatentSkill.from_json(raw) for raw in self.latent_skills]
+        # The tamadra monster ids come from card data, but rarely change either.
+        items += [LatentTamadra.from_csm(csm) for csm in self.data.ownable_cards
+                  if csm.cur_card.card.latent_on_feed]
+        sync_static_items(db, type(self).__name__, items)
@@ -12,6 +12,21 @@ human_fix_logger = logging.getLogger('human_fix')
 
 
 class MonsterProcessor(object):
+    INPUT_TABLES = ['d_attributes', 'd_types', 'd_compound_skill_types', 'awoken_skills', 'series']
+    OUTPUT_TABLES = [
+        'active_skills',
+        'active_subskills',
+        'active_parts',
+        'active_skills_subskills',
+        'active_subskills_parts',
+        'leader_skills',
+        'monsters',
+        'alt_monsters',
+        'awakenings',
+        'evolutions',
+        'transformations',
+    ]
+
     def __init__(self, data: crossed_data.CrossServerDatabase):
         self.data = data
 
@@ -47,16 +62,17 @@ class MonsterProcessor(object):
             db.insert_or_update(AltMonster.from_csm(m, canonical_id))
 
     def _process_monster_images(self, db):
+        media_index = self.data.media_index
         logger.info('monster images, hq_count=%s, anim_count=%s',
-                    len(self.data.hq_image_monster_ids),
-                    len(self.data.animated_monster_ids))
-        if not self.data.hq_image_monster_ids or not self.data.animated_monster_ids:
+                    len(media_index.hq_image_monster_ids),
+                    len(media_index.animated_monster_ids))
+        if not media_index.hq_image_monster_ids or not media_index.animated_monster_ids:
             logger.info('skipping image info load')
             return
         for csm in self.data.ownable_cards:
             item = MonsterWithExtraImageInfo(monster_id=csm.monster_id,
-                                             has_animation=csm.has_animation,
-                                             has_hqimage=csm.has_hqimage)
+                                             has_animation=media_index.has_animation(csm.monster_id),
+                                             has_hqimage=media_index.has_hq_image(csm.monster_id))
             db.insert_or_update(item)
 
     def _process_awakenings(self, db):
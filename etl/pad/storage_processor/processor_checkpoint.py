@@ -0,0 +1,116 @@
+"""
+Checkpointing for long data_processor runs.
+
+State is stored under <checkpoint_dir>/<input_key>/, where the key is a hash of the raw
+input files and run options. A rerun with the same inputs reuses the pickled
+CrossServerDatabase, skips processors that already completed, and lets processors
+record finer-grained progress (e.g. the last dungeon the DungeonContentProcessor committed).
+When the inputs change the key changes, and stale checkpoints are discarded.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger('processor')
+
+_STATE_FILE = 'state.json'
+_DATABASE_FILE = 'cs_database.pickle'
+
+
+def compute_input_key(input_dir: str, extra: Iterable[str] = ()) -> str:
+    """Hashes every file under input_dir (path + contents) plus any extra run options."""
+    digest = hashlib.sha1()
+    for value in extra:
+        digest.update(str(value).encode('utf-8'))
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            path = os.path.join(root, file_name)
+            digest.update(os.path.relpath(path, input_dir).encode('utf-8'))
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _deep_recursion():
+    # The card/skill object graph is deeply linked, which exceeds the default limit when pickling.
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, 20000))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+class ProcessorCheckpoint(object):
+    def __init__(self, checkpoint_dir: str, input_key: str):
+        self.base_dir = checkpoint_dir
+        self.input_key = input_key
+        self.run_dir = os.path.join(checkpoint_dir, input_key)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        for entry in os.listdir(self.base_dir):
+            if entry != input_key:
+                logger.info('discarding stale checkpoint %s', entry)
+                shutil.rmtree(os.path.join(self.base_dir, entry), ignore_errors=True)
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        self.state = {'completed': [], 'progress': {}}
+        state_file = os.path.join(self.run_dir, _STATE_FILE)
+        if os.path.exists(state_file):
+            with open(state_file) as f:
+                self.state = json.load(f)
+            logger.info('resuming from checkpoint %s, completed: %s', input_key, self.state['completed'])
+
+    def _save_state(self):
+        state_file = os.path.join(self.run_dir, _STATE_FILE)
+        tmp_file = state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_file, state_file)
+
+    def load_database(self) -> Optional[Any]:
+        db_file = os.path.join(self.run_dir, _DATABASE_FILE)
+        if not os.path.exists(db_file):
+            return None
+        logger.info('loading checkpointed database')
+        with open(db_file, 'rb') as f, _deep_recursion():
+            return pickle.load(f)
+
+    def save_database(self, database: Any):
+        db_file = os.path.join(self.run_dir, _DATABASE_FILE)
+        tmp_file = db_file + '.tmp'
+        with open(tmp_file, 'wb') as f, _deep_recursion():
+            pickle.dump(database, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, db_file)
+
+    def is_completed(self, step_name: str) -> bool:
+        return step_name in self.state['completed']
+
+    def mark_completed(self, step_name: str):
+        with self._lock:
+            self.state['completed'].append(step_name)
+            self.state['progress'].pop(step_name, None)
+            self._save_state()
+
+    def progress(self, step_name: str) -> Optional[Any]:
+        return self.state['progress'].get(step_name)
+
+    def mark_progress(self, step_name: str, value: Any):
+        with self._lock:
+            self.state['progress'][step_name] = value
+            self._save_state()
+
+    def clear(self):
+        """Called after a fully successful run; the next run starts from scratch."""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
@@ -0,0 +1,134 @@
+"""
+Runs storage processors as a dependency graph instead of a fixed serial list.
+
+Each step declares the tables it reads and writes. A step depends on every earlier
+step that writes a table it reads or writes, and on every earlier step that reads a
+table it writes, so the declared order is preserved wherever it matters (e.g.
+dungeon -> encounter -> post-encounter visibility, timestamps -> purge), and
+everything else is free to run concurrently on its own DB connection.
+"""
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from pad.common.profiling import ProcessorProfiler
+from pad.db.db_util import DbWrapper
+from pad.storage_processor.processor_checkpoint import ProcessorCheckpoint
+
+logger = logging.getLogger('processor')
+
+
+class ProcessorStep(object):
+    def __init__(self,
+                 name: str,
+                 fn: Callable[[DbWrapper], None],
+                 input_tables: Iterable[str] = (),
+                 output_tables: Iterable[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.input_tables = set(input_tables)
+        self.output_tables = set(output_tables)
+        self.depends_on = set()  # type: Set[str]
+
+    def __str__(self):
+        return 'ProcessorStep({} <- {})'.format(self.name, sorted(self.depends_on))
+
+
+def link_steps(steps: List[ProcessorStep]):
+    """Computes depends_on for each step, based on declared order and table overlap."""
+    for idx, step in enumerate(steps):
+        for prev in steps[:idx]:
+            if prev.output_tables & (step.input_tables | step.output_tables) or prev.input_tables & step.output_tables:
+                step.depends_on.add(prev.name)
+
+
+class ProcessorScheduler(object):
+    """Executes ProcessorSteps, running independent ones in parallel.
+
+    db_factory creates a new connected DbWrapper; each worker thread gets its own.
+    With parallelism=1 every step runs serially on the calling thread, in declared order.
+    If a checkpoint is supplied, steps it records as completed are skipped and each
+    successful step is recorded.
+    """
+
+    def __init__(self,
+                 db_factory: Callable[[], DbWrapper],
+                 parallelism: int = 1,
+                 profiler: Optional[ProcessorProfiler] = None,
+                 checkpoint: Optional[ProcessorCheckpoint] = None):
+        self.db_factory = db_factory
+        self.parallelism = max(parallelism, 1)
+        self.profiler = profiler or ProcessorProfiler()
+        self.checkpoint = checkpoint
+        self._local = threading.local()
+        self._dbs = []  # type: List[DbWrapper]
+        self._dbs_lock = threading.Lock()
+
+    def _db(self) -> DbWrapper:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self.db_factory()
+            db.profiler = self.profiler
+            self._local.db = db
+            with self._dbs_lock:
+                self._dbs.append(db)
+        return db
+
+    def _close_dbs(self):
+        with self._dbs_lock:
+            for db in self._dbs:
+                db.close()
+            self._dbs.clear()
+        self._local = threading.local()
+
+    def _run_step(self, step: ProcessorStep):
+        if self.checkpoint and self.checkpoint.is_completed(step.name):
+            logger.info('skipping %s, completed in a previous run', step.name)
+            return
+        with self.profiler.phase(step.name):
+            step.fn(self._db())
+        if self.checkpoint:
+            self.checkpoint.mark_completed(step.name)
+
+    def run(self, steps: List[ProcessorStep]):
+        link_steps(steps)
+        for step in steps:
+            logger.debug('scheduled %s', step)
+
+        try:
+            self._run_steps(steps)
+        finally:
+            self._close_dbs()
+
+    def _run_steps(self, steps: List[ProcessorStep]):
+        if self.parallelism == 1:
+            for step in steps:
+                self._run_step(step)
+            return
+
+        pending = {s.name: s for s in steps}  # type: Dict[str, ProcessorStep]
+        done = set()  # type: Set[str]
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+            while pending or running:
+                ready = [s for s in pending.values() if s.depends_on <= done]
+                for step in ready:
+                    logger.info('starting %s', step.name)
+                    running[executor.submit(self._run_step, step)] = step
+                    pending.pop(step.name)
+
+                if not running:
+                    raise ValueError('unsatisfiable processor dependencies: {}'.format(
+                        ', '.join(map(str, pending.values()))))
+
+                finished, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    if future.exception():
+                        # Don't start anything new; let in-flight steps finish, then fail.
+                        pending.clear()
+                        wait(list(running.keys()))
+                        raise future.exception()
+                    done.add(step.name)
@@ -0,0 +1,67 @@
+"""
+Fingerprints for processors that load bundled static data (skill tags, series, ...).
+
+The processor_state table holds a hash of the rows each of those processors wrote on its last
+run. If the rows it would write now hash the same, the processor has nothing to do; otherwise
+they are written in bulk, and the new hash is stored once that has succeeded.
+
+Each processor only touches its own processor_state row, so the table is deliberately left
+out of OUTPUT_TABLES; declaring it would serialize all of them in the scheduler.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import List
+
+from pad.db.db_util import DbWrapper
+from pad.db.sql_item import SqlItem, object_to_sql_params
+
+logger = logging.getLogger('processor')
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS `processor_state` (
+  `name` varchar(64) NOT NULL,
+  `content_hash` char(40) NOT NULL,
+  `tstamp` int(11) NOT NULL,
+  PRIMARY KEY (`name`)
+)
+"""
+
+
+def fingerprint(items: List[SqlItem]) -> str:
+    """Hashes the table and column values of every item, ignoring timestamps."""
+    digest = hashlib.sha1()
+    for item in items:
+        params = object_to_sql_params(item)
+        params.pop('tstamp', None)
+        digest.update(item._table().encode('utf-8'))
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def sync_static_items(db: DbWrapper, name: str, items: List[SqlItem]) -> int:
+    """Writes items unless they are identical to what name wrote last time.
+
+    Items are bulk upserted grouped by type, in order of first appearance.
+    Returns the number of rows written.
+    """
+    content_hash = fingerprint(items)
+    if not db.dry_run:
+        db.update_item(_CREATE_TABLE_SQL)
+        stored_hash = db.get_single_value(
+            "SELECT content_hash FROM processor_state WHERE name = '{}'".format(name), fail_on_empty=False)
+        if stored_hash == content_hash:
+            logger.info('%s: static data unchanged, skipping', name)
+            return 0
+
+    by_type = OrderedDict()
+    for item in items:
+        by_type.setdefault(type(item), []).append(item)
+    written = sum(db.upsert_changed(type_items) for type_items in by_type.values())
+
+    db.update_item("REPLACE INTO processor_state (name, content_hash, tstamp) VALUES ('{}', '{}', {})".format(
+        name, content_hash, int(time.time())))
+    logger.info('%s: wrote %d changed rows', name, written)
+    return written
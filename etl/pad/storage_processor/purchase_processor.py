@@ -12,6 +12,9 @@ logger = logging.getLogger('processor')
 
 
 class PurchaseProcessor(object):
+    INPUT_TABLES = ['d_servers', 'monsters']
+    OUTPUT_TABLES = ['purchases', 'monsters']
+
     def __init__(self, data: crossed_data.CrossServerDatabase):
         self.purchase_data = {
             Server.jp: data.jp_purchase,
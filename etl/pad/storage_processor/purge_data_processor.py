@@ -1,31 +1,55 @@
 import logging
-# from datetime import datetime, timedelta
+from datetime import datetime, timedelta
 
 from pad.db.db_util import DbWrapper
 
 logger = logging.getLogger('processor')
 
+# Rows deleted per statement, so that no single delete holds locks for long.
+DEFAULT_BATCH_SIZE = 5000
+
 
 def date2tstamp(date):
     return int(date.timestamp())
 
 
 class PurgeDataProcessor:
+    INPUT_TABLES = []
+    OUTPUT_TABLES = ['schedule', 'deleted_rows']
+
+    def __init__(self, retention_weeks: int = 4, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.retention_weeks = retention_weeks
+        self.batch_size = batch_size
+
     def process(self, db: DbWrapper):
-        pass
-        # print('Starting deletion of old records')
-        # print('schedule size:', db.get_single_value('select count(*) from schedule'))
-        # print('deleted_rows size', db.get_single_value('select count(*) from deleted_rows'))
-        #
-        # # This is a hint to mysql that we shouldn't insert into deleted_rows
-        # # while purging. The client should handle deleting old events in bulk.
-        # db.fetch_data('set @TRIGGER_DISABLED=true')
-        #
-        # delete_timestamp = date2tstamp(datetime.now() - timedelta(weeks=4))
-        # print('deleting before', delete_timestamp)
-        # schedule_deletes = db.update_item(
-        #     "DELETE FROM `schedule` WHERE end_timestamp < {}".format(delete_timestamp))
-        # deleted_row_deletes = db.update_item(
-        #     "DELETE FROM `deleted_rows` WHERE tstamp < {}".format(delete_timestamp))
-        #
-        # logger.info("purged {} old schedules and {} old deleted_rows".format(schedule_deletes, deleted_row_deletes))
+        delete_timestamp = date2tstamp(datetime.now() - timedelta(weeks=self.retention_weeks))
+        logger.info('purging records from before %s', delete_timestamp)
+
+        # This is a hint to mysql that we shouldn't insert into deleted_rows
+        # while purging. The client should handle deleting old events in bulk.
+        # The connection is reused by later steps, so the hint is always cleared again.
+        db.fetch_data('SET @TRIGGER_DISABLED = true')
+        try:
+            schedule_deletes = self._purge(db, 'schedule', 'end_timestamp', delete_timestamp)
+            deleted_row_deletes = self._purge(db, 'deleted_rows', 'tstamp', delete_timestamp)
+        finally:
+            db.fetch_data('SET @TRIGGER_DISABLED = NULL')
+
+        logger.info('purged %d old schedules and %d old deleted_rows', schedule_deletes, deleted_row_deletes)
+
+    def _purge(self, db: DbWrapper, table: str, column: str, delete_timestamp: int) -> int:
+        """Deletes rows where column < delete_timestamp, batch_size at a time, walking the column's index."""
+        where = '`{}` < {}'.format(column, delete_timestamp)
+        if db.dry_run:
+            count = db.get_single_value('SELECT COUNT(*) FROM `{}` WHERE {}'.format(table, where), op=int)
+            logger.info('dry run: would purge %d rows from %s', count, table)
+            return count
+
+        total = 0
+        while True:
+            deleted = db.update_item('DELETE FROM `{}` WHERE {} ORDER BY `{}` LIMIT {}'.format(
+                table, where, column, self.batch_size))
+            total += deleted
+            logger.debug('purged %d rows from %s (%d so far)', deleted, table, total)
+            if deleted < self.batch_size:
+                return total
@@ -2,12 +2,16 @@ import csv
 import os
 
 from pad.db.db_util import DbWrapper
+from pad.storage_processor.processor_state import sync_static_items
 from pad.storage.rank_reward import RankReward
 
 __location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
 
 
 class RankRewardProcessor(object):
+    INPUT_TABLES = []
+    OUTPUT_TABLES = ['rank_rewards']
+
     def __init__(self):
         with open(os.path.join(__location__, 'rank_reward.csv')) as f:
             reader = csv.reader(f)
@@ -15,6 +19,5 @@ class RankRewardProcessor(object):
             self.rank_rewards = list(reader)
 
     def process(self, db: DbWrapper):
-        for row in self.rank_rewards:
-            item = RankReward.from_csv(row)
-            db.insert_or_update(item)
+        items = [RankReward.from_csv(row) for row in self.rank_rewards]
+        sync_static_items(db, type(self).__name__, items)
@@ -1,6 +1,10 @@
 import json
 import logging
-from typing import List
+import time
+from collections import defaultdict
+from enum import Enum
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
 
 from datetime import timedelta
 
@@ -90,42 +94,91 @@ IGNORED_BONUS_TYPES = [
 ]
 
 
+class BonusAction(Enum):
+    SUPPORTED = 1
+    WARN = 2
+    IGNORED = 3
+    MISCONFIGURED = 4  # Not listed anywhere; someone needs to decide what to do with it.
+
+
+def _build_bonus_actions() -> Mapping[BonusType, BonusAction]:
+    actions = {t: BonusAction.MISCONFIGURED for t in BonusType}
+    # Applied in reverse order of precedence, in case a type ends up in more than one list.
+    actions.update({t: BonusAction.SUPPORTED for t in SUPPORTED_BONUS_TYPES})
+    actions.update({t: BonusAction.IGNORED for t in IGNORED_BONUS_TYPES})
+    actions.update({t: BonusAction.WARN for t in WARN_BONUS_TYPES})
+    return MappingProxyType(actions)
+
+
+BONUS_ACTIONS = _build_bonus_actions()
+
+
 class ScheduleProcessor(object):
+    INPUT_TABLES = ['d_servers', 'd_event_types', 'dungeons']
+    OUTPUT_TABLES = ['schedule']
+
     def __init__(self, data: crossed_data.CrossServerDatabase):
         self.data = data
+        # BonusType -> [count, seconds] spent turning bonuses into events. The events are written
+        # together at the end, so this does not include DB time.
+        self.type_stats = defaultdict(lambda: [0, 0.0])  # type: Dict[BonusType, List]
 
     def process(self, db: DbWrapper):
+        events = []
         logger.info('loading JP events')
-        self._process_schedule(db, self.data.jp_bonuses)
+        events.extend(self._process_schedule(self.data.jp_bonuses))
         logger.info('loading NA events')
-        self._process_schedule(db, self.data.na_bonuses)
+        events.extend(self._process_schedule(self.data.na_bonuses))
         logger.info('loading KR events')
-        self._process_schedule(db, self.data.kr_bonuses)
+        events.extend(self._process_schedule(self.data.kr_bonuses))
+
+        if events:
+            # Events are looked up by value, so an existing match has the same start time.
+            where = 'start_timestamp BETWEEN {} AND {}'.format(
+                min(e.start_timestamp for e in events), max(e.start_timestamp for e in events))
+            start = time.perf_counter()
+            written = db.upsert_changed(events, where=where)
+            logger.info('wrote %d of %d events in %.3fs', written, len(events), time.perf_counter() - start)
+
+        for bonus_type, (count, seconds) in sorted(self.type_stats.items(), key=lambda x: -x[1][1]):
+            logger.info('%s: %d bonuses converted in %.3fs (excludes DB time)', bonus_type.name, count, seconds)
         logger.info('done loading schedule data')
 
-    def _process_schedule(self, db: DbWrapper, bonuses: List[MergedBonus]):
+    def _process_schedule(self, bonuses: List[MergedBonus]) -> List[ScheduleEvent]:
+        events = []
         for bonus in bonuses:
+            start = time.perf_counter()
             bonus_type = bonus.bonus.bonus_info.bonus_type
-
-            if bonus_type in WARN_BONUS_TYPES:
-                human_fix_logger.error('Unexpected bonus: %s\n%s', bonus, bonus.bonus.raw)
-                continue
-
-            if bonus_type in IGNORED_BONUS_TYPES:
-                logger.debug('Ignored bonus: %s', bonus)
-                continue
-
-            if bonus_type not in SUPPORTED_BONUS_TYPES:
-                human_fix_logger.error('Incorrectly configured bonus: %s', bonus)
-                continue
-
-            if bonus.open_duration() > timedelta(days=60):
-                logger.debug('Skipping long bonus: %s', bonus)
-                continue
-
-            if bonus.dungeon:
-                logger.debug('Creating event: %s', bonus)
-                event = ScheduleEvent.from_mb(bonus)
-                db.insert_or_update(event)
-            else:
-                human_fix_logger.error('Dungeon with no dungeon attached: %s', bonus)
+            event = self._process_bonus(bonus, bonus_type)
+            if event:
+                events.append(event)
+            stats = self.type_stats[bonus_type]
+            stats[0] += 1
+            stats[1] += time.perf_counter() - start
+        return events
+
+    def _process_bonus(self, bonus: MergedBonus, bonus_type: BonusType) -> Optional[ScheduleEvent]:
+        action = BONUS_ACTIONS[bonus_type]
+
+        if action == BonusAction.WARN:
+            human_fix_logger.error('Unexpected bonus: %s\n%s', bonus, bonus.bonus.raw)
+            return None
+
+        if action == BonusAction.IGNORED:
+            logger.debug('Ignored bonus: %s', bonus)
+            return None
+
+        if action != BonusAction.SUPPORTED:
+            human_fix_logger.error('Incorrectly configured bonus: %s', bonus)
+            return None
+
+        if bonus.open_duration() > timedelta(days=60):
+            logger.debug('Skipping long bonus: %s', bonus)
+            return None
+
+        if bonus.dungeon:
+            logger.debug('Creating event: %s', bonus)
+            return ScheduleEvent.from_mb(bonus)
+        else:
+            human_fix_logger.error('Dungeon with no dungeon attached: %s', bonus)
+            return None
@@ -3,6 +3,7 @@ import logging
 import os
 
 from pad.db.db_util import DbWrapper
+from pad.storage_processor.processor_state import sync_static_items
 from pad.raw_processor import crossed_data
 from pad.storage.series import Series
 
@@ -12,12 +13,14 @@ logger = logging.getLogger('processor')
 
 
 class SeriesProcessor(object):
+    INPUT_TABLES = []
+    OUTPUT_TABLES = ['series']
+
     def __init__(self, data: crossed_data.CrossServerDatabase):
         with open(os.path.join(__location__, 'series.json')) as f:
             self.series = json.load(f)
         self.data = data
 
     def process(self, db: DbWrapper):
-        for raw in self.series:
-            item = Series.from_json(raw)
-            db.insert_or_update(item)
+        items = [Series.from_json(raw) for raw in self.series]
+        sync_static_items(db, type(self).__name__, items)
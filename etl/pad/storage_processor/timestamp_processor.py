@@ -1,7 +1,9 @@
 import logging
 import datetime
+from typing import Optional
 
 from pad.db.db_util import DbWrapper
+from pad.db.tstamp_journal import TstampJournal
 from pad.storage.awoken_skill import AwokenSkill
 from pad.storage.dungeon import Dungeon, SubDungeon
 from pad.storage.egg_machine import EggMachine
@@ -45,17 +47,27 @@ _UPDATE_TABLES = [
 
 
 class TimestampProcessor(object):
-    def __init__(self):
-        pass
+    INPUT_TABLES = _UPDATE_TABLES
+    OUTPUT_TABLES = ['timestamps']
+
+    def __init__(self, tstamp_journal: Optional[TstampJournal] = None):
+        self.tstamp_journal = tstamp_journal
 
     def process(self, db: DbWrapper):
         logger.info('timestamp update of %s tables', len(_UPDATE_TABLES))
+        current_tstamps = db.load_to_key_value('name', 'tstamp', 'timestamps')
         for table in _UPDATE_TABLES:
-            max_tstamp_sql = 'SELECT MAX(tstamp) AS tstamp FROM `{}`'.format(table)
-            tstamp = db.get_single_value(max_tstamp_sql, op=int, fail_on_empty=False)
+            # Tables written through SqlItems this run have a known max tstamp; anything else
+            # (raw SQL, trigger-populated, or untouched tables) falls back to the tstamp index.
+            tstamp = self.tstamp_journal.known_tstamp(table) if self.tstamp_journal else None
+            if tstamp is None:
+                max_tstamp_sql = 'SELECT MAX(tstamp) AS tstamp FROM `{}`'.format(table)
+                tstamp = db.get_single_value(max_tstamp_sql, op=int, fail_on_empty=False)
             if tstamp is None:
                 logger.error('Skipping tstamp update for {}'.format(table))
                 continue
+            if current_tstamps.get(table) == tstamp:
+                continue
             update_sql = "INSERT INTO timestamps (name, tstamp) values ('{}', {}) ON DUPLICATE KEY UPDATE tstamp = {}".format(
                 table, tstamp, tstamp)
             rows_updated = db.update_item(update_sql)
@@ -15,7 +15,7 @@ from pad.raw.enemy_skills.debug_utils import save_monster_behavior, save_behavio
 from pad.raw.skills.enemy_skill_info import ESAction, ESInstance, ESDeathAction
 from pad.raw.enemy_skills.enemy_skill_proto import safe_save_to_file, clean_monster_behavior, add_unused
 from pad.raw_processor import merged_database
-from pad.raw_processor.crossed_data import CrossServerDatabase, CrossServerCard
+from pad.raw_processor.crossed_data import CrossServerDatabase, CrossServerCard, make_cross_server_card
 
 fail_logger = logging.getLogger('processor_failures')
 fail_logger.disabled = True
@@ -214,13 +214,6 @@ def run(args):
     behavior_plain_dir = os.path.join(args.output_dir, 'behavior_plain')
     os.makedirs(behavior_plain_dir, exist_ok=True)
 
-    jp_db = merged_database.Database(Server.jp, args.input_dir)
-    na_db = merged_database.Database(Server.na, args.input_dir)
-
-    jp_db.load_database(skip_bonus=True, skip_extra=True)
-    na_db.load_database(skip_bonus=True, skip_extra=True)
-
-    print('merging data')
     if args.server.lower() == "jp":
         server = Server.jp
     elif args.server.lower() == "na":
@@ -229,15 +222,35 @@ def run(args):
         server = Server.kr
     else:
         raise ValueError("Server must be JP, NA, or KR")
-    # Skipping KR database; we don't need it to compute ES
-    cross_db = CrossServerDatabase(jp_db, na_db, na_db, server)
-
-    combined_cards = cross_db.all_cards
 
     fixed_card_id = args.card_id
     if args.interactive:
         fixed_card_id = input("enter a card id:").strip()
 
+    # For a single card, only that card is merged, so only its skills are parsed.
+    monster_ids = {int(fixed_card_id)} if fixed_card_id else None
+
+    jp_db = merged_database.Database(Server.jp, args.input_dir)
+    na_db = merged_database.Database(Server.na, args.input_dir)
+
+    jp_db.load_database(skip_bonus=True, skip_extra=True, monster_ids=monster_ids)
+    na_db.load_database(skip_bonus=True, skip_extra=True, monster_ids=monster_ids)
+
+    print('merging data')
+    # Skipping KR database; we don't need it to compute ES
+    if fixed_card_id:
+        monster_id = int(fixed_card_id)
+        csc, err_msg = make_cross_server_card(jp_db.card_by_monster_id(monster_id),
+                                              na_db.card_by_monster_id(monster_id),
+                                              na_db.card_by_monster_id(monster_id),
+                                              server)
+        if csc is None:
+            print('could not load card', fixed_card_id, err_msg)
+        combined_cards = [csc] if csc else []
+    else:
+        cross_db = CrossServerDatabase(jp_db, na_db, na_db, server)
+        combined_cards = cross_db.all_cards
+
     count = 0
     for csc in combined_cards[count:]:
         merged_card = csc.na_card
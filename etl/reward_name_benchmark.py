@@ -0,0 +1,59 @@
+"""
+Times finding monster names inside bonus text, the way dungeon rewards are matched.
+
+Compares testing every name against every text with `in`, which is what the
+DungeonContentProcessor used to do, against the SubstringMatcher automaton.
+"""
+import argparse
+import time
+
+from pad.common.shared_types import Server
+from pad.common.substring_matcher import SubstringMatcher
+from pad.raw_processor import merged_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks reward monster name matching.", add_help=False)
+
+    input_group = parser.add_argument_group("Input")
+    input_group.add_argument("--input_dir", required=True,
+                             help="Path to a folder where the input data is")
+    input_group.add_argument("--server", default="JP", help="Server to load cards and bonuses for")
+    input_group.add_argument("--rounds", default=3, type=int, help="Number of times to match each text")
+
+    help_group = parser.add_argument_group("Help")
+    help_group.add_argument("-h", "--help", action="help",
+                            help="Displays this help message and exits.")
+    return parser.parse_args()
+
+
+def run_benchmark(args):
+    db = merged_database.Database(Server[args.server.lower()], args.input_dir)
+    db.load_database(skip_skills=True, skip_extra=True, skip_enemy_skills=True)
+
+    names = list({c.card.name.lower() for c in db.cards})
+    texts = [b.bonus.clean_message.lower() for b in db.bonuses if b.bonus.clean_message]
+    print('matching {} names against {} bonus texts'.format(len(names), len(texts)))
+
+    start = time.perf_counter()
+    matcher = SubstringMatcher(names)
+    print('built matcher in {:.3f}s'.format(time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        naive = [max([n for n in names if n in text], key=len, default=None) for text in texts]
+    naive_time = (time.perf_counter() - start) / args.rounds
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        matched = [matcher.longest_match(text) for text in texts]
+    matcher_time = (time.perf_counter() - start) / args.rounds
+
+    # Equal-length matches may be broken differently, so compare lengths.
+    mismatches = sum(1 for a, b in zip(naive, matched) if len(a or '') != len(b or '') or (a is None) != (b is None))
+    print('substring tests {:>8.3f}s  matcher {:>8.3f}s  {:>7.1f}x  mismatches: {}'.format(
+        naive_time, matcher_time, naive_time / max(matcher_time, 1e-9), mismatches))
+
+
+if __name__ == '__main__':
+    run_benchmark(parse_args())
@@ -0,0 +1,65 @@
+"""
+Times skill text templating over the full active skill set.
+
+Compares the templating step used by the converters against compiling a fresh jinja
+template for every skill, which is what the converters used to do.
+"""
+import argparse
+import time
+
+import jinja2
+
+from pad.common.shared_types import Server
+from pad.raw.skills.skill_text_cache import AS_CONVERTERS
+from pad.raw_processor import merged_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks skill text rendering.", add_help=False)
+
+    input_group = parser.add_argument_group("Input")
+    input_group.add_argument("--input_dir", required=True,
+                             help="Path to a folder where the input data is")
+    input_group.add_argument("--server", default="JP", help="Server to load skills for")
+    input_group.add_argument("--rounds", default=3, type=int, help="Number of times to render each skill")
+
+    help_group = parser.add_argument_group("Help")
+    help_group.add_argument("-h", "--help", action="help",
+                            help="Displays this help message and exits.")
+    return parser.parse_args()
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def run_benchmark(args):
+    db = merged_database.Database(Server[args.server.lower()], args.input_dir)
+    db.load_database(skip_bonus=True, skip_extra=True, skip_cards=True, skip_enemy_skills=True)
+
+    print('rendering {} active skills'.format(len(db.active_skills)))
+
+    # Only active skill text goes through templating; leader skill text is plain.
+    for converter in AS_CONVERTERS:
+        templated = [t for t in (s.templated_text(converter) for s in db.active_skills) if t]
+
+        def render_compiled():
+            for text in templated:
+                converter.process_raw(text)
+
+        def render_uncompiled():
+            for text in templated:
+                jinja2.Template(text).render(
+                    awoskills={f"id{awid}": name for awid, name in converter.AWAKENING_MAP.items()})
+
+        uncompiled = timed(render_uncompiled, args.rounds)
+        compiled = timed(render_compiled, args.rounds)
+        print('{:<20} {:>6} texts  per-skill template {:>8.3f}s  compiled {:>8.3f}s  {:>7.1f}x'.format(
+            type(converter).__name__, len(templated), uncompiled, compiled, uncompiled / max(compiled, 1e-9)))
+
+
+if __name__ == '__main__':
+    run_benchmark(parse_args())
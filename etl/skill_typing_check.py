@@ -0,0 +1,341 @@
+"""
+Checks that skill tags match the isinstance chain they used to be computed with.
+
+skill_text_typing looks tags up in per-type tables and rules. The chain those replaced is kept
+here, verbatim, and both are run over every active and leader skill in the input data, both as
+top-level skills and as parts of other skills. Rerun this after editing the tables or rules;
+if a tag is meant to change, make the same change to the legacy chain.
+"""
+import argparse
+import time
+from types import SimpleNamespace
+from typing import List
+
+from pad.common.shared_types import Server
+from pad.raw.skills import skill_text_typing
+from pad.raw.skills.active_skill_info import ASAddAdditionalCombos, ASAtkBasedNuke, ASAttrBurst, \
+    ASAttrBurstMultiPart, ASAttrOnAttrNuke, ASAttributeChange, ASAutoHealConvert, ASAwokenSkillBurst, \
+    ASAwokenSkillBurst2, ASBicolorOrbEnhance, ASBoardChange, ASColumnOrbChange, ASCounterattack, \
+    ASDamageReduction, ASDamageVoid, ASDefenseBreak, ASDelay, ASEnemyAttrChange, ASFreeOrbMovement, ASGravity, \
+    ASHaste, ASHpConditionalMassNuke, ASHpConditionalTargetNuke, ASHpRecoverFromRcv, ASHpRecoverStatic, \
+    ASHpRecovery, ASHpRecoveryandBindClear, ASIncreasedOrbMovementTime, ASIncreasedSkyfallChance, \
+    ASLeaderSwap, ASLowHpConditionalAttrDamageBoost, ASMassAttack, ASMassNukeWithHpPenalty, \
+    ASMiniNukeandHpRecovery, ASMultiLaserConvert, ASMultiPartSkill, ASNoSkyfallForXTurns, ASOneAttrtoOneAttr, \
+    ASOrbEnhance, ASOrbEnhanceNew, ASOrbLock, ASOrbLockRemoval, ASOrbRefresh, ASPoisonEnemies, ASRandomSkill, \
+    ASReduceDisableMatch, ASReduceVoidDamage, ASRowOrbChange, ASShowComboPath, ASSuicide195, \
+    ASTargetNukeWithHpPenalty, ASThreeAttrtoOneAttr, ASTrueDamageNuke, ASTrueDamageNukeAll, ASTrueGravity, \
+    ASTwoAttrtoOneTwoAttr, ASTypeBurst, ASTypeBurstNew, ASVoidDamageAbsorption
+from pad.raw.skills.leader_skill_info import LSAutoheal, LSCoinDropBoost, LSCounterattack, LSEggDropRateBoost, \
+    LSMultiPartSkill, LSNoSkyfallBoost, LSOrbRemainingMultiplier, LSRankXpBoost, LSResolve, LSSevenBySix, \
+    LSSevenBySixStatBoost, LSTaikoDrum
+from pad.raw.skills.skill_text_typing import ASTags, LSTags
+from pad.raw_processor import merged_database
+
+
+def legacy_parse_as_conditions(skill, child=False) -> List[ASTags]:
+    """Takes the processor-generated active skill text and produces a list of conditions."""
+    if not child:
+        skill = skill.cur_skill
+    results = set()
+
+    if isinstance(skill, ASMultiPartSkill):
+        for s in skill.parts:
+            results.update(legacy_parse_as_conditions(s, True))
+        if len([s for s in skill.parts if isinstance(s, (ASOneAttrtoOneAttr,
+                                                         ASTwoAttrtoOneTwoAttr,
+                                                         ASThreeAttrtoOneAttr))]) >= 2:
+            results.add(ASTags.DOUBLE_ORBS_CONVERT)
+
+    if isinstance(skill, ASRandomSkill):
+        results.add(ASTags.ETC)
+        for s in skill.child_skills:
+            results.update(legacy_parse_as_conditions(s, True))
+
+    if isinstance(skill, (ASOrbEnhance, ASBicolorOrbEnhance, ASOrbEnhanceNew)):
+        results.add(ASTags.ENHANCED_ORBS)
+
+    if isinstance(skill, (ASAttrBurst, ASAttrBurstMultiPart)):
+        if skill.attributes:
+            results.add(ASTags.ENHANCED_ATTACK)
+        if skill.rcv_boost and skill.multiplier >= 1:
+            results.add(ASTags.ENHANCED_HEAL)
+
+    if isinstance(skill, (ASTypeBurst, ASTypeBurstNew)):
+        results.add(ASTags.ENHANCED_ATTACK)
+
+    if isinstance(skill, ASDefenseBreak):
+        results.add(ASTags.REDUCE_DEFENSE)
+
+    if isinstance(skill, ASGravity):
+        results.add(ASTags.GRAVITY)
+
+    if isinstance(skill, (ASOneAttrtoOneAttr, ASTwoAttrtoOneTwoAttr, ASThreeAttrtoOneAttr)):
+        results.add(ASTags.ORB_CONVERT)
+        if 5 in skill.from_attr:
+            results.add(ASTags.ATTACK_STANCE)
+        if 5 in skill.to_attr:
+            results.add(ASTags.GUARD_STANCE)
+
+    if isinstance(skill, ASDelay):
+        results.add(ASTags.MENACE)
+
+    if isinstance(skill, ASFreeOrbMovement):
+        results.add(ASTags.STOP_TIME)
+
+    if isinstance(skill, (ASDamageReduction, ASDamageVoid)):
+        if skill.shield == 1:
+            results.add(ASTags.VOID_DAMAGE)
+        else:
+            results.add(ASTags.REDUCE_DAMAGE)
+
+    if isinstance(skill, (ASAwokenSkillBurst, ASAwokenSkillBurst2)):
+        if skill.toggle == 1:
+            results.add(ASTags.ENHANCED_HEAL)
+        elif skill.toggle in [0, 2]:
+            results.add(ASTags.ENHANCED_ATTACK)
+        elif skill.toggle == 3:
+            results.add(ASTags.REDUCE_DAMAGE)
+
+    if isinstance(skill, ASPoisonEnemies):
+        results.add(ASTags.POISON)
+
+    if isinstance(skill, ASCounterattack):
+        results.add(ASTags.COUNTERATTACK)
+
+    if isinstance(skill, ASLowHpConditionalAttrDamageBoost):
+        results.add(ASTags.GRUDGE_STRIKE)
+
+    if isinstance(skill, ASLeaderSwap):
+        results.add(ASTags.THE_SWITCH)
+
+    if isinstance(skill, ASMassAttack):
+        results.add(ASTags.ATTACK_CHANGER)
+
+    if isinstance(skill, ASTwoAttrtoOneTwoAttr):
+        if len(skill.to_attr) > 1:
+            results.add(ASTags.DOUBLE_ORBS_CONVERT)
+
+    if isinstance(skill, (ASBoardChange, ASShowComboPath)):
+        results.add(ASTags.ALL_ORBS_CONVERT)
+    if isinstance(skill, ASThreeAttrtoOneAttr):
+        if skill.from_attr == list(range(10)):
+            results.add(ASTags.ALL_ORBS_CONVERT)
+
+    if isinstance(skill, (ASHpConditionalTargetNuke, ASHpConditionalMassNuke,
+                          ASTargetNukeWithHpPenalty, ASMassNukeWithHpPenalty,
+                          ASSuicide195)):
+        results.add(ASTags.SUICIDE)
+
+    if isinstance(skill, (ASHpRecovery, ASHpRecoverFromRcv, ASHpRecoverStatic, ASHpRecoveryandBindClear)):
+        if any([getattr(skill, 'hp', 0),
+                getattr(skill, 'rcv_multiplier_as_hp', 0),
+                getattr(skill, 'percentage_max_hp', 0),
+                getattr(skill, 'team_rcv_multiplier_as_hp', 0)]):
+            results.add(ASTags.HEAL)
+    if isinstance(skill, ASAutoHealConvert):
+        if skill.duration:
+            results.add(ASTags.HEAL)
+    if isinstance(skill, (ASAutoHealConvert, ASHpRecoveryandBindClear)):
+        if skill.card_bind:
+            results.add(ASTags.RECOVER_BIND)
+        if skill.awoken_bind:
+            results.add(ASTags.AWOKEN_INVALID_RECOVERY)
+
+    if ASTags.RECOVER_BIND in results and ASTags.AWOKEN_INVALID_RECOVERY in results:
+        results.add(ASTags.BIND_AWOKEN_INVALID_RECOVERY)
+    if ASTags.RECOVER_BIND in results and ASTags.HEAL in results:
+        results.add(ASTags.HEAL_BIND_RECOVERY)
+
+    if isinstance(skill, ASIncreasedSkyfallChance):
+        results.add(ASTags.DROP_CHANCE)
+
+    if isinstance(skill, (ASMiniNukeandHpRecovery, ASAtkBasedNuke)):
+        results.add(ASTags.ATTACK_AND_HEAL)
+
+    if isinstance(skill, (ASTrueDamageNuke, ASTrueDamageNukeAll, ASMultiLaserConvert)):
+        results.add(ASTags.FIXED_DAMAGE)
+
+    if hasattr(skill, 'mass_attack'):
+        if skill.mass_attack:
+            results.add(ASTags.MASSIVE_ATTACK)
+        else:
+            results.add(ASTags.SINGLE_TARGET_ATTACK)
+
+    if isinstance(skill, ASAttrOnAttrNuke):
+        results.add(ASTags.ATTRIBUTE_ATTACK)
+
+    if isinstance(skill, (ASColumnOrbChange, ASRowOrbChange)):
+        results.add(ASTags.LINE_ORBS_CONVERTER)
+
+    if isinstance(skill, ASIncreasedOrbMovementTime):
+        results.add(ASTags.EXTENDS_TIME)
+
+    if isinstance(skill, ASAttributeChange):
+        results.add(ASTags.CHANGE_ATTRIBUTE)
+
+    if isinstance(skill, ASHaste):
+        results.add(ASTags.REDUCE_SKILL_TURN)
+
+    if isinstance(skill, ASOrbRefresh):
+        results.add(ASTags.ORB_REFRESH)
+
+    if isinstance(skill, ASEnemyAttrChange):
+        results.add(ASTags.CHANGE_ENEMIES_ATTRIBUTE)
+
+    if isinstance(skill, ASAddAdditionalCombos):
+        results.add(ASTags.ADD_COMBO)
+
+    if isinstance(skill, ASTrueGravity):
+        results.add(ASTags.NEW_GRAVITY)
+
+    if isinstance(skill, (ASOrbLockRemoval, ASShowComboPath)):
+        results.add(ASTags.REMOVE_LOCK)
+
+    if isinstance(skill, ASVoidDamageAbsorption):
+        if skill.damage_absorb:
+            results.add(ASTags.VOID_DAMAGE_ABSORBS)
+        if skill.attribute_absorb:
+            results.add(ASTags.VOID_ATT_ABSORBS)
+
+    if isinstance(skill, ASReduceVoidDamage):
+        results.add(ASTags.PIERCE_DAMAGE_VOID)
+
+    if isinstance(skill, ASNoSkyfallForXTurns):
+        results.add(ASTags.VOID_SKYFALLS)
+
+    if isinstance(skill, ASOrbLock):
+        results.add(ASTags.ORB_LOCK)
+
+    if isinstance(skill, ASShowComboPath):
+        results.add(ASTags.COMBO_ROUTE)
+
+    if isinstance(skill, ASReduceDisableMatch):
+        results.add(ASTags.REDUCE_MATCH_RESTRICTION)
+
+    if child:
+        return list(results)
+    return sorted(results, key=lambda x: x.value)
+
+
+def legacy_parse_ls_conditions(skill, child=False) -> List[LSTags]:
+    """Takes the processor-generated leader skill text and produces a list of conditions."""
+    if not child:
+        skill = skill.cur_skill
+    results = set()
+
+    if isinstance(skill, LSMultiPartSkill):
+        for s in skill.parts:
+            results.update(legacy_parse_ls_conditions(s, True))
+
+    if child:
+        pass
+    elif skill.hp > 1:
+        if skill.atk > 1:
+            if skill.rcv > 1:
+                results.add(LSTags.ENHANCED_HP_ATK_RCV)
+            else:
+                results.add(LSTags.ENHANCED_HP_ATK)
+        elif skill.rcv > 1:
+            results.add(LSTags.ENHANCED_HP_RCV)
+        else:
+            results.add(LSTags.ENHANCED_HP)
+    elif skill.atk > 1:
+        if skill.rcv > 1:
+            results.add(LSTags.ENHANCED_ATK_RCV)
+        else:
+            results.add(LSTags.ENHANCED_ATK)
+    elif skill.rcv > 1:
+        results.add(LSTags.ENHANCED_RCV)
+
+    if skill.shield > 0:
+        results.add(LSTags.REDUCE_DAMAGE)
+
+    if isinstance(skill, LSAutoheal):
+        results.add(LSTags.AUTO_HEAL)
+
+    if skill.mult_bonus_damage or skill.bonus_damage:
+        results.add(LSTags.ADDITIONAL_ATTACK)
+
+    if isinstance(skill, LSCounterattack):
+        results.add(LSTags.COUNTERATTACK)
+
+    if isinstance(skill, LSResolve):
+        results.add(LSTags.RESOLVE)
+
+    if skill.extra_time:
+        results.add(LSTags.EXTEND_TIME)
+
+    if isinstance(skill, LSCoinDropBoost):
+        results.add(LSTags.COIN)
+
+    if isinstance(skill, LSEggDropRateBoost):
+        results.add(LSTags.EGG)
+
+    if isinstance(skill, LSRankXpBoost):
+        results.add(LSTags.EXP)
+
+    if isinstance(skill, (LSSevenBySix, LSSevenBySixStatBoost)):
+        results.add(LSTags.BOARD_CHANGE_7X6)
+
+    if isinstance(skill, (LSNoSkyfallBoost, LSOrbRemainingMultiplier)):
+        results.add(LSTags.NO_SKYFALL_COMBOS)
+
+    if isinstance(skill, LSTaikoDrum):
+        results.add(LSTags.ORB_SOUNDS)
+
+    if skill.extra_combos:
+        results.add(LSTags.EXTRA_COMBOS)
+
+    if child:
+        return list(results)
+    return sorted(results, key=lambda x: x.value)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Checks skill tags against the legacy rules.", add_help=False)
+
+    input_group = parser.add_argument_group("Input")
+    input_group.add_argument("--input_dir", required=True,
+                             help="Path to a folder where the input data is")
+    input_group.add_argument("--server", default="JP", help="Server to load skills for")
+
+    help_group = parser.add_argument_group("Help")
+    help_group.add_argument("-h", "--help", action="help",
+                            help="Displays this help message and exits.")
+    return parser.parse_args()
+
+
+def compare(skills, legacy_fn, current_fn) -> int:
+    """Returns the number of (skill, mode) pairs whose tags differ, printing the first few."""
+    mismatches = 0
+    for skill in skills:
+        for child in (False, True):
+            arg = skill if child else SimpleNamespace(cur_skill=skill)
+            legacy = sorted(t.value for t in legacy_fn(arg, child))
+            current = sorted(t.value for t in current_fn(arg, child))
+            if legacy != current:
+                mismatches += 1
+                if mismatches <= 10:
+                    print('{} {} child={}: legacy {} current {}'.format(
+                        type(skill).__name__, skill.skill_id, child, legacy, current))
+    return mismatches
+
+
+def run_check(args):
+    db = merged_database.Database(Server[args.server.lower()], args.input_dir)
+    db.load_database(skip_bonus=True, skip_extra=True, skip_cards=True, skip_enemy_skills=True)
+
+    for name, skills, legacy_fn, current_fn in [
+        ('active', db.active_skills, legacy_parse_as_conditions, skill_text_typing.parse_as_conditions),
+        ('leader', db.leader_skills, legacy_parse_ls_conditions, skill_text_typing.parse_ls_conditions),
+    ]:
+        start = time.perf_counter()
+        mismatches = compare(skills, legacy_fn, current_fn)
+        print('{} skills: {} checked, {} mismatches ({:.2f}s)'.format(
+            name, len(skills), mismatches, time.perf_counter() - start))
+        if mismatches:
+            raise SystemExit('{} skill tags differ from the legacy rules'.format(name))
+
+
+if __name__ == '__main__':
+    run_check(parse_args())
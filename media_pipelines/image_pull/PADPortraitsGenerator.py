@@ -63,7 +63,7 @@ attr_map = {
 
 server = Server.from_str(args.server)
 pad_db = merged_database.Database(server, args.data_dir)
-pad_db.load_database(skip_skills=True, skip_extra=True)
+pad_db.load_database(skip_skills=True, skip_bonus=True, skip_extra=True, skip_enemy_skills=True)
 
 for merged_card in pad_db.cards:
     card = merged_card.card
@@ -311,6 +311,20 @@ CREATE TABLE `dungeon_type` (
   KEY `tstamp` (`tstamp`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 
+--
+-- Table structure for table `dungeon_wave_state`
+--
+
+DROP TABLE IF EXISTS `dungeon_wave_state`;
+CREATE TABLE `dungeon_wave_state` (
+  `dungeon_id` int(11) NOT NULL,
+  `wave_count` int(11) NOT NULL,
+  `max_pull_id` int(11) NOT NULL,
+  `data_hash` char(40) NOT NULL,
+  `tstamp` int(11) NOT NULL,
+  PRIMARY KEY (`dungeon_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
 --
 -- Table structure for table `dungeons`
 --
@@ -898,6 +912,18 @@ CREATE TABLE `news` (
   KEY `tstamp` (`tstamp`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 
+--
+-- Table structure for table `processor_state`
+--
+
+DROP TABLE IF EXISTS `processor_state`;
+CREATE TABLE `processor_state` (
+  `name` varchar(64) NOT NULL,
+  `content_hash` char(40) NOT NULL,
+  `tstamp` int(11) NOT NULL,
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
 --
 -- Table structure for table `purchases`
 --
@@ -962,6 +988,7 @@ CREATE TABLE `schedule` (
   `tstamp` int(11) NOT NULL,
   PRIMARY KEY (`event_id`),
   KEY `tstamp_idx` (`tstamp`),
+  KEY `end_timestamp_idx` (`end_timestamp`),
   KEY `server_id_idx` (`server_id`),
   KEY `event_type_id_idx` (`event_type_id`),
   KEY `dungeon_id_idx` (`dungeon_id`),
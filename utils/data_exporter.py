@@ -10,21 +10,16 @@ import padtools
 from pad.common import pad_util
 from pad.common.shared_types import Server
 from pad.raw.skills import skill_text_typing
-from pad.raw.skills.emoji_en.enemy_skill_text import EnEmojiESTextConverter
-from pad.raw.skills.en.active_skill_text import EnASTextConverter
-from pad.raw.skills.en.enemy_skill_text import EnESTextConverter
-from pad.raw.skills.en.leader_skill_text import EnLSTextConverter
 from pad.raw.skills.enemy_skill_info import BEHAVIOR_MAP
-from pad.raw.skills.ja.active_skill_text import JaASTextConverter
-from pad.raw.skills.ja.enemy_skill_text import JaESTextConverter
-from pad.raw.skills.ja.leader_skill_text import JaLSTextConverter
 from pad.raw.skills.leader_skill_info import LeaderSkill
+from pad.raw.skills.skill_text_cache import skill_text_cache, JA_AS_CONVERTER, EN_AS_CONVERTER, JA_LS_CONVERTER, \
+    EN_LS_CONVERTER, JA_ES_CONVERTER, EN_ES_CONVERTER, EN_EMOJI_ES_CONVERTER
 from pad.raw_processor import merged_database
 from pad.raw_processor.crossed_data import CrossServerDatabase, CrossServerEnemySkill, CrossServerDungeon
 
-AS_CONVERTERS = (JaASTextConverter(), EnASTextConverter(), EnASTextConverter())
-LS_CONVERTERS = (JaLSTextConverter(), EnLSTextConverter(), EnLSTextConverter())
-ES_CONVERTERS = (JaESTextConverter(), EnESTextConverter(), EnESTextConverter(), EnEmojiESTextConverter())
+AS_CONVERTERS = (JA_AS_CONVERTER, EN_AS_CONVERTER, EN_AS_CONVERTER)
+LS_CONVERTERS = (JA_LS_CONVERTER, EN_LS_CONVERTER, EN_LS_CONVERTER)
+ES_CONVERTERS = (JA_ES_CONVERTER, EN_ES_CONVERTER, EN_ES_CONVERTER, EN_EMOJI_ES_CONVERTER)
 
 
 def parse_args():
@@ -39,6 +34,8 @@ def parse_args():
     input_group.add_argument("--image_data_only", default=False, action="store_true",
                              help="Should we only dump image availability")
     input_group.add_argument("--server", default="JP", help="Server to build for")
+    input_group.add_argument("--text_processes", default=1, type=int,
+                             help="Number of worker processes used to render skill text")
 
     help_group = parser.add_argument_group("Help")
     help_group.add_argument("-h", "--help", action="help",
@@ -98,9 +95,17 @@ def dump_data(args):
         raise ValueError("Server must be JP, NA, or KR")
 
     cross_db = CrossServerDatabase(jp_db, na_db, kr_db, server)
+    prerender_skill_text(cross_db, args.text_processes)
     save_cross_database(output_dir, cross_db)
 
 
+def prerender_skill_text(db: CrossServerDatabase, processes: int):
+    skills = [css.cur_skill for css in db.active_skills + db.leader_skills]
+    enemy_skills = [(css.cur_skill.enemy_skill_id, BEHAVIOR_MAP[css.cur_skill.type](css.cur_skill))
+                    for css in db.enemy_skills if css.cur_skill.type in BEHAVIOR_MAP]
+    skill_text_cache.prerender(skills, enemy_skills, enemy_method='description', processes=processes)
+
+
 def save_cross_database(output_dir: str, db: CrossServerDatabase):
     raw_card_dir = os.path.join(output_dir, 'cards')
     pathlib.Path(raw_card_dir).mkdir(parents=True, exist_ok=True)
@@ -169,9 +174,9 @@ def dump_skill(f, css, converter, tag_extractor_fn):
             f.write('Stats: [{}, {}, {}, {}]\n'.format(cur_skill.hp, cur_skill.atk, cur_skill.rcv, cur_skill.shield))
 
     f.write('Game: {}\n'.format(na_skill.raw_description))
-    f.write('JP: {}\n'.format(cur_skill.full_text(converter[0]) or jp_skill.raw_description))
-    f.write('EN: {}\n'.format(cur_skill.full_text(converter[1]) or na_skill.raw_description))
-    f.write('KR: {}\n'.format(cur_skill.full_text(converter[2]) or kr_skill.raw_description))
+    f.write('JP: {}\n'.format(skill_text_cache.full_text(cur_skill, converter[0]) or jp_skill.raw_description))
+    f.write('EN: {}\n'.format(skill_text_cache.full_text(cur_skill, converter[1]) or na_skill.raw_description))
+    f.write('KR: {}\n'.format(skill_text_cache.full_text(cur_skill, converter[2]) or kr_skill.raw_description))
     f.write('\n')
 
 
@@ -185,10 +190,14 @@ def dump_enemy_skill(f, css: CrossServerEnemySkill, converter):
         f.write('Error: Skill Type not in JP Skill Map\n')
         return
     skill = BEHAVIOR_MAP[cur_skill.type](cur_skill)
-    f.write('JP: {}\n'.format(skill.description(converter[0])))
-    f.write('EN: {}\n'.format(skill.description(converter[1])))
-    f.write('KR: {}\n'.format(skill.description(converter[2])))
-    f.write('Emoji: {}\n'.format(skill.description(converter[3])))
+
+    def description(c):
+        return skill_text_cache.enemy_text('description', cur_skill.enemy_skill_id, skill, c)
+
+    f.write('JP: {}\n'.format(description(converter[0])))
+    f.write('EN: {}\n'.format(description(converter[1])))
+    f.write('KR: {}\n'.format(description(converter[2])))
+    f.write('Emoji: {}\n'.format(description(converter[3])))
     f.write('\n')
 
 